@@ -13,16 +13,23 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    # 🔥 🔥 HTML 템플릿 자동 리로드 활성화 🔥 🔥
-    app.config["TEMPLATES_AUTO_RELOAD"] = True
+    # 개발 모드: 템플릿 자동 리로드 + 정적 파일 캐시 0 (기본)
+    # 운영 모드(APP_ENV=production): 조각 캐시 + 정적 파일 지문/긴 max-age
+    from app.caching import init_caching
+    init_caching(app)
 
-    # 🔥 캐시 때문에 업데이트 안될 경우 해결
-    app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
+    # 활성 DB 스냅샷 경로 + 포인터 변경 감시 (db.init_app 전에: 엔진 creator 설정)
+    from app.snapshots import init_snapshots
+    init_snapshots(app, db)
 
     db.init_app(app)
     migrate.init_app(app, db)
 
-    from app import model, ml_model
+    # SQLite 연결마다 PRAGMA 프로필 적용 (Config.SQLITE_PRAGMAS)
+    from app.sqlite_tuning import init_sqlite_tuning
+    init_sqlite_tuning(app, db)
+
+    from app import model
 
     # Blueprint 등록
     from .views import index_views, predict_views, support_views, login_views, inquiry_views, llama3_views, nlq_views
@@ -34,4 +41,8 @@ def create_app():
     app.register_blueprint(llama3_views.bp)
     app.register_blueprint(nlq_views.bp)
 
+    # CLI 명령 (flask check-query-plans ...)
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
@@ -0,0 +1,145 @@
+# app/caching.py
+"""
+운영 캐시 설정
+- 렌더링된 HTML 조각 캐시 (TTL + LRU, 키에 데이터 버전 포함)
+- 데이터 버전 기반 ETag / Last-Modified 조건부 응답
+- 정적 파일 지문(?v=파일해시) 붙은 요청만 긴 max-age (지문 없는 URL은 짧게)
+
+개발 모드(DEV_MODE)에서는 전부 끄고 템플릿 자동 리로드 / 정적 파일 캐시 0 유지
+"""
+import hashlib
+import os
+from typing import Callable, Hashable, Optional, Tuple
+
+from flask import current_app, g, make_response, request
+from markupsafe import Markup
+
+from app.services.cache import TTLCache
+from app.services.data_version import data_version, last_modified
+
+
+def _deploy_id(app) -> str:
+    """
+    재배포(템플릿 변경) 후 예전 ETag가 맞지 않도록 섞는 값
+    워커 프로세스끼리 같아야 304가 나오므로 시작 시각이 아니라 DEPLOY_ID / 템플릿 내용 해시
+    """
+    if app.config.get("DEPLOY_ID"):
+        return app.config["DEPLOY_ID"]
+    h = hashlib.sha1()
+    root = app.template_folder and os.path.join(app.root_path, app.template_folder)
+    for dirpath, dirnames, filenames in os.walk(root or ""):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            h.update(os.path.relpath(path, root).encode())
+            with open(path, "rb") as fp:
+                h.update(fp.read())
+    return h.hexdigest()[:12]
+
+
+def init_caching(app):
+    if app.config.get("DEV_MODE", True):
+        # 🔥 HTML 템플릿 자동 리로드 + 정적 파일 캐시 끔 (개발용)
+        app.config["TEMPLATES_AUTO_RELOAD"] = True
+        app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
+        return
+
+    app.config["TEMPLATES_AUTO_RELOAD"] = False
+    app.config["SEND_FILE_MAX_AGE_DEFAULT"] = app.config["STATIC_UNVERSIONED_MAX_AGE"]
+    app.extensions["deploy_id"] = _deploy_id(app)
+    app.extensions["fragment_cache"] = TTLCache(
+        maxsize=app.config["FRAGMENT_CACHE_SIZE"],
+        ttl=app.config["FRAGMENT_CACHE_TTL"],
+    )
+
+    _fingerprints = {}
+
+    @app.url_defaults
+    def static_fingerprint(endpoint, values):
+        # url_for('static', filename=...) -> ...?v=<내용 해시 앞 10자리>
+        if endpoint != "static" or "v" in values or "filename" not in values:
+            return
+        path = os.path.join(app.static_folder, values["filename"])
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        cached = _fingerprints.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, "rb") as fp:
+                cached = (mtime, hashlib.md5(fp.read()).hexdigest()[:10])
+            _fingerprints[path] = cached
+        values["v"] = cached[1]
+
+    def get_send_file_max_age(filename):
+        # ?v= 가 붙은 URL만 내용이 바뀌면 URL도 바뀜 -> 1년 / 나머지는 짧게 (바뀌면 금방 반영)
+        if request.args.get("v"):
+            return app.config["STATIC_MAX_AGE"]
+        return app.config["STATIC_UNVERSIONED_MAX_AGE"]
+
+    app.get_send_file_max_age = get_send_file_max_age
+
+
+def current_data_version() -> str:
+    # 한 요청 안에서는 한 번만 stat
+    if "data_version" not in g:
+        g.data_version = data_version()
+    return g.data_version
+
+
+def _fragment_cache() -> Optional[TTLCache]:
+    return current_app.extensions.get("fragment_cache")
+
+
+def _fragment_key(key: Tuple[Hashable, ...]):
+    return (current_data_version(),) + tuple(key)
+
+
+def get_fragment(key: Tuple[Hashable, ...]) -> Optional[Markup]:
+    cache = _fragment_cache()
+    if cache is None:
+        return None
+    return cache.get(_fragment_key(key))
+
+
+def set_fragment(key: Tuple[Hashable, ...], html: str) -> Markup:
+    html = Markup(html)
+    cache = _fragment_cache()
+    if cache is not None:
+        cache.set(_fragment_key(key), html)
+    return html
+
+
+def cached_fragment(key: Tuple[Hashable, ...], render: Callable[[], str]) -> Markup:
+    """렌더링된 조각을 (데이터 버전, *key)로 캐시 — 개발 모드면 매번 렌더링"""
+    html = get_fragment(key)
+    if html is None:
+        html = set_fragment(key, render())
+    return html
+
+
+def conditional_page(name: str, render: Callable[[], str]):
+    """
+    데이터 버전으로 ETag / Last-Modified를 붙이고,
+    클라이언트 캐시가 최신이면 render() 없이 304
+    """
+    if current_app.config.get("DEV_MODE", True):
+        return make_response(render())
+
+    deploy_id = current_app.extensions.get("deploy_id", "")
+    etag = hashlib.sha1(f"{name}|{current_data_version()}|{deploy_id}".encode()).hexdigest()[:20]
+    modified = last_modified()
+
+    fresh = False
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif modified is not None and request.if_modified_since is not None:
+        fresh = request.if_modified_since >= modified
+
+    resp = make_response("", 304) if fresh else make_response(render())
+    resp.set_etag(etag)
+    if modified is not None:
+        resp.last_modified = modified
+    # 매번 재검증 (304면 본문 없이 끝)
+    resp.cache_control.no_cache = True
+    return resp
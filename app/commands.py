@@ -0,0 +1,187 @@
+# app/commands.py
+"""
+flask CLI 명령 (FLASK_APP=run.py flask <command>)
+"""
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command("check-query-plans")
+    def check_query_plans():
+        """운영 쿼리 EXPLAIN QUERY PLAN 검사 — HOUSE_INFO/HOUSE_FORECAST 풀 스캔 (또는 커버링이어야 할 쿼리의 row 조회)이면 exit 1"""
+        from app.services.query_plans import run_plan_checks
+
+        failed = 0
+        for c in run_plan_checks():
+            status = "OK  " if c.ok else "FAIL"
+            click.echo(f"[{status}] {c.name}")
+            for detail in c.plan:
+                click.echo(f"         {detail}")
+            if not c.ok:
+                failed += 1
+
+        if failed:
+            click.echo(f"\n{failed} query(s) fall back to a full table scan or miss a covering index.", err=True)
+            raise SystemExit(1)
+        click.echo("\nAll production queries use an index.")
+
+    @app.cli.command("bench-queries")
+    @click.option("--repeat", default=50, show_default=True, help="쿼리당 반복 횟수")
+    def bench_queries(repeat):
+        """운영 쿼리를 SQLite 기본 설정 vs Config.SQLITE_PRAGMAS 프로필로 비교"""
+        from app.services.query_bench import compare, run_benchmark
+
+        rows = compare(run_benchmark(repeat=repeat))
+
+        click.echo(f"{'query':<40} {'rows':>6} {'default ms':>11} {'tuned ms':>9} {'p95 d/t':>15} {'speedup':>8}")
+        for r in rows:
+            p95 = f"{r['default_p95_ms']:.2f}/{r['tuned_p95_ms']:.2f}"
+            speedup = f"{r['speedup']:.2f}x" if r["speedup"] else "-"
+            click.echo(
+                f"{r['name']:<40} {r['rows']:>6} {r['default_ms']:>11.3f} {r['tuned_ms']:>9.3f} {p95:>15} {speedup:>8}"
+            )
+
+    @app.cli.command("rebuild-cube")
+    @click.option("--district", multiple=True, help="이 구만 다시 계산 (여러 번 지정 가능, 없으면 전체)")
+    def rebuild_cube_cmd(district):
+        """HOUSE_FORECAST_CUBE(구/동/유형/거래 × 분기 집계) 다시 계산"""
+        from app.services.forecast_cube import rebuild_cube
+        from app.services.forecast_store import get_forecast_store, reset_forecast_store
+
+        reset_forecast_store()
+        groups = None
+        if district:
+            store = get_forecast_store()
+            cols = ("district", "dong_name", "house_type", "lease_type")
+            groups = {
+                g for g in zip(*(store.meta[c] for c in cols)) if g[0] in district
+            }
+        stats = rebuild_cube(groups)
+        click.echo(f"{stats['cells']} cells / {stats['rows']} rows written.")
+
+    @app.cli.command("ingest")
+    @click.argument("table", type=click.Choice(["house-info", "support-list"]))
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--chunk-size", default=5000, show_default=True, help="트랜잭션 1개당 행 수")
+    @click.option("--no-reindex", is_flag=True, help="끝난 뒤 REINDEX/ANALYZE 생략")
+    def ingest(table, path, chunk_size, no_reindex):
+        """CSV/Parquet -> HOUSE_INFO / SUPPORT_LIST 청크 업서트 (HOUSE_INFO는 HOUSE_FORECAST·집계 큐브까지 갱신)"""
+        from app.services.forecast_cube import has_cube_table, rebuild_cube
+        from app.services.ingest import ingest_house_info, ingest_support_list
+
+        loader = ingest_house_info if table == "house-info" else ingest_support_list
+        try:
+            result = loader(path, chunk_size=chunk_size, reindex=not no_reindex)
+        except (RuntimeError, ValueError) as e:
+            raise click.ClickException(str(e))
+
+        if result.ignored_columns:
+            click.echo(f"ignored columns: {', '.join(result.ignored_columns)}")
+        click.echo(f"{result.table}: {result.rows} rows in {result.chunks} chunk(s), {result.elapsed_s:.2f}s")
+
+        # 메모리 캐시(예측 저장소/공간 인덱스/매칭 캐시)는 data_version 이 바뀌어서 다음 조회 때 다시 만들어짐
+        if table == "house-info" and result.rows and has_cube_table():
+            stats = rebuild_cube(result.groups)
+            click.echo(f"HOUSE_FORECAST_CUBE: {stats['cells']} cells / {stats['rows']} rows rebuilt.")
+
+    @app.cli.command("refresh-forecasts")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--chunk-size", default=5000, show_default=True, help="트랜잭션 1개당 행 수")
+    @click.option("--atol", default=0.01, show_default=True, help="같은 값으로 볼 절대 오차 (만원)")
+    @click.option("--rtol", default=1e-6, show_default=True, help="같은 값으로 볼 상대 오차")
+    @click.option("--dry-run", is_flag=True, help="비교 결과만 출력 (쓰기 없음)")
+    def refresh_forecasts_cmd(path, chunk_size, atol, rtol, dry_run):
+        """새 예측 결과(CSV/Parquet)와 저장값을 비교해서 바뀐 셀만 갱신 + data_version +1"""
+        from app.services.forecast_cube import has_cube_table, rebuild_cube
+        from app.services.forecast_refresh import refresh_forecasts
+
+        try:
+            r = refresh_forecasts(path, chunk_size=chunk_size, atol=atol, rtol=rtol, dry_run=dry_run)
+        except (RuntimeError, ValueError) as e:
+            raise click.ClickException(str(e))
+
+        if r.ignored_columns:
+            click.echo(f"ignored columns: {', '.join(r.ignored_columns)}")
+        click.echo(
+            f"{r.rows} rows read ({r.matched} matched, {r.unknown} unknown) in {r.chunks} chunk(s), {r.elapsed_s:.2f}s"
+        )
+        verb = "would change" if dry_run else "changed"
+        click.echo(f"{verb}: {r.changed_cells} cells in {r.changed_rows} rows")
+
+        if r.changed_rows and not dry_run and has_cube_table():
+            stats = rebuild_cube(r.groups)
+            click.echo(f"HOUSE_FORECAST_CUBE: {stats['cells']} cells / {stats['rows']} rows rebuilt.")
+
+    # -------------------------------------------------
+    # DB 스냅샷 (app/snapshots.py)
+    #   flask snapshot build                 -> snapshots/realestate_<시각>.db
+    #   REALESTATE_DB=snapshots/<파일> flask ingest / refresh-forecasts ...
+    #   flask snapshot activate <파일>       -> 실행 중인 웹 프로세스가 다음 요청부터 새 파일 사용
+    # -------------------------------------------------
+    @app.cli.group("snapshot")
+    def snapshot():
+        """읽기 전용 DB 스냅샷 만들기 / 검증 / 교체"""
+
+    @snapshot.command("list")
+    def snapshot_list():
+        """스냅샷 목록 (* = 활성)"""
+        from app.snapshots import get_manager, list_snapshots
+
+        manager = get_manager()
+        active = manager.active_name()
+        if not active:
+            click.echo(f"* {manager.base_path} (base, no snapshot active)")
+        for p in list_snapshots(manager):
+            mark = "*" if p.name == active else " "
+            click.echo(f"{mark} {p.name:<40} {p.stat().st_size / 1024 / 1024:>8.1f} MB")
+
+    @snapshot.command("build")
+    @click.argument("name", required=False)
+    def snapshot_build(name):
+        """활성 DB를 새 스냅샷 파일로 복사 (적재 작업은 이 파일에 함)"""
+        from app.snapshots import build_snapshot, get_manager
+
+        try:
+            path = build_snapshot(get_manager(), name)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"built {path}")
+        click.echo(f"  load:     REALESTATE_DB={path} flask ingest house-info <file>")
+        click.echo(f"  activate: flask snapshot activate {path.name}")
+
+    @snapshot.command("validate")
+    @click.argument("name")
+    def snapshot_validate(name):
+        """무결성 / 필수 테이블 / 마이그레이션 버전 검사"""
+        from app.snapshots import get_manager, validate_snapshot
+
+        manager = get_manager()
+        problems = validate_snapshot(manager.dir / name, reference=manager.path)
+        for p in problems:
+            click.echo(f"[FAIL] {p}", err=True)
+        if problems:
+            raise SystemExit(1)
+        click.echo(f"[OK  ] {name}")
+
+    @snapshot.command("activate")
+    @click.argument("name")
+    def snapshot_activate(name):
+        """검증 통과 시 활성 포인터를 원자적으로 교체"""
+        from app.snapshots import activate_snapshot, get_manager, validate_snapshot
+
+        manager = get_manager()
+        problems = validate_snapshot(manager.dir / name, reference=manager.path)
+        if problems:
+            raise click.ClickException("; ".join(problems))
+        activate_snapshot(manager, name)
+        click.echo(f"active snapshot -> {name}")
+
+    @snapshot.command("prune")
+    @click.option("--keep", default=3, show_default=True, help="활성 스냅샷 외에 남길 최근 개수")
+    def snapshot_prune(keep):
+        """오래된 스냅샷 삭제"""
+        from app.snapshots import get_manager, prune_snapshots
+
+        for p in prune_snapshots(get_manager(), keep):
+            click.echo(f"removed {p.name}")
@@ -1,16 +1,67 @@
 # app/config.py
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 
 class Config:
-    # 메인 DB
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{(BASE_DIR / 'realestate_v0.5.1.db').as_posix()}"
+    # 메인 DB (스냅샷 포인터가 없을 때 읽는 파일, 실제 연결 경로는 app/snapshots.py 에서 결정)
+    BASE_DB_PATH = BASE_DIR / 'realestate_v0.5.1.db'
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{BASE_DB_PATH.as_posix()}"
+
+    # ===== DB 스냅샷 (flask snapshot build / activate) =====
+    SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", str(BASE_DIR / "snapshots")))
+    # 이 파일을 직접 열기 (활성 포인터 무시): 새 스냅샷에 적재할 때
+    #   REALESTATE_DB=snapshots/xxx.db flask ingest house-info new.csv
+    DB_PATH_OVERRIDE = os.getenv("REALESTATE_DB") or None
 
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = "dev"
 
+    # ===== SQLite 읽기 튜닝 (app/sqlite_tuning.py 에서 연결마다 적용) =====
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",                  # 읽기와 쓰기가 서로 안 막힘 (DB 파일에 영구 저장)
+        "synchronous": "NORMAL",                # WAL에서는 NORMAL로도 커밋 안전
+        "cache_size": -64 * 1024,               # 페이지 캐시 64MB (음수 = KiB)
+        "mmap_size": 256 * 1024 * 1024,         # 256MB 메모리 맵 읽기
+        "temp_store": "MEMORY",                 # 정렬/GROUP BY 임시 B-tree를 메모리에
+        "busy_timeout": 5000,                   # ms, 쓰기 잠금 대기
+    }
+    # 웹 서버 엔진 연결을 읽기 전용으로 (쓰기 없는 조회 전용 배포에서만 1)
+    # input_builder 등 조회 전용 연결(sqlite_pool)은 항상 query_only
+    SQLITE_QUERY_ONLY = os.getenv("SQLITE_QUERY_ONLY", "0") == "1"
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("SQLITE_POOL_SIZE", "8")),
+        "max_overflow": int(os.getenv("SQLITE_POOL_OVERFLOW", "8")),
+        "pool_timeout": 30,
+        "pool_recycle": 3600,
+        "connect_args": {"check_same_thread": False, "timeout": 5},
+    }
+
+    # ===== 실행 모드 =====
+    # APP_ENV=production 이면 운영 캐시 설정, 그 외(기본)는 개발 모드
+    # 개발 모드: 템플릿 자동 리로드 + 정적 파일 캐시 0 + 조각/응답 캐시 끔
+    APP_ENV = os.getenv("APP_ENV", "development").strip().lower()
+    DEV_MODE = APP_ENV != "production"
+
+    # ===== 캐시 (운영 모드에서만 사용) =====
+    FRAGMENT_CACHE_SIZE = 512       # 렌더링된 조각 최대 개수 (LRU)
+    FRAGMENT_CACHE_TTL = 600        # 초
+    STATIC_MAX_AGE = 31536000       # 지문(?v=) 붙은 정적 파일은 1년
+    STATIC_UNVERSIONED_MAX_AGE = 300    # 지문 없는 정적 파일 (css 안의 url(...) 등)
+    # 페이지 ETag 에 섞는 배포 식별자 (비우면 템플릿 내용 해시 — 워커끼리 같은 값)
+    DEPLOY_ID = os.getenv("DEPLOY_ID", "")
+
+    # ===== 건물 매칭 메모이즈 (app/services/match_cache.py, 개발/운영 공통) =====
+    MATCH_CACHE_SIZE = 4096
+    MATCH_CACHE_TTL = 300           # 초 (데이터 버전이 바뀌면 TTL 전이라도 키가 달라짐)
+
+    # ===== NLQ 규칙 파서 (app/services/nlq_rules.py) =====
+    # confidence 가 이 값 이상이면 LLM 호출 없이 규칙 결과로 바로 조회
+    NLQ_RULE_MIN_CONFIDENCE = float(os.getenv("NLQ_RULE_MIN_CONFIDENCE", "0.8"))
+
 
 
 
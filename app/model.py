@@ -64,6 +64,11 @@ class SupportList(db.Model):
     # ===== 상세 정보(JSON) =====
     detail_json = db.Column(JSON, nullable=True)
 
+    # flask ingest 업서트 키 (migrations/versions/5d0e7a13c9f4)
+    __table_args__ = (
+        db.Index('ux_support_list_source_title', 'source_type', 'title', unique=True),
+    )
+
 class HouseInfo(db.Model):
     __tablename__ = 'HOUSE_INFO'
 
@@ -149,4 +154,57 @@ class HouseInfo(db.Model):
     # 최신 실거래
     recent_deposit = db.Column(db.Float)
     recent_monthly = db.Column(db.Float)
-    recent_yq = db.Column(db.Text)
\ No newline at end of file
+    recent_yq = db.Column(db.Text)
+
+    # 조회 패턴별 복합 인덱스 (migrations/versions/493cb4a4a19c)
+    __table_args__ = (
+        # 검색 조건 5개 + 지도 클러스터 집계 컬럼 (커버링, migrations/versions/f1c7a9d3e2b6)
+        db.Index(
+            'ix_house_info_search',
+            'district', 'house_type', 'lease_type', 'area_m2', 'floor',
+            'dong_name', 'latitude', 'longitude', 'recent_deposit', 'recent_monthly',
+        ),
+        db.Index('ix_house_info_match', 'district', 'dong_name', 'house_type', 'building_name'),
+        # flask ingest 업서트 키 (migrations/versions/5d0e7a13c9f4)
+        db.Index('ux_house_info_key', 'district', 'building_name', 'house_type', 'floor', 'area_m2', unique=True),
+    )
+
+
+class HouseForecast(db.Model):
+    __tablename__ = 'HOUSE_FORECAST'
+
+    # HOUSE_INFO 복합 PK를 '|'로 이은 키 (forecast_repository.HOUSE_KEY_SQL)
+    house_key = db.Column(db.Text, primary_key=True)
+    metric = db.Column(db.Text, primary_key=True)   # deposit / monthly_rent
+    yq = db.Column(db.Text, primary_key=True)       # 2025Q1 ~
+    value = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('ix_house_forecast_metric_yq', 'metric', 'yq'),
+    )
+
+
+class HouseForecastCube(db.Model):
+    __tablename__ = 'HOUSE_FORECAST_CUBE'
+
+    # 구 × 동 × 유형 × 거래 × 지표 × 분기 집계 (app/services/forecast_cube.py 에서 채움)
+    # 차원 값 '*' = 그 차원 전체 롤업
+    district = db.Column(db.Text, primary_key=True)
+    dong_name = db.Column(db.Text, primary_key=True)    # NULL 동은 ''
+    house_type = db.Column(db.Text, primary_key=True)
+    lease_type = db.Column(db.Text, primary_key=True)
+    metric = db.Column(db.Text, primary_key=True)       # deposit / monthly_rent
+    yq = db.Column(db.Text, primary_key=True)           # 2025Q1 ~
+    n = db.Column(db.Integer, nullable=False)
+    mean = db.Column(db.Float)
+    median = db.Column(db.Float)
+    p10 = db.Column(db.Float)
+    p90 = db.Column(db.Float)
+
+
+class AppMeta(db.Model):
+    __tablename__ = 'APP_META'
+
+    # 앱 전역 key/value (data_version 카운터 등, app/services/data_version.py)
+    key = db.Column(db.Text, primary_key=True)
+    value = db.Column(db.Text)
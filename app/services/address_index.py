@@ -0,0 +1,286 @@
+# app/services/address_index.py
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app import db
+from app.services.data_version import versioned_singleton
+from app.services.forecast_repository import HOUSE_KEY_SQL
+from app.services.input_builder import DISTRICT_DISPLAY_MAP
+from app.services.name_index import normalize_name
+
+
+# -------------------------------------------------
+# 주소 토큰화
+#   '서울특별시 구로구 디지털로 92'        -> gu:guro / road:디지털로 / rnum:디지털로|92
+#   '서울특별시 구로구 오류동 616-11'      -> gu:guro / dong:오류동 / lot:616-11 / lot:616
+# -------------------------------------------------
+_GU_CODE = {name: code for code, name in DISTRICT_DISPLAY_MAP.items()}
+
+_CITY_RE = re.compile(r"서울(?:특별)?시|서울")
+_BUNJI_RE = re.compile(r"(\d)\s*번지")
+_ANY_GU_RE = re.compile(r"[가-힣]{1,4}구(?=[\s,]|$)")
+
+_ADDR_RE = re.compile(
+    r"(?P<dong>[가-힣]+\d*동)"
+    r"|(?P<road>[가-힣][가-힣0-9]*(?:로|길))\s*(?P<rnum>\d+(?:-\d+)?)?(?![\d가-힣])"
+    r"|(?<![\w-])(?P<lot>(?:산\s*)?\d+(?:-\d+)?)(?![\d가-힣A-Za-z㎡%.])"
+)
+
+# 토큰 종류별 가중치 (점수 = 맞은 가중치 / 입력 주소 토큰 가중치 합)
+WEIGHTS = {"dong": 2.0, "road": 3.0, "rnum": 4.0, "lot": 4.0}
+
+# 번지/건물번호처럼 한 곳을 가리키는 토큰 (자신 있게 1건으로 볼 수 있는 조건)
+SPECIFIC_KINDS = ("rnum", "lot")
+
+
+def _number_tokens(kind: str, prefix: str, num: str) -> List[str]:
+    """'616-11' -> ['lot:616-11', 'lot:616'] (본번만 입력해도 맞게)"""
+    num = num.replace(" ", "")
+    out = [f"{kind}:{prefix}{num}"]
+    if "-" in num:
+        out.append(f"{kind}:{prefix}{num.split('-')[0]}")
+    return out
+
+
+def _base_dong(dong: str) -> str:
+    # 행정동 -> 법정동 ('불광1동' -> '불광동')
+    return re.sub(r"\d+동$", "동", dong)
+
+
+def address_tokens(address: Optional[str]) -> Set[str]:
+    """DB 주소 1개 -> 색인 토큰"""
+    s = _BUNJI_RE.sub(r"\1", _CITY_RE.sub(" ", address or ""))
+    out: Set[str] = set()
+    for name, code in _GU_CODE.items():
+        if name in s:
+            out.add(f"gu:{code}")
+            s = s.replace(name, " ")
+    for m in _ADDR_RE.finditer(s):
+        if m.group("dong"):
+            out.add(f"dong:{_base_dong(m.group('dong'))}")
+        elif m.group("road"):
+            out.add(f"road:{m.group('road')}")
+            if m.group("rnum"):
+                out.update(_number_tokens("rnum", f"{m.group('road')}|", m.group("rnum")))
+        else:
+            out.update(_number_tokens("lot", "", m.group("lot")))
+    return out
+
+
+@dataclass
+class ParsedAddress:
+    """자유 입력 주소 파싱 결과"""
+    district: Optional[str] = None                  # 구 코드 (모르는 구면 '?')
+    groups: List[Tuple[str, float, Tuple[str, ...]]] = field(default_factory=list)   # (종류, 가중치, 토큰 후보)
+    words: List[str] = field(default_factory=list)  # 주소가 아닌 나머지 단어 (건물명 후보)
+
+    @property
+    def specific(self) -> bool:
+        return any(kind in SPECIFIC_KINDS for kind, _, _ in self.groups)
+
+
+# -------------------------------------------------
+# 인덱스
+# -------------------------------------------------
+@dataclass(frozen=True)
+class AddressEntry:
+    district: str
+    dong_name: Optional[str]
+    building_name: str
+    road_address: Optional[str]
+    jibun_address: Optional[str]
+    keys: Tuple[Dict, ...]          # 같은 주소/건물의 HOUSE_INFO row (house_key, house_type, floor, area_m2, lease_type)
+
+
+class AddressIndex:
+    """
+    road_address / jibun_address 역색인 (읽기 전용, 메모리)
+
+    - 후보 단위: (구, 동, 건물명, 도로명주소, 지번주소) — 층/면적이 다른 row 는 keys 로 묶음
+    - 토큰 -> 후보 id 배열, 조회는 입력 토큰 수만큼 배열 더하기 (LIKE 스캔 없음)
+    - 입력 토큰 중 색인에 없는 도로명/동/번호는 버림 ('월세로', '이동' 같은 일반 단어)
+      단, '616-11' 처럼 형태가 분명한 번호와 아는 도로 뒤 건물번호는 남겨서 틀리면 점수가 깎이게
+    """
+
+    MIN_SCORE = 0.3
+
+    def __init__(self, entries: List[AddressEntry]):
+        self.entries = entries
+        self.districts = np.array([e.district for e in entries], dtype=object)
+        self.counts = np.array([len(e.keys) for e in entries], dtype=np.int64)
+
+        postings: Dict[str, List[int]] = {}
+        names: Dict[str, List[int]] = {}
+        for i, e in enumerate(entries):
+            tokens = address_tokens(e.road_address) | address_tokens(e.jibun_address)
+            if e.dong_name:
+                tokens.add(f"dong:{e.dong_name}")
+            for t in tokens:
+                postings.setdefault(t, []).append(i)
+            names.setdefault(normalize_name(e.building_name), []).append(i)
+
+        self._postings = {t: np.asarray(v, dtype=np.int64) for t, v in postings.items()}
+        self._names = {k: np.asarray(v, dtype=np.int64) for k, v in names.items()}
+
+    @classmethod
+    def load(cls) -> "AddressIndex":
+        rows = db.session.execute(text(
+            f"SELECT district, dong_name, building_name, road_address, jibun_address, "
+            f"{HOUSE_KEY_SQL} AS house_key, house_type, floor, area_m2, lease_type "
+            f"FROM HOUSE_INFO "
+            f"WHERE road_address IS NOT NULL OR jibun_address IS NOT NULL "
+            f"ORDER BY rowid"
+        )).fetchall()
+
+        grouped: Dict[Tuple, List[Dict]] = {}
+        for district, dong, name, road, jibun, house_key, house_type, floor, area, lease_type in rows:
+            grouped.setdefault((district, dong, name, road, jibun), []).append({
+                "house_key": house_key,
+                "house_type": house_type,
+                "floor": floor,
+                "area_m2": area,
+                "lease_type": lease_type,
+            })
+        entries = [AddressEntry(*k, keys=tuple(v)) for k, v in grouped.items()]
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # -------------------------------------------------
+    # 자유 입력 파싱
+    # -------------------------------------------------
+    def parse(self, query: str) -> ParsedAddress:
+        parsed = ParsedAddress()
+        s = _BUNJI_RE.sub(r"\1", _CITY_RE.sub(" ", query or ""))
+
+        for name, code in _GU_CODE.items():
+            if name in s:
+                parsed.district = code
+                s = s.replace(name, " ")
+        if parsed.district is None and _ANY_GU_RE.search(s):
+            parsed.district = "?"       # 서비스 밖 구 -> 후보 없음
+        s = _ANY_GU_RE.sub(" ", s)
+
+        rest = []
+        last = 0
+        seen_dong = False
+        for m in _ADDR_RE.finditer(s):
+            rest.append(s[last:m.start()])
+            last = m.end()
+            if m.group("dong"):
+                dong = m.group("dong")
+                alts = tuple(t for t in {f"dong:{dong}", f"dong:{_base_dong(dong)}"} if t in self._postings)
+                if alts:
+                    parsed.groups.append(("dong", WEIGHTS["dong"], alts))
+                    seen_dong = True
+                else:
+                    rest.append(f" {dong} ")
+            elif m.group("road"):
+                road = m.group("road")
+                if f"road:{road}" not in self._postings:
+                    rest.append(f" {m.group(0)} ")
+                    continue
+                parsed.groups.append(("road", WEIGHTS["road"], (f"road:{road}",)))
+                if m.group("rnum"):
+                    num = m.group("rnum")
+                    parsed.groups.append(("rnum", WEIGHTS["rnum"], (f"rnum:{road}|{num}",)))
+            else:
+                # 본번만 있는 숫자는 동 뒤에 올 때만 번지로 봄 ('59', '2026' 같은 숫자 오인 방지)
+                lot = m.group("lot").replace(" ", "")
+                if "-" in lot or lot.startswith("산") or seen_dong:
+                    parsed.groups.append(("lot", WEIGHTS["lot"], (f"lot:{lot}",)))
+                else:
+                    rest.append(f" {lot} ")
+        rest.append(s[last:])
+
+        parsed.words = [w for w in re.split(r"[\s,]+", " ".join(rest)) if w]
+        return parsed
+
+    # -------------------------------------------------
+    # 조회
+    # -------------------------------------------------
+    def resolve(self, query: str, limit: int = 5) -> Dict:
+        """
+        자유 입력 주소 -> 점수순 후보
+        반환: {"parsed": {...}, "confident": bool, "items": [{score, name_match, matched, ...주소, keys}]}
+          confident: 번지/건물번호까지 전부 맞은 후보가 하나뿐 (NLQ 에서 LLM 없이 바로 써도 되는 경우)
+        """
+        parsed = self.parse(query)
+        out = {"parsed": {
+            "district": parsed.district,
+            "tokens": [alts[0] for _, _, alts in parsed.groups],
+            "words": parsed.words,
+        }, "confident": False, "items": []}
+        if not parsed.groups or parsed.district == "?" or limit <= 0:
+            return out
+
+        n = len(self.entries)
+        total = sum(w for _, w, _ in parsed.groups)
+        score = np.zeros(n, dtype=np.float64)
+        hit_sets: List[Tuple[str, Set[int]]] = []
+        for kind, w, alts in parsed.groups:
+            hits = [self._postings[t] for t in alts if t in self._postings]
+            if not hits:
+                continue
+            ids = np.unique(np.concatenate(hits))
+            score[ids] += w
+            hit_sets.append((kind, set(ids.tolist())))
+        score /= total
+
+        name_hit = np.zeros(n, dtype=bool)
+        for word in parsed.words:
+            ids = self._names.get(normalize_name(word))
+            if ids is not None:
+                name_hit[ids] = True
+
+        ok = score >= self.MIN_SCORE
+        if parsed.district is not None:
+            ok &= self.districts == parsed.district
+        idx = np.flatnonzero(ok)
+        # 점수 > 건물명 일치 > row 많은 순 > 원래 순서
+        idx = idx[np.lexsort((idx, -self.counts[idx], ~name_hit[idx], -score[idx]))]
+
+        items = []
+        for i in idx[:limit]:
+            e = self.entries[i]
+            items.append({
+                "score": round(float(score[i]), 3),
+                "name_match": bool(name_hit[i]),
+                "matched": [kind for kind, ids in hit_sets if i in ids],
+                "building_name": e.building_name,
+                "district": e.district,
+                "dong_name": e.dong_name,
+                "road_address": e.road_address,
+                "jibun_address": e.jibun_address,
+                "keys": list(e.keys),
+            })
+        out["items"] = items
+
+        if items and parsed.specific and items[0]["score"] >= 1.0:
+            # 만점 후보가 하나뿐이거나, 만점 중 건물명까지 맞은 게 하나뿐 (정렬상 맨 앞)
+            top = idx[score[idx] >= 1.0]
+            out["confident"] = len(top) == 1 or int(name_hit[top].sum()) == 1
+        return out
+
+
+# -------------------------------------------------
+# 프로세스 전역 싱글톤 (Lazy)
+#   APP_META.data_version 이 바뀌면 다시 만듦 (그동안 다른 스레드는 이전 인덱스 사용)
+# -------------------------------------------------
+_index = versioned_singleton(AddressIndex.load)
+
+
+def get_address_index() -> AddressIndex:
+    return _index.get()
+
+
+def reset_address_index() -> None:
+    """데이터 갱신 후 다음 조회에서 다시 만들도록 비움"""
+    _index.reset()
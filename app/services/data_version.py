@@ -0,0 +1,133 @@
+# app/services/data_version.py
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+from app.services.sqlite_pool import get_pool
+from app.snapshots import current_db_path
+
+
+# 적재/예측 갱신 커밋마다 +1 되는 카운터 (migrations/versions/e3a9c5f18b62)
+META_TABLE = "APP_META"
+COUNTER_KEY = "data_version"
+
+_COUNTER_SQL = f"SELECT value FROM {META_TABLE} WHERE key = '{COUNTER_KEY}'"
+
+
+def _db_files() -> List[str]:
+    """SQLite 본 파일 + WAL (WAL 모드면 커밋이 -wal 파일에 먼저 쌓임)"""
+    path = current_db_path()
+    if not path or path == ":memory:":
+        return []
+    return [path, path + "-wal"]
+
+
+def _stats() -> List[Tuple[str, int, int]]:
+    out = []
+    for p in _db_files():
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        out.append((os.path.basename(p), st.st_mtime_ns, st.st_size))
+    return out
+
+
+def data_counter() -> int:
+    """
+    APP_META.data_version 값 (테이블이 없으면 0)
+    조회 전용 풀 연결 + PK 조회 1번이라 요청마다 불러도 됨
+    """
+    try:
+        row = get_pool().connection().execute(_COUNTER_SQL).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row and row[0] is not None else 0
+
+
+def bump_data_version(conn) -> Optional[int]:
+    """
+    카운터 +1 (호출한 쪽 트랜잭션 안에서 -> 데이터 변경과 같이 커밋됨)
+    conn: SQLAlchemy Connection, APP_META 가 없으면 아무것도 안 하고 None
+    """
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (META_TABLE,)
+    ).first()
+    if exists is None:
+        return None
+    conn.exec_driver_sql(
+        f"INSERT INTO {META_TABLE} (key, value) VALUES (?, '1') "
+        f"ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+        (COUNTER_KEY,),
+    )
+    return int(conn.exec_driver_sql(_COUNTER_SQL).scalar())
+
+
+def data_version() -> str:
+    """
+    DB 내용이 바뀌면 바뀌는 짧은 버전 문자열 (파일 mtime/크기 + data_version 카운터)
+    캐시 키 / ETag 재료로 씀
+    """
+    raw = repr((_stats(), data_counter())).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def last_modified() -> Optional[datetime]:
+    """DB 파일 중 가장 최근 수정 시각 (Last-Modified 헤더용, 초 단위 절삭)"""
+    stats = _stats()
+    if not stats:
+        return None
+    ts = max(mtime for _, mtime, _ in stats) // 1_000_000_000
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+# -------------------------------------------------
+# data_version 기준 프로세스 전역 싱글톤 (Lazy)
+#   메모리 인덱스/저장소 (forecast_store, spatial_index, name_index, address_index, nlq_rules) 공용
+# -------------------------------------------------
+T = TypeVar("T")
+
+
+class VersionedSingleton(Generic[T]):
+    """
+    loader() 결과를 data_counter() 값과 같이 들고 있다가 카운터가 바뀌면 다시 만듦
+
+    - 처음 만들 때만 기다림, 다시 만드는 동안 다른 스레드는 이전 값으로 계속 응답
+    - reset(): 스냅샷 전환 등으로 파일 자체가 바뀐 뒤 다음 get() 에서 다시 만들도록 비움
+    """
+
+    def __init__(self, loader: Callable[[], T]):
+        self.loader = loader
+        self._value: Optional[T] = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        version = data_counter()
+        value = self._value
+        if value is not None and self._version == version:
+            return value
+
+        if not self._lock.acquire(blocking=value is None):
+            return value
+        try:
+            if self._value is None or self._version != version:
+                self._value = self.loader()
+                self._version = version
+            return self._value
+        finally:
+            self._lock.release()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = None
+            self._version = None
+
+
+def versioned_singleton(loader: Callable[[], T]) -> VersionedSingleton[T]:
+    return VersionedSingleton(loader)
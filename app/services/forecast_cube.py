@@ -0,0 +1,254 @@
+# app/services/forecast_cube.py
+from __future__ import annotations
+
+import itertools
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app import db
+from app.services.forecast_repository import METRICS, QUARTERS
+from app.services.forecast_store import ForecastStore, get_forecast_store
+
+
+# 시장 요약 집계 테이블 (마이그레이션 b81f4c0de2a7)
+CUBE_TABLE = "HOUSE_FORECAST_CUBE"
+
+# 집계 차원 (PK 앞 4개) — 값 대신 ALL 이면 그 차원 전체 합산(롤업) 셀
+CUBE_DIMS = ("district", "dong_name", "house_type", "lease_type")
+ALL = "*"
+
+# p10 / median / p90
+_PERCENTILES = (10, 50, 90)
+
+# 지표별로 집계에 넣는 lease_type (전세 row 의 monthly_rent 는 0 이라 월세 분포를 끌어내림)
+#   -> lease_type='*' 롤업의 월세 통계도 월세 row 만, 전세 셀은 monthly_rent 없음
+METRIC_LEASE_TYPES = {"monthly_rent": ("월세",)}
+
+_INSERT_SQL = (
+    f"INSERT INTO {CUBE_TABLE} "
+    f"(district, dong_name, house_type, lease_type, metric, yq, n, mean, median, p10, p90) "
+    f"VALUES (:district, :dong_name, :house_type, :lease_type, :metric, :yq, :n, :mean, :median, :p10, :p90)"
+)
+
+Cell = Tuple[str, str, str, str]
+
+_has_table: Optional[bool] = None
+
+
+def has_cube_table() -> bool:
+    global _has_table
+    if _has_table is None:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": CUBE_TABLE},
+        ).first()
+        _has_table = row is not None
+    return _has_table
+
+
+def reset_cube_cache() -> None:
+    global _has_table
+    _has_table = None
+
+
+def _norm(v) -> str:
+    # NULL 동 -> '' (PK 컬럼이라 NULL 불가)
+    return "" if v is None else str(v)
+
+
+def rollups(cell: Cell) -> List[Cell]:
+    """
+    셀 1개가 포함되는 모든 롤업 셀 (자기 자신 포함 2^4 = 16개)
+    ('eunpyeong', '불광동', '빌라', '월세') -> (..., '*'), ('eunpyeong', '*', '*', '*'), ...
+    """
+    out = []
+    for mask in itertools.product((False, True), repeat=len(CUBE_DIMS)):
+        out.append(tuple(ALL if m else v for v, m in zip(cell, mask)))
+    return out
+
+
+# -------------------------------------------------
+# 집계 계산
+# -------------------------------------------------
+def _group_rows(store: ForecastStore, targets: Optional[set] = None) -> Dict[Cell, np.ndarray]:
+    """
+    셀 -> store row 인덱스
+    targets 가 있으면 그 셀들만 (증분 재계산)
+    """
+    keys = list(zip(*(
+        [_norm(v) for v in store.meta[c]] for c in CUBE_DIMS
+    ))) if len(store) else []
+
+    groups: Dict[Cell, List[int]] = {}
+    for i, cell in enumerate(keys):
+        for rolled in rollups(cell):
+            if targets is not None and rolled not in targets:
+                continue
+            groups.setdefault(rolled, []).append(i)
+    return {k: np.asarray(v, dtype=np.int64) for k, v in groups.items()}
+
+
+def _round(a: np.ndarray) -> List[Optional[float]]:
+    # 만원 단위 -> 소수 둘째 자리, NaN -> None
+    return [None if not np.isfinite(v) else round(float(v), 2) for v in a]
+
+
+def cell_stats(values: np.ndarray) -> Dict[str, Any]:
+    """
+    (rows × 분기) 행렬 -> 분기별 n / mean / median / p10 / p90 (분기 축 배열)
+    NaN(예측 없음)은 제외, 값이 하나도 없는 분기는 n=0 + 나머지 None
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = np.isfinite(x).sum(axis=0)
+    with warnings.catch_warnings():
+        # 전부 NaN인 분기 -> "All-NaN slice" / "Mean of empty slice" 경고 (결과는 NaN)
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(x, axis=0)
+        p10, median, p90 = np.nanpercentile(x, _PERCENTILES, axis=0)
+    return {
+        "n": n.tolist(),
+        "mean": _round(mean),
+        "median": _round(median),
+        "p10": _round(p10),
+        "p90": _round(p90),
+    }
+
+
+def compute_cells(store: ForecastStore, targets: Optional[Iterable[Cell]] = None) -> List[Dict[str, Any]]:
+    """store 예측 행렬 -> 큐브 INSERT용 row 목록 (n=0 분기는 저장 안 함)"""
+    target_set = set(targets) if targets is not None else None
+    groups = _group_rows(store, target_set)
+
+    lease = store.meta["lease_type"] if len(store) else None
+    out: List[Dict[str, Any]] = []
+    for cell, idx in groups.items():
+        dims = dict(zip(CUBE_DIMS, cell))
+        for metric in METRICS:
+            rows = idx
+            if metric in METRIC_LEASE_TYPES:
+                rows = idx[np.isin(lease[idx], METRIC_LEASE_TYPES[metric])]
+                if not rows.size:
+                    continue
+            stats = cell_stats(store.matrix(metric)[rows])
+            for j, yq in enumerate(QUARTERS):
+                if not stats["n"][j]:
+                    continue
+                out.append({
+                    **dims,
+                    "metric": metric,
+                    "yq": yq,
+                    "n": int(stats["n"][j]),
+                    "mean": stats["mean"][j],
+                    "median": stats["median"][j],
+                    "p10": stats["p10"][j],
+                    "p90": stats["p90"][j],
+                })
+    return out
+
+
+# -------------------------------------------------
+# 재구성 (전체 / 증분)
+# -------------------------------------------------
+def rebuild_cube(
+    groups: Optional[Iterable[Sequence[Optional[str]]]] = None,
+    store: Optional[ForecastStore] = None,
+) -> Dict[str, int]:
+    """
+    HOUSE_FORECAST_CUBE 재계산
+      groups=None : 전체 (DELETE 후 다시 채움)
+      groups=[(district, dong_name, house_type, lease_type), ...]
+                  : 데이터가 바뀐 조합만 — 그 조합과 롤업 셀들만 지우고 다시 계산
+
+    store 를 안 넘기면 get_forecast_store() (데이터 적재 후에는 reset_forecast_store() 먼저)
+    """
+    if not has_cube_table():
+        raise RuntimeError(f"{CUBE_TABLE} 테이블이 없습니다. (flask db upgrade 먼저)")
+
+    store = store if store is not None else get_forecast_store()
+
+    targets: Optional[List[Cell]] = None
+    if groups is not None:
+        cells = {tuple(_norm(v) for v in g) for g in groups}
+        targets = sorted({r for c in cells for r in rollups(c)})
+
+    rows = compute_cells(store, targets)
+
+    if targets is None:
+        db.session.execute(text(f"DELETE FROM {CUBE_TABLE}"))
+    elif targets:
+        db.session.execute(
+            text(
+                f"DELETE FROM {CUBE_TABLE} "
+                f"WHERE district = :district AND dong_name = :dong_name "
+                f"AND house_type = :house_type AND lease_type = :lease_type"
+            ),
+            [dict(zip(CUBE_DIMS, c)) for c in targets],
+        )
+    if rows:
+        db.session.execute(text(_INSERT_SQL), rows)
+    db.session.commit()
+
+    return {
+        "cells": len({tuple(r[d] for d in CUBE_DIMS) for r in rows}),
+        "rows": len(rows),
+    }
+
+
+# -------------------------------------------------
+# 조회 (/predict/api/market-summary)
+# -------------------------------------------------
+def build_cube_query(
+    district: Optional[str] = None,
+    dong_name: Optional[str] = None,
+    house_type: Optional[str] = None,
+    lease_type: Optional[str] = None,
+    metrics: Sequence[str] = METRICS,
+    quarters: Optional[Sequence[str]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    셀 1개 조회 SQL — 지정 안 한 차원은 ALL(롤업) 셀
+    PK 앞 6개 컬럼 = 조건이라 인덱스 탐색만 함
+    """
+    for m in metrics:
+        if m not in METRICS:
+            raise ValueError(f"'metric' must be one of {list(METRICS)}")
+
+    params: Dict[str, Any] = {
+        d: ALL if v is None else v
+        for d, v in zip(CUBE_DIMS, (district, dong_name, house_type, lease_type))
+    }
+    m_names = [f"m{i}" for i in range(len(metrics))]
+    params.update(zip(m_names, metrics))
+    sql = (
+        f"SELECT metric, yq, n, mean, median, p10, p90 FROM {CUBE_TABLE} "
+        f"WHERE district = :district AND dong_name = :dong_name "
+        f"AND house_type = :house_type AND lease_type = :lease_type "
+        f"AND metric IN ({', '.join(':' + n for n in m_names)})"
+    )
+    if quarters:
+        q_names = [f"q{i}" for i in range(len(quarters))]
+        params.update(zip(q_names, quarters))
+        sql += f" AND yq IN ({', '.join(':' + n for n in q_names)})"
+    return sql + " ORDER BY metric, yq", params
+
+
+def query_cube(
+    district: Optional[str] = None,
+    dong_name: Optional[str] = None,
+    house_type: Optional[str] = None,
+    lease_type: Optional[str] = None,
+    metrics: Sequence[str] = METRICS,
+    quarters: Optional[Sequence[str]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    반환: {"deposit": [{"yq": "2026Q3", "n": 12, "mean": .., "median": .., "p10": .., "p90": ..}, ...], ...}
+    (값이 없는 분기는 빠짐)
+    """
+    sql, params = build_cube_query(district, dong_name, house_type, lease_type, metrics, quarters)
+    out: Dict[str, List[Dict[str, Any]]] = {m: [] for m in metrics}
+    for metric, yq, n, mean, median, p10, p90 in db.session.execute(text(sql), params):
+        out[metric].append({"yq": yq, "n": n, "mean": mean, "median": median, "p10": p10, "p90": p90})
+    return out
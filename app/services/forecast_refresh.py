@@ -0,0 +1,195 @@
+# app/services/forecast_refresh.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from app import db
+from app.model import HouseInfo
+from app.services.data_version import bump_data_version
+from app.services.forecast_repository import FORECAST_TABLE, HOUSE_KEY_SQL, has_forecast_table
+from app.services.ingest import (
+    DEFAULT_CHUNK_SIZE,
+    HOUSE_KEY_COLUMNS,
+    _GROUP_COLUMNS,
+    _WIDE_TO_LONG,
+    _coercers,
+    _row_error,
+    iter_chunks,
+)
+
+
+# 이 차이 이내면 같은 값으로 봄 (만원 단위, 0.01 = 100원)
+DEFAULT_ATOL = 0.01
+DEFAULT_RTOL = 1e-6
+
+_KEYS_TABLE = "temp._refresh_keys"
+
+
+@dataclass
+class RefreshResult:
+    rows: int = 0               # 파일 행 수
+    matched: int = 0            # HOUSE_INFO 에 있는 키
+    unknown: int = 0            # 없는 키 (새 매물은 flask ingest 로 추가)
+    changed_rows: int = 0
+    changed_cells: int = 0
+    chunks: int = 0
+    columns: List[str] = field(default_factory=list)
+    ignored_columns: List[str] = field(default_factory=list)
+    groups: Set[Tuple[str, ...]] = field(default_factory=set)   # 값이 바뀐 (구, 동, 유형, 거래)
+    dry_run: bool = False
+    elapsed_s: float = 0.0
+
+
+def _plan_columns(first_row: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """파일 컬럼 -> (예측 컬럼, 무시할 컬럼) — 예측값 외 컬럼은 갱신 안 함"""
+    header = list(first_row.keys())
+    missing = [k for k in HOUSE_KEY_COLUMNS if k not in header]
+    if missing:
+        raise ValueError(f"키 컬럼이 없습니다: {missing}")
+    cols = [c for c in _WIDE_TO_LONG if c in header]
+    if not cols:
+        raise ValueError("deposit_*/monthly_rent_* 예측 컬럼이 없습니다.")
+    ignored = [c for c in header if c not in cols and c not in HOUSE_KEY_COLUMNS]
+    return cols, ignored
+
+
+def diff_mask(new: np.ndarray, old: np.ndarray, atol: float = DEFAULT_ATOL, rtol: float = DEFAULT_RTOL) -> np.ndarray:
+    """
+    (rows × cols) 새 값 vs 저장 값 -> 바뀐 셀 True
+    NaN(NULL) 끼리는 같음, 한쪽만 NaN 이면 바뀜
+    """
+    same = np.isclose(new, old, rtol=rtol, atol=atol) | (np.isnan(new) & np.isnan(old))
+    return ~same
+
+
+def _stored(conn, cols: Sequence[str]):
+    """
+    이번 청크 키의 저장된 값: (pos, rowid, house_key, 구, 동, 유형, 거래, 예측 컬럼...)
+    HOUSE_INFO 에 없는 키는 빠짐 (키 테이블 컬럼은 k_ 접두사라 HOUSE_KEY_SQL 이 그대로 HOUSE_INFO를 가리킴)
+    """
+    join = " AND ".join(f"h.{c} = k.k_{c}" for c in HOUSE_KEY_COLUMNS)
+    return conn.exec_driver_sql(
+        f"SELECT k.pos, h.rowid, {HOUSE_KEY_SQL}, {', '.join(_GROUP_COLUMNS)}, {', '.join(cols)} "
+        f"FROM {_KEYS_TABLE} k JOIN HOUSE_INFO h ON {join} ORDER BY k.pos"
+    ).fetchall()
+
+
+def _write_changes(conn, cols, changed, new, rowids, house_keys, sync_long: bool) -> None:
+    """바뀐 셀만: 컬럼별 executemany UPDATE (+ HOUSE_FORECAST 같은 셀)"""
+    for j in np.flatnonzero(changed.any(axis=0)):
+        col = cols[j]
+        idx = np.flatnonzero(changed[:, j])
+        values = [None if np.isnan(new[i, j]) else float(new[i, j]) for i in idx]
+
+        conn.exec_driver_sql(
+            f"UPDATE HOUSE_INFO SET {col} = ? WHERE rowid = ?",
+            [(v, int(rowids[i])) for v, i in zip(values, idx)],
+        )
+        if not sync_long:
+            continue
+
+        metric, yq = _WIDE_TO_LONG[col]
+        upserts = [(house_keys[i], metric, yq, v) for v, i in zip(values, idx) if v is not None]
+        deletes = [(house_keys[i], metric, yq) for v, i in zip(values, idx) if v is None]
+        if upserts:
+            conn.exec_driver_sql(
+                f"INSERT OR REPLACE INTO {FORECAST_TABLE} (house_key, metric, yq, value) VALUES (?, ?, ?, ?)",
+                upserts,
+            )
+        if deletes:
+            conn.exec_driver_sql(
+                f"DELETE FROM {FORECAST_TABLE} WHERE house_key = ? AND metric = ? AND yq = ?",
+                deletes,
+            )
+
+
+def refresh_forecasts(
+    path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    atol: float = DEFAULT_ATOL,
+    rtol: float = DEFAULT_RTOL,
+    dry_run: bool = False,
+) -> RefreshResult:
+    """
+    새 모델 결과(키 5개 + deposit_*/monthly_rent_* 컬럼) -> 기존 매물 예측값 증분 갱신
+
+    - 청크마다: 키로 저장값을 읽어 (rows × 컬럼) 행렬끼리 허용오차 비교
+      -> 바뀐 셀만 UPDATE (HOUSE_FORECAST 도 같은 셀만) + data_version +1, 한 트랜잭션
+    - 바뀐 게 없는 청크는 쓰기 없이 끝남 (쓰기 잠금도 안 잡음)
+    - HOUSE_INFO 에 없는 키는 건너뜀 (result.unknown)
+    - dry_run: 비교만 하고 롤백
+    """
+    t0 = time.perf_counter()
+    result = RefreshResult(dry_run=dry_run)
+    coerce = _coercers(HouseInfo)
+    sync_long = has_forecast_table()
+
+    with db.engine.connect() as conn:
+        with conn.begin():
+            conn.exec_driver_sql(
+                f"CREATE TEMP TABLE IF NOT EXISTS _refresh_keys "
+                f"(pos INTEGER PRIMARY KEY, {', '.join('k_' + c for c in HOUSE_KEY_COLUMNS)})"
+            )
+
+        cols: List[str] = []
+        n = 0
+        for chunk in iter_chunks(path, chunk_size):
+            if not cols:
+                cols, result.ignored_columns = _plan_columns(chunk[0])
+                result.columns = cols
+
+            # 같은 키가 여러 번 나오면 마지막 행 기준
+            latest: Dict[Tuple, Tuple] = {}
+            for row in chunk:
+                n += 1
+                try:
+                    key = tuple(coerce[c](row.get(c)) for c in HOUSE_KEY_COLUMNS)
+                    latest[key] = tuple(coerce[c](row.get(c)) for c in cols)
+                except (TypeError, ValueError) as e:
+                    raise _row_error(n, e) from e
+            keys = list(latest)
+            result.rows += len(chunk)
+            result.chunks += 1
+
+            with conn.begin() as tx:
+                conn.exec_driver_sql(f"DELETE FROM {_KEYS_TABLE}")
+                conn.exec_driver_sql(
+                    f"INSERT INTO {_KEYS_TABLE} VALUES (?, {', '.join('?' for _ in HOUSE_KEY_COLUMNS)})",
+                    [(i,) + k for i, k in enumerate(keys)],
+                )
+                stored = _stored(conn, cols)
+                result.matched += len(stored)
+                result.unknown += len(keys) - len(stored)
+                if not stored:
+                    continue
+
+                g0 = 3 + len(_GROUP_COLUMNS)
+                pos = [r[0] for r in stored]
+                new = np.array([latest[keys[p]] for p in pos], dtype=np.float64)
+                old = np.array([r[g0:] for r in stored], dtype=np.float64)
+                changed = diff_mask(new, old, atol=atol, rtol=rtol)
+
+                rows_changed = np.flatnonzero(changed.any(axis=1))
+                if not rows_changed.size:
+                    continue
+                result.changed_rows += int(rows_changed.size)
+                result.changed_cells += int(changed.sum())
+                result.groups |= {tuple(stored[i][3:g0]) for i in rows_changed}
+
+                if dry_run:
+                    tx.rollback()
+                    continue
+                _write_changes(
+                    conn, cols, changed, new,
+                    rowids=[r[1] for r in stored],
+                    house_keys=[r[2] for r in stored],
+                    sync_long=sync_long,
+                )
+                bump_data_version(conn)
+
+    result.elapsed_s = time.perf_counter() - t0
+    return result
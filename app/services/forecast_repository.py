@@ -0,0 +1,152 @@
+# app/services/forecast_repository.py
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+from app import db
+
+
+# 예측 분기: 2025Q1 ~ 2030Q4 (24개)
+QUARTERS: List[str] = [f"20{yy}Q{q}" for yy in range(25, 31) for q in range(1, 5)]
+
+# 컬럼 접미사: '25q1' ~ '30q4' (HOUSE_INFO 컬럼명 규칙)
+QUARTER_KEYS: List[str] = [f"{yq[2:4]}q{yq[-1]}" for yq in QUARTERS]
+
+METRICS = ("deposit", "monthly_rent")
+
+FORECAST_COLUMNS: Dict[str, List[str]] = {
+    m: [f"{m}_{k}" for k in QUARTER_KEYS] for m in METRICS
+}
+
+# HOUSE_INFO 복합 PK -> HOUSE_FORECAST.house_key
+# (마이그레이션 백필과 같은 식을 써야 키가 일치함)
+HOUSE_KEY_SQL = (
+    "(district || '|' || building_name || '|' || house_type || '|' || floor || '|' || area_m2)"
+)
+
+FORECAST_TABLE = "HOUSE_FORECAST"
+
+# SQLite 바인딩 변수 개수 제한 대비
+_IN_CHUNK = 500
+
+_has_table: Optional[bool] = None
+
+
+def has_forecast_table() -> bool:
+    """HOUSE_FORECAST(롱 포맷) 테이블이 있으면 그쪽에서 읽고, 없으면 HOUSE_INFO 와이드 컬럼에서 읽음"""
+    global _has_table
+    if _has_table is None:
+        row = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FORECAST_TABLE},
+        ).first()
+        _has_table = row is not None
+    return _has_table
+
+
+def reset_repository_cache() -> None:
+    global _has_table
+    _has_table = None
+
+
+def _yq_to_key(yq: str) -> str:
+    # '2025Q1' -> '25q1'
+    return f"{yq[2:4]}q{yq[-1]}"
+
+
+def wide_column(metric: str, yq: str) -> str:
+    # ('deposit', '2025Q1') -> 'deposit_25q1'
+    return f"{metric}_{_yq_to_key(yq)}"
+
+
+def _chunks(seq: Sequence[str], n: int = _IN_CHUNK) -> Iterable[Sequence[str]]:
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _in_params(prefix: str, values: Sequence[str]):
+    names = [f"{prefix}{i}" for i in range(len(values))]
+    return ", ".join(f":{n}" for n in names), dict(zip(names, values))
+
+
+def fetch_forecasts(
+    house_keys: Sequence[str],
+    metrics: Sequence[str] = METRICS,
+    quarters: Optional[Sequence[str]] = None,
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    house_key별 예측값 조회 (필요한 metric/분기만)
+
+    반환: {house_key: {"deposit_25q1": 12345.0, ...}}
+      - 키 이름은 기존 와이드 컬럼명 그대로 (화면/JS 호환)
+      - 값이 없으면 키가 빠지거나 None
+    """
+    quarters = list(quarters) if quarters else list(QUARTERS)
+    for m in metrics:
+        if m not in METRICS:
+            raise ValueError(f"Unknown metric: {m}")
+
+    keys = list(dict.fromkeys(k for k in house_keys if k))
+    out: Dict[str, Dict[str, Optional[float]]] = {k: {} for k in keys}
+    if not keys:
+        return out
+
+    if has_forecast_table():
+        m_sql, m_params = _in_params("m", list(metrics))
+        q_sql, q_params = _in_params("q", quarters)
+        for chunk in _chunks(keys):
+            k_sql, k_params = _in_params("k", list(chunk))
+            rows = db.session.execute(
+                text(
+                    f"SELECT house_key, metric, yq, value FROM {FORECAST_TABLE} "
+                    f"WHERE house_key IN ({k_sql}) AND metric IN ({m_sql}) AND yq IN ({q_sql})"
+                ),
+                {**k_params, **m_params, **q_params},
+            )
+            for house_key, metric, yq, value in rows:
+                out[house_key][wide_column(metric, yq)] = value
+        return out
+
+    # 와이드 컬럼 폴백: 예측 범위(2025Q1~2030Q4) 밖 분기는 컬럼이 없으므로 제외
+    cols = [wide_column(m, yq) for m in metrics for yq in quarters if yq in QUARTERS]
+    if not cols:
+        return out
+
+    for chunk in _chunks(keys):
+        k_sql, k_params = _in_params("k", list(chunk))
+        rows = db.session.execute(
+            text(
+                f"SELECT {HOUSE_KEY_SQL} AS house_key, {', '.join(cols)} FROM HOUSE_INFO "
+                f"WHERE {HOUSE_KEY_SQL} IN ({k_sql})"
+            ),
+            k_params,
+        )
+        for r in rows:
+            out[r[0]].update(zip(cols, r[1:]))
+    return out
+
+
+def load_forecast_matrices(house_keys: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    ForecastStore 적재용 (HOUSE_FORECAST가 있을 때):
+    house_keys 순서대로 (rows × 24) float32 행렬, NULL/누락 = NaN
+    """
+    n = len(house_keys)
+    mats = {m: np.full((n, len(QUARTERS)), np.nan, dtype=np.float32) for m in METRICS}
+
+    pos: Dict[str, List[int]] = {}
+    for i, k in enumerate(house_keys):
+        pos.setdefault(k, []).append(i)
+    q_pos = {yq: j for j, yq in enumerate(QUARTERS)}
+
+    rows = db.session.execute(text(f"SELECT house_key, metric, yq, value FROM {FORECAST_TABLE}"))
+    for house_key, metric, yq, value in rows:
+        j = q_pos.get(yq)
+        if j is None or metric not in mats or value is None:
+            continue
+        for i in pos.get(house_key, ()):
+            mats[metric][i, j] = value
+    return mats
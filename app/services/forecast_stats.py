@@ -0,0 +1,91 @@
+# app/services/forecast_stats.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.forecast_store import _to_py
+
+
+# 분기 -> 연 환산 (CAGR)
+QUARTERS_PER_YEAR = 4
+
+
+def _opt(v, ndigits: int = 6) -> Optional[float]:
+    # NaN / inf -> None (JSON null)
+    if v is None or not np.isfinite(v):
+        return None
+    return round(float(v), ndigits)
+
+
+def _to_list(a: np.ndarray) -> List[Optional[float]]:
+    return [_opt(v) for v in a]
+
+
+def growth(values: np.ndarray, lag: int) -> np.ndarray:
+    """
+    lag 분기 전 대비 증감률 (같은 길이, 앞쪽 lag개는 NaN)
+    0 / NaN 이 끼면 NaN
+    """
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if x.size > lag:
+        prev, cur = x[:-lag], x[lag:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[lag:] = np.where(prev != 0, cur / prev - 1.0, np.nan)
+    return out
+
+
+def cagr(values: np.ndarray) -> Optional[float]:
+    """처음/마지막 유효값 사이 연평균 성장률 (유효값 2개 미만이거나 시작값 <= 0이면 None)"""
+    x = np.asarray(values, dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(x))
+    if valid.size < 2:
+        return None
+    first, last = valid[0], valid[-1]
+    if x[first] <= 0 or x[last] < 0:
+        return None
+    years = (last - first) / QUARTERS_PER_YEAR
+    return _opt((x[last] / x[first]) ** (1.0 / years) - 1.0)
+
+
+def summarize(values: np.ndarray, quarters: Sequence[str]) -> Dict[str, Any]:
+    """
+    분기 시계열 1개 요약 (전부 배열 연산)
+      values / qoq / yoy : 분기 순서 리스트 (없으면 null)
+      cagr, peak/trough 분기·값, 전체 변화율, 평균
+    """
+    raw = np.asarray(values, dtype=np.float32)   # 예측값 원본 (저장 정밀도)
+    x = raw.astype(np.float64)
+    finite = np.isfinite(x)
+
+    out: Dict[str, Any] = {
+        "values": [_to_py(v) for v in raw],
+        "qoq": _to_list(growth(x, 1)),
+        "yoy": _to_list(growth(x, QUARTERS_PER_YEAR)),
+        "cagr": cagr(x),
+        "peak_quarter": None,
+        "peak_value": None,
+        "trough_quarter": None,
+        "trough_value": None,
+        "total_change": None,
+        "mean": None,
+    }
+    if not finite.any():
+        return out
+
+    peak = int(np.nanargmax(x))
+    trough = int(np.nanargmin(x))
+    valid = np.flatnonzero(finite)
+    first, last = x[valid[0]], x[valid[-1]]
+
+    out.update({
+        "peak_quarter": quarters[peak],
+        "peak_value": _to_py(raw[peak]),
+        "trough_quarter": quarters[trough],
+        "trough_value": _to_py(raw[trough]),
+        "total_change": _opt(last / first - 1.0) if first else None,
+        "mean": _opt(np.nanmean(x), 1),
+    })
+    return out
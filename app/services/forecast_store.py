@@ -0,0 +1,170 @@
+# app/services/forecast_store.py
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app import db
+from app.services.data_version import versioned_singleton
+from app.services.forecast_repository import (
+    FORECAST_COLUMNS,
+    HOUSE_KEY_SQL,
+    QUARTER_KEYS,
+    has_forecast_table,
+    load_forecast_matrices,
+)
+
+_QUARTER_POS: Dict[str, int] = {k: i for i, k in enumerate(QUARTER_KEYS)}
+
+# 매칭/스코어링에 필요한 메타 컬럼만 들고 있음 (나머지는 ORM/SQL로 필요할 때만)
+_META_COLUMNS = ("building_name", "district", "house_type", "dong_name", "lease_type")
+
+
+def quarter_pos(key: str) -> Optional[int]:
+    """
+    '25q1' -> 0, '30q4' -> 23
+    예측 범위 밖이면 None (기존 getattr(..., None) 동작과 동일하게 값 없음 처리)
+    """
+    return _QUARTER_POS.get((key or "").strip().lower())
+
+
+def _to_py(v) -> Optional[float]:
+    # float32 -> 파이썬 float (NaN=NULL은 None), 12345.6 같은 값이 12345.599609375로 번지지 않게 str 경유
+    if v is None or np.isnan(v):
+        return None
+    return float(str(np.float32(v)))
+
+
+class ForecastStore:
+    """
+    HOUSE_INFO 예측 컬럼(전세 24 + 월세 24)을 (rows × 24) float32 행렬로 들고 있는 읽기 전용 저장소.
+
+    - row 순서는 HOUSE_INFO rowid 순서 (ORM .first()와 같은 순서)
+    - NULL은 NaN으로 저장
+    - (district, building_name) / building_name 기준 row 인덱스를 미리 만들어 둠
+    """
+
+    def __init__(
+        self,
+        rowids: np.ndarray,
+        meta: Dict[str, np.ndarray],
+        deposit: np.ndarray,
+        monthly_rent: np.ndarray,
+    ):
+        self.rowids = rowids
+        self.meta = meta
+        self._matrix = {"deposit": deposit, "monthly_rent": monthly_rent}
+
+        by_building: Dict[Tuple[str, str], List[int]] = {}
+        by_name: Dict[str, List[int]] = {}
+        for i, (district, name) in enumerate(zip(meta["district"], meta["building_name"])):
+            by_building.setdefault((district, name), []).append(i)
+            by_name.setdefault(name, []).append(i)
+
+        self._by_building = {k: np.asarray(v, dtype=np.int64) for k, v in by_building.items()}
+        self._by_name = {k: np.asarray(v, dtype=np.int64) for k, v in by_name.items()}
+
+    @classmethod
+    def load(cls) -> "ForecastStore":
+        """
+        HOUSE_FORECAST(롱 포맷)가 있으면 거기서, 없으면 HOUSE_INFO 와이드 컬럼에서 적재
+        """
+        n_meta = len(_META_COLUMNS)
+        n_q = len(QUARTER_KEYS)
+        base_cols = f"rowid, {HOUSE_KEY_SQL} AS house_key, {', '.join(_META_COLUMNS)}"
+
+        if has_forecast_table():
+            rows = db.session.execute(
+                text(f"SELECT {base_cols} FROM HOUSE_INFO ORDER BY rowid")
+            ).fetchall()
+            house_keys = [r[1] for r in rows]
+            mats = load_forecast_matrices(house_keys)
+            deposit, monthly_rent = mats["deposit"], mats["monthly_rent"]
+        else:
+            cols = FORECAST_COLUMNS["deposit"] + FORECAST_COLUMNS["monthly_rent"]
+            rows = db.session.execute(
+                text(f"SELECT {base_cols}, {', '.join(cols)} FROM HOUSE_INFO ORDER BY rowid")
+            ).fetchall()
+            house_keys = [r[1] for r in rows]
+
+            # None -> NaN 변환은 numpy가 float 캐스팅 시 처리
+            values = np.array([r[2 + n_meta:] for r in rows], dtype=np.float32).reshape(len(rows), 2 * n_q)
+            deposit = np.ascontiguousarray(values[:, :n_q])
+            monthly_rent = np.ascontiguousarray(values[:, n_q:])
+
+        rowids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        meta = {
+            c: np.array([r[2 + j] for r in rows], dtype=object)
+            for j, c in enumerate(_META_COLUMNS)
+        }
+        meta["house_key"] = np.array(house_keys, dtype=object)
+
+        return cls(rowids, meta, deposit, monthly_rent)
+
+    def __len__(self) -> int:
+        return int(self.rowids.shape[0])
+
+    # -------------------------------------------------
+    # 조회
+    # -------------------------------------------------
+    def candidates(self, building_name: str, district: Optional[str] = None) -> np.ndarray:
+        """건물명(+구) 일치 row 인덱스 (rowid 순)"""
+        if district:
+            idx = self._by_building.get((district, building_name))
+        else:
+            idx = self._by_name.get(building_name)
+        return idx if idx is not None else np.empty(0, dtype=np.int64)
+
+    def matrix(self, metric: str) -> np.ndarray:
+        if metric not in self._matrix:
+            raise ValueError(f"Unknown metric: {metric}")
+        return self._matrix[metric]
+
+    def quarter_values(self, idx: np.ndarray, metric: str, key: str) -> np.ndarray:
+        """여러 row의 한 분기 값 (예측 범위 밖 분기면 전부 NaN)"""
+        pos = quarter_pos(key)
+        if pos is None:
+            return np.full(len(idx), np.nan, dtype=np.float32)
+        return self.matrix(metric)[idx, pos]
+
+    def quarter_slice(self, metric: str, key: str) -> np.ndarray:
+        """전체 row의 한 분기 열"""
+        pos = quarter_pos(key)
+        if pos is None:
+            raise ValueError(f"Quarter out of forecast horizon: {key}")
+        return self.matrix(metric)[:, pos]
+
+    def value(self, i: int, metric: str, key: str) -> Optional[float]:
+        pos = quarter_pos(key)
+        if pos is None:
+            return None
+        return _to_py(self.matrix(metric)[i, pos])
+
+    def horizon(self, i: int, metric: str) -> np.ndarray:
+        """한 row의 2025Q1~2030Q4 전체 예측값 (24,)"""
+        return self.matrix(metric)[i]
+
+    def rowid(self, i: int) -> int:
+        return int(self.rowids[i])
+
+    def house_key(self, i: int) -> str:
+        return self.meta["house_key"][i]
+
+
+# -------------------------------------------------
+# 프로세스 전역 싱글톤 (Lazy)
+#   APP_META.data_version 이 바뀌면 다시 적재
+#   (다시 적재하는 동안 다른 스레드는 이전 저장소로 계속 응답)
+# -------------------------------------------------
+_store = versioned_singleton(ForecastStore.load)
+
+
+def get_forecast_store() -> ForecastStore:
+    return _store.get()
+
+
+def reset_forecast_store() -> None:
+    """데이터 갱신 후 다음 조회에서 다시 로드되도록 비움"""
+    _store.reset()
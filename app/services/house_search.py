@@ -0,0 +1,297 @@
+# app/services/house_search.py
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal, literal_column, select, tuple_
+
+from app import db
+from app.model import HouseInfo
+from app.services.forecast_repository import HOUSE_KEY_SQL
+
+
+PYEONG_M2 = 3.305785
+
+# 페이지 크기 (API)
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+ROWID = literal_column("HOUSE_INFO.rowid")
+
+# 목록/지도에 필요한 컬럼만 (예측 48컬럼은 forecast_repository에서 따로)
+LISTING_COLUMNS = (
+    HouseInfo.building_name,
+    HouseInfo.district,
+    HouseInfo.floor,
+    HouseInfo.area_m2,
+    HouseInfo.built_year,
+    HouseInfo.house_type,
+    HouseInfo.latitude,
+    HouseInfo.longitude,
+    HouseInfo.recent_yq,
+    HouseInfo.recent_deposit,
+    HouseInfo.recent_monthly,
+    HouseInfo.road_address,
+    HouseInfo.jibun_address,
+    HouseInfo.dong_name,
+    HouseInfo.lease_type,
+    HouseInfo.monthly_rent,
+)
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """/predict/search 검색 조건 (쿼리스트링 값 그대로)"""
+    gu: str = "eunpyeong"
+    house_type: str = "빌라"
+    lease_type: str = "월세"
+    area: str = "10-19"
+    floor: str = "low"
+
+    @classmethod
+    def from_args(cls, args) -> "SearchFilter":
+        def get_param(name, default):
+            val = args.get(name)
+            if val is None or val.strip() == "":
+                return default
+            return val.strip()
+
+        return cls(
+            gu=get_param("gu", cls.gu),
+            house_type=get_param("house_type", cls.house_type),
+            lease_type=get_param("lease_type", cls.lease_type),
+            area=get_param("area", cls.area),
+            floor=get_param("floor", cls.floor),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def area_range_m2(f: SearchFilter) -> Optional[Tuple[float, float]]:
+    """'10-19'(평) -> (m2 하한, m2 상한), 형식이 틀리면 None (필터 없음)"""
+    try:
+        min_p, max_p = f.area.split("-")
+        return int(min_p) * PYEONG_M2, int(max_p) * PYEONG_M2
+    except Exception:
+        return None
+
+
+def floor_range(f: SearchFilter) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """층 구간 -> (하한, 상한) 양끝 포함, None이면 열린 구간 / 'all' 등은 None"""
+    return {
+        "basement": (None, -1),
+        "low": (1, 4),
+        "mid": (5, 10),
+        "high": (11, None),
+    }.get(f.floor)
+
+
+def apply_search_filter(query, f: SearchFilter):
+    """
+    district + house_type + lease_type + area_m2(평 범위) + floor(구간)
+    -> ix_house_info_search 인덱스 순서와 같음
+    """
+    query = query.filter(HouseInfo.district == f.gu)
+    query = query.filter(HouseInfo.house_type == f.house_type)
+    query = query.filter(HouseInfo.lease_type == f.lease_type)
+
+    # 면적 필터
+    area = area_range_m2(f)
+    if area is not None:
+        query = query.filter(HouseInfo.area_m2 >= area[0], HouseInfo.area_m2 <= area[1])
+
+    # 층수 필터
+    floors = floor_range(f)
+    if floors is not None:
+        lo, hi = floors
+        if lo is not None:
+            query = query.filter(HouseInfo.floor >= lo)
+        if hi is not None:
+            query = query.filter(HouseInfo.floor <= hi)
+
+    return query
+
+
+def build_listing_base_query():
+    """목록 컬럼 + house_key (조건 없음)"""
+    return db.session.query(*LISTING_COLUMNS, literal_column(HOUSE_KEY_SQL).label("house_key"))
+
+
+def build_listing_query(f: SearchFilter):
+    """검색 화면 목록 쿼리 (목록 컬럼 + house_key)"""
+    return apply_search_filter(build_listing_base_query(), f)
+
+
+# -------------------------------------------------
+# 키셋 페이지네이션 (/predict/api/search)
+#   정렬: area_m2, floor, rowid  -> ix_house_info_search 의 동등조건 뒤 순서와 같아서
+#   정렬용 임시 B-tree 없이 인덱스 범위만 읽음
+# -------------------------------------------------
+def encode_cursor(area_m2: float, floor: int, rowid: int) -> str:
+    raw = json.dumps([area_m2, floor, rowid]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int, int]]:
+    if not cursor:
+        return None
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        area_m2, floor, rowid = json.loads(base64.urlsafe_b64decode(cursor + pad))
+        return float(area_m2), int(floor), int(rowid)
+    except Exception:
+        raise ValueError("'after' is not a valid cursor")
+
+
+def build_page_query(f: SearchFilter, after: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    다음 페이지 조회 쿼리 (limit+1개를 가져와서 has_more 판단)
+    """
+    query = build_listing_query(f).add_columns(ROWID.label("rid"))
+
+    key = decode_cursor(after)
+    if key is not None:
+        query = query.filter(
+            tuple_(HouseInfo.area_m2, HouseInfo.floor, ROWID)
+            > tuple_(literal(key[0]), literal(key[1]), literal(key[2]))
+        )
+
+    return query.order_by(HouseInfo.area_m2, HouseInfo.floor, ROWID).limit(limit + 1)
+
+
+# -------------------------------------------------
+# 동 단위 클러스터 (/predict/api/clusters)
+#   지도 저배율에서 매물 전체 대신 동별 집계만 내려줌
+# -------------------------------------------------
+def _median_by_dong(base, col):
+    """
+    동별 중앙값 (SQLite에 median이 없어서 윈도우 함수로 가운데 1~2개 평균, rn 비교는 정수 나눗셈)
+    n=5 -> rn 3 / n=4 -> rn 2,3
+    """
+    value = base.c[col]
+    ranked = (
+        select(
+            base.c.dong_name,
+            value.label("v"),
+            func.row_number().over(partition_by=base.c.dong_name, order_by=value).label("rn"),
+            func.count().over(partition_by=base.c.dong_name).label("n"),
+        )
+        .where(value.isnot(None))
+        .subquery()
+    )
+    return (
+        select(ranked.c.dong_name, func.avg(ranked.c.v).label("median"))
+        .where(ranked.c.rn.in_([(ranked.c.n + 1) // 2, (ranked.c.n + 2) // 2]))
+        .group_by(ranked.c.dong_name)
+    )
+
+
+def build_cluster_queries(f: SearchFilter):
+    """(count/centroid 쿼리, 보증금 중앙값 쿼리, 월세 중앙값 쿼리)"""
+    base = apply_search_filter(
+        db.session.query(
+            HouseInfo.dong_name,
+            HouseInfo.latitude,
+            HouseInfo.longitude,
+            HouseInfo.recent_deposit,
+            HouseInfo.recent_monthly,
+        ),
+        f,
+    ).filter(HouseInfo.latitude.isnot(None), HouseInfo.longitude.isnot(None)).subquery()
+
+    summary = (
+        select(
+            base.c.dong_name,
+            func.count().label("count"),
+            func.avg(base.c.latitude).label("lat"),
+            func.avg(base.c.longitude).label("lng"),
+        )
+        .group_by(base.c.dong_name)
+        .order_by(base.c.dong_name)
+    )
+    return summary, _median_by_dong(base, "recent_deposit"), _median_by_dong(base, "recent_monthly")
+
+
+def dong_clusters(f: SearchFilter) -> List[Dict[str, Any]]:
+    summary_q, deposit_q, monthly_q = build_cluster_queries(f)
+
+    deposit = dict(db.session.execute(deposit_q).all())
+    monthly = dict(db.session.execute(monthly_q).all())
+
+    clusters = []
+    for dong_name, count, lat, lng in db.session.execute(summary_q):
+        clusters.append({
+            "dong_name": dong_name or "기타",
+            "count": count,
+            "lat": lat,
+            "lng": lng,
+            "median_recent_deposit": deposit.get(dong_name),
+            "median_recent_monthly": monthly.get(dong_name),
+        })
+    return clusters
+
+
+# -------------------------------------------------
+# NLQ 조건 검색 (/nlq 규칙 파서 fast path)
+#   '구로구 전세 2억 이하 최근 5개' -> 구 + 전월세 (+ 동/유형/건물) + 보증금·월세 범위, 최근 거래순
+# -------------------------------------------------
+DEFAULT_NLQ_LIMIT = 10
+MAX_NLQ_LIMIT = 100
+
+
+@dataclass(frozen=True)
+class ListingQuery:
+    """금액은 DB 단위(만원), districts 는 1개 이상 (구를 안 말하면 서비스 구 전체)"""
+    districts: Tuple[str, ...]
+    lease_type: str
+    dong_name: Optional[str] = None
+    house_type: Optional[str] = None
+    building_name: Optional[str] = None
+    building_prefix: Optional[str] = None      # '온세샤인빌' -> 온세샤인빌2, 온세샤인빌24 ...
+    deposit_min: Optional[float] = None
+    deposit_max: Optional[float] = None
+    monthly_rent_min: Optional[float] = None
+    monthly_rent_max: Optional[float] = None
+    limit: int = DEFAULT_NLQ_LIMIT
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _like_prefix(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def build_nlq_listing_query(q: ListingQuery):
+    """
+    district IN (...) + lease_type (+ building_name) -> ix_house_info_search / ux_house_info_key 앞부분
+    정렬: 최근 거래 분기 내림차순, rowid
+    """
+    query = build_listing_base_query().filter(
+        HouseInfo.district.in_(q.districts),
+        HouseInfo.lease_type == q.lease_type,
+    )
+    if q.building_name:
+        query = query.filter(HouseInfo.building_name == q.building_name)
+    elif q.building_prefix:
+        query = query.filter(HouseInfo.building_name.like(_like_prefix(q.building_prefix), escape="\\"))
+    if q.dong_name:
+        query = query.filter(HouseInfo.dong_name == q.dong_name)
+    if q.house_type:
+        query = query.filter(HouseInfo.house_type == q.house_type)
+
+    if q.deposit_min is not None:
+        query = query.filter(HouseInfo.recent_deposit >= q.deposit_min)
+    if q.deposit_max is not None:
+        query = query.filter(HouseInfo.recent_deposit <= q.deposit_max)
+    if q.monthly_rent_min is not None:
+        query = query.filter(HouseInfo.recent_monthly >= q.monthly_rent_min)
+    if q.monthly_rent_max is not None:
+        query = query.filter(HouseInfo.recent_monthly <= q.monthly_rent_max)
+
+    limit = max(1, min(int(q.limit), MAX_NLQ_LIMIT))
+    return query.order_by(HouseInfo.recent_yq.desc(), ROWID).limit(limit)
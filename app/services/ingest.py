@@ -0,0 +1,333 @@
+# app/services/ingest.py
+from __future__ import annotations
+
+import csv
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Set, Tuple
+
+from sqlalchemy import JSON, Float, Integer
+
+from app import db
+from app.model import HouseInfo, SupportList
+from app.services.data_version import bump_data_version
+from app.services.forecast_repository import (
+    FORECAST_COLUMNS,
+    FORECAST_TABLE,
+    HOUSE_KEY_SQL,
+    METRICS,
+    QUARTERS,
+    has_forecast_table,
+)
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# 업서트 키 (migrations/versions/5d0e7a13c9f4 unique 인덱스와 같은 컬럼)
+HOUSE_KEY_COLUMNS = ("district", "building_name", "house_type", "floor", "area_m2")
+SUPPORT_KEY_COLUMNS = ("source_type", "title")
+
+# 큐브 재계산 단위 (forecast_cube.CUBE_DIMS)
+_GROUP_COLUMNS = ("district", "dong_name", "house_type", "lease_type")
+
+# 와이드 컬럼 -> (metric, yq)
+_WIDE_TO_LONG: Dict[str, Tuple[str, str]] = {
+    col: (m, yq) for m in METRICS for col, yq in zip(FORECAST_COLUMNS[m], QUARTERS)
+}
+
+_KEYS_TABLE = "temp._ingest_keys"
+
+
+@dataclass
+class IngestResult:
+    table: str
+    rows: int = 0
+    chunks: int = 0
+    columns: List[str] = field(default_factory=list)
+    ignored_columns: List[str] = field(default_factory=list)
+    groups: Set[Tuple[str, ...]] = field(default_factory=set)   # HOUSE_INFO: 값이 바뀐 (구, 동, 유형, 거래)
+    elapsed_s: float = 0.0
+
+
+# -------------------------------------------------
+# 파일 읽기 (청크 단위 스트리밍)
+# -------------------------------------------------
+def _iter_csv(path: Path, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    # utf-8-sig: 엑셀에서 저장한 CSV의 BOM 제거
+    with path.open(encoding="utf-8-sig", newline="") as fp:
+        chunk: List[Dict[str, Any]] = []
+        for row in csv.DictReader(fp):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _iter_parquet(path: Path, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet 적재에는 pyarrow가 필요합니다. (pip install pyarrow)") from e
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+def iter_chunks(path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """CSV / Parquet -> dict row 리스트 (chunk_size개씩, 파일 전체를 메모리에 올리지 않음)"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return _iter_csv(path, chunk_size)
+    if suffix in (".parquet", ".pq"):
+        return _iter_parquet(path, chunk_size)
+    raise ValueError(f"지원하지 않는 파일 형식입니다: {path.name} (.csv / .parquet)")
+
+
+# -------------------------------------------------
+# 값 변환 (CSV는 전부 문자열, Parquet은 타입 있음)
+# -------------------------------------------------
+def _blank(v) -> bool:
+    if v is None:
+        return True
+    if isinstance(v, float):
+        return math.isnan(v)
+    return isinstance(v, str) and v.strip() == ""
+
+
+def _to_int(v):
+    if _blank(v):
+        return None
+    if isinstance(v, str):
+        v = v.strip().replace(",", "")
+    return int(float(v))
+
+
+def _to_float(v):
+    if _blank(v):
+        return None
+    if isinstance(v, str):
+        v = v.strip().replace(",", "")
+    return float(v)
+
+
+def _to_text(v):
+    if _blank(v):
+        return None
+    return str(v).strip()
+
+
+def _to_json(v):
+    if _blank(v):
+        return None
+    if isinstance(v, str):
+        v = json.loads(v)   # 형식 검증 겸
+    return json.dumps(v, ensure_ascii=False)
+
+
+def _coercers(model) -> Dict[str, Callable[[Any], Any]]:
+    out = {}
+    for col in model.__table__.columns:
+        if isinstance(col.type, Integer):
+            out[col.name] = _to_int
+        elif isinstance(col.type, Float):
+            out[col.name] = _to_float
+        elif isinstance(col.type, JSON):
+            out[col.name] = _to_json
+        else:
+            out[col.name] = _to_text
+    return out
+
+
+def _row_error(n: int, e: Exception) -> ValueError:
+    return ValueError(f"{n}번째 행 변환 실패: {e}")
+
+
+# -------------------------------------------------
+# 공통 업서트
+# -------------------------------------------------
+def _upsert_sql(table: str, columns: Sequence[str], key_columns: Sequence[str]) -> str:
+    updates = [c for c in columns if c not in key_columns]
+    action = (
+        "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+        if updates else "DO NOTHING"
+    )
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT ({', '.join(key_columns)}) {action}"
+    )
+
+
+def _plan_columns(first_row: Dict[str, Any], model, key_columns: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """파일 컬럼 -> (테이블에 넣을 컬럼, 무시할 컬럼)"""
+    table_cols = [c.name for c in model.__table__.columns]
+    header = list(first_row.keys())
+    missing = [k for k in key_columns if k not in header]
+    if missing:
+        raise ValueError(f"키 컬럼이 없습니다: {missing}")
+    used = [c for c in table_cols if c in header]
+    ignored = [c for c in header if c not in table_cols]
+    return used, ignored
+
+
+def _finish(conn, tables: Sequence[str]) -> None:
+    # 청크 적재가 끝난 뒤 인덱스 재구성 + 플래너 통계 갱신
+    for t in tables:
+        conn.exec_driver_sql(f"REINDEX {t}")
+        conn.exec_driver_sql(f"ANALYZE {t}")
+
+
+# -------------------------------------------------
+# HOUSE_INFO (+ HOUSE_FORECAST 롱 포맷 동기화)
+# -------------------------------------------------
+def _sync_forecasts(conn, forecast_cols: Sequence[str]) -> None:
+    """
+    이번 청크 키(_ingest_keys)의 와이드 예측 컬럼 -> HOUSE_FORECAST
+    (마이그레이션 406a93341d7e 백필과 같은 규칙: NULL 값은 행을 두지 않음)
+    """
+    rowids = (
+        f"SELECT h.rowid FROM {_KEYS_TABLE} k JOIN HOUSE_INFO h ON "
+        + " AND ".join(f"h.{c} = k.{c}" for c in HOUSE_KEY_COLUMNS)
+    )
+    for col in forecast_cols:
+        metric, yq = _WIDE_TO_LONG[col]
+        conn.exec_driver_sql(
+            f"INSERT OR REPLACE INTO {FORECAST_TABLE} (house_key, metric, yq, value) "
+            f"SELECT {HOUSE_KEY_SQL}, ?, ?, {col} FROM HOUSE_INFO "
+            f"WHERE rowid IN ({rowids}) AND {col} IS NOT NULL",
+            (metric, yq),
+        )
+        conn.exec_driver_sql(
+            f"DELETE FROM {FORECAST_TABLE} WHERE metric = ? AND yq = ? AND house_key IN ("
+            f"SELECT {HOUSE_KEY_SQL} FROM HOUSE_INFO WHERE rowid IN ({rowids}) AND {col} IS NULL)",
+            (metric, yq),
+        )
+
+
+def _chunk_groups(conn) -> Set[Tuple[str, ...]]:
+    rows = conn.exec_driver_sql(
+        f"SELECT DISTINCT {', '.join('h.' + c for c in _GROUP_COLUMNS)} "
+        f"FROM {_KEYS_TABLE} k JOIN HOUSE_INFO h ON "
+        + " AND ".join(f"h.{c} = k.{c}" for c in HOUSE_KEY_COLUMNS)
+    )
+    return {tuple(r) for r in rows}
+
+
+def ingest_house_info(path, chunk_size: int = DEFAULT_CHUNK_SIZE, reindex: bool = True) -> IngestResult:
+    """
+    HOUSE_INFO 적재 (CSV/Parquet 컬럼명 = HOUSE_INFO 컬럼명)
+
+    - 키 5개(district, building_name, house_type, floor, area_m2)는 필수, 나머지는 있는 컬럼만 갱신
+      -> 분기 예측 갱신은 키 + deposit_*/monthly_rent_* 컬럼만 있는 파일로 충분
+    - 청크마다 트랜잭션 1개 (executemany 업서트 + HOUSE_FORECAST 동기화 + data_version +1)
+    - 끝나면 REINDEX/ANALYZE
+    """
+    t0 = time.perf_counter()
+    result = IngestResult(table="HOUSE_INFO")
+    coerce = _coercers(HouseInfo)
+    sync_long = has_forecast_table()
+
+    with db.engine.connect() as conn:
+        with conn.begin():
+            conn.exec_driver_sql(
+                f"CREATE TEMP TABLE IF NOT EXISTS _ingest_keys ({', '.join(HOUSE_KEY_COLUMNS)})"
+            )
+        sql = None
+        n = 0
+        for chunk in iter_chunks(path, chunk_size):
+            if sql is None:
+                result.columns, result.ignored_columns = _plan_columns(chunk[0], HouseInfo, HOUSE_KEY_COLUMNS)
+                sql = _upsert_sql("HOUSE_INFO", result.columns, HOUSE_KEY_COLUMNS)
+                key_pos = [result.columns.index(c) for c in HOUSE_KEY_COLUMNS]
+                forecast_cols = [c for c in result.columns if c in _WIDE_TO_LONG]
+
+            params = []
+            for row in chunk:
+                n += 1
+                try:
+                    params.append(tuple(coerce[c](row.get(c)) for c in result.columns))
+                except (TypeError, ValueError) as e:
+                    raise _row_error(n, e) from e
+            keys = [tuple(p[i] for i in key_pos) for p in params]
+
+            with conn.begin():
+                conn.exec_driver_sql(f"DELETE FROM {_KEYS_TABLE}")
+                conn.exec_driver_sql(
+                    f"INSERT INTO {_KEYS_TABLE} VALUES ({', '.join('?' for _ in HOUSE_KEY_COLUMNS)})", keys
+                )
+                result.groups |= _chunk_groups(conn)     # 바뀌기 전 그룹 (동/거래유형이 바뀌는 경우)
+                conn.exec_driver_sql(sql, params)
+                result.groups |= _chunk_groups(conn)
+                if sync_long and forecast_cols:
+                    _sync_forecasts(conn, forecast_cols)
+                bump_data_version(conn)
+
+            result.rows += len(params)
+            result.chunks += 1
+
+        if reindex and result.rows:
+            with conn.begin():
+                _finish(conn, ["HOUSE_INFO"] + ([FORECAST_TABLE] if sync_long else []))
+
+    result.elapsed_s = time.perf_counter() - t0
+    return result
+
+
+# -------------------------------------------------
+# SUPPORT_LIST
+# -------------------------------------------------
+def ingest_support_list(path, chunk_size: int = DEFAULT_CHUNK_SIZE, reindex: bool = True) -> IngestResult:
+    """
+    SUPPORT_LIST 적재 (CSV/Parquet 컬럼명 = SUPPORT_LIST 컬럼명)
+
+    - id 는 파일에 있어도 쓰지 않음 (새 행은 AUTOINCREMENT)
+    - (source_type, title) 이 같으면 기존 행 갱신 (id 유지, 단 SQLite 업서트라 AUTOINCREMENT 번호는 건너뜀)
+    - 테이블에 없는 컬럼은 detail_json 으로 합침 (파일에 detail_json 이 없을 때)
+    """
+    t0 = time.perf_counter()
+    result = IngestResult(table="SUPPORT_LIST")
+    coerce = _coercers(SupportList)
+
+    with db.engine.connect() as conn:
+        sql = None
+        extra: List[str] = []
+        n = 0
+        for chunk in iter_chunks(path, chunk_size):
+            if sql is None:
+                cols, ignored = _plan_columns(chunk[0], SupportList, SUPPORT_KEY_COLUMNS)
+                cols = [c for c in cols if c != "id"]
+                if "detail_json" not in cols and ignored:
+                    extra, ignored = [c for c in ignored if c != "id"], []
+                    cols.append("detail_json")
+                result.columns, result.ignored_columns = cols, ignored
+                sql = _upsert_sql("SUPPORT_LIST", cols, SUPPORT_KEY_COLUMNS)
+
+            params = []
+            for row in chunk:
+                n += 1
+                try:
+                    if extra:
+                        detail = {k: row.get(k) for k in extra if not _blank(row.get(k))}
+                        row = {**row, "detail_json": detail or None}
+                    params.append(tuple(coerce[c](row.get(c)) for c in result.columns))
+                except (TypeError, ValueError) as e:
+                    raise _row_error(n, e) from e
+
+            with conn.begin():
+                conn.exec_driver_sql(sql, params)
+                bump_data_version(conn)
+
+            result.rows += len(params)
+            result.chunks += 1
+
+        if reindex and result.rows:
+            with conn.begin():
+                _finish(conn, ["SUPPORT_LIST"])
+
+    result.elapsed_s = time.perf_counter() - t0
+    return result
@@ -3,9 +3,12 @@ from __future__ import annotations
 import sqlite3
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from pathlib import Path
 from typing import Any, Optional, Dict, List, Tuple
 
+from app.services.forecast_repository import FORECAST_COLUMNS, QUARTERS
+from app.services.match_cache import get_match_cache, norm_text, versioned_key
+from app.services.sqlite_pool import get_pool
+
 
 KST = timezone(timedelta(hours=9))
 
@@ -17,6 +20,25 @@ DISTRICT_DISPLAY_MAP = {
 }
 
 
+# 예측 입력 JSON 스키마
+#   v1.0: 분기 히스토리를 컬럼명 dict 2개(48키)로 + infra_features(null) 포함
+#   v1.1: 경량 — 히스토리는 요청 시에만 분기 순서 배열로, infra_features 없음
+SCHEMA_V1_0 = "v1.0"
+SCHEMA_V1_1 = "v1.1"
+SUPPORTED_SCHEMA_VERSIONS = (SCHEMA_V1_0, SCHEMA_V1_1)
+
+
+def check_schema_version(payload: Dict[str, Any]) -> str:
+    """
+    /predict/run 등에 들어온 payload 버전 확인 (없으면 v1.0 취급 — LLM이 만든 payload 등)
+    조회에 쓰는 키(contract / region / property / db_context)는 두 버전이 같음
+    """
+    version = payload.get("schema_version") or SCHEMA_V1_0
+    if version not in SUPPORTED_SCHEMA_VERSIONS:
+        raise ValueError(f"payload.schema_version must be one of {list(SUPPORTED_SCHEMA_VERSIONS)}")
+    return version
+
+
 @dataclass(frozen=True)
 class UserInput:
     district_code: str          # DB 값 그대로: 'eunpyeong' | 'guro'
@@ -35,17 +57,6 @@ class UserInput:
     monthly_rent_krw: Optional[int] = None  # 월세 예측 요청이면 None 유지 권장
 
 
-def _project_root() -> Path:
-    # app/services/input_builder.py 기준:
-    # parents[0]=services, [1]=app, [2]=프로젝트 루트
-    return Path(__file__).resolve().parents[2]
-
-
-def _db_path() -> Path:
-    # DB는 프로젝트 루트에 그대로 둔다고 했으니 여기로 고정
-    return _project_root() / "realestate_v0.5.1.db"
-
-
 def _parse_recent_yq(yq: Optional[str]) -> int:
     """
     recent_yq 예: '2025Q4'
@@ -62,15 +73,39 @@ def _parse_recent_yq(yq: Optional[str]) -> int:
         return -1
 
 
-def _get_house_info_columns(conn: sqlite3.Connection) -> List[str]:
-    cur = conn.cursor()
-    cur.execute("PRAGMA table_info(HOUSE_INFO);")
-    cols = [row[1] for row in cur.fetchall()]
+def _get_house_info_columns(pool) -> List[str]:
+    # 스키마 버전이 같으면 캐시된 컬럼 목록 (마이그레이션 후에만 PRAGMA table_info 다시 실행)
+    cols = pool.table_columns("HOUSE_INFO")
     if not cols:
         raise RuntimeError("HOUSE_INFO 테이블 컬럼을 읽지 못했습니다. DB 파일/테이블명을 확인하세요.")
     return cols
 
 
+def _build_match_sql(cols: List[str], with_building: bool) -> str:
+    """
+    매칭 조회 SQL (ix_house_info_match: district, dong_name, house_type, building_name)
+    파라미터 순서: district, dong_name, house_type (+ building_name)
+    """
+    where_clauses = [
+        "district = ?",
+        "dong_name = ?",
+        "house_type = ?",
+    ]
+    if with_building:
+        where_clauses.append("building_name = ?")
+
+    where_sql = " AND ".join(where_clauses)
+
+    # rowid 포함해서 추적 가능하게 가져오기
+    return f"""
+        SELECT
+            rowid AS _rowid,
+            {", ".join(cols)}
+        FROM HOUSE_INFO
+        WHERE {where_sql}
+    """
+
+
 def _select_best_row(
     rows: List[sqlite3.Row],
     target_area: float,
@@ -90,19 +125,70 @@ def _select_best_row(
     return max(rows, key=key_fn)
 
 
-def build_prediction_input_json(user: UserInput) -> Dict[str, Any]:
+def resolve_match(
+    pool,
+    district_code: str,
+    dong_name: str,
+    house_type: str,
+    area_m2: float,
+    building_name: Optional[str] = None,
+) -> Tuple[List[str], Optional[sqlite3.Row]]:
+    """
+    매칭 조건 -> (HOUSE_INFO 컬럼 목록, 최적 row 또는 None)
+
+    정규화한 입력 + DB 데이터 버전을 키로 메모이즈 (매칭 없음도 캐시)
+    -> 같은 건물 반복 요청은 후보 조회 / max() 없이 바로 반환
+    """
+    district_code, dong_name, house_type = norm_text(district_code), norm_text(dong_name), norm_text(house_type)
+    building_name = norm_text(building_name) or None
+    area_m2 = float(area_m2)
+
+    cache = get_match_cache("input_builder.match")
+    key = versioned_key(district_code, dong_name, house_type, building_name, area_m2)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+
+    cols = _get_house_info_columns(pool)
+
+    # 1) 조회 쿼리 구성 (컬럼명은 DB 그대로 사용)
+    # building_name이 들어오면 매칭 정확도 올리기 위해 조건 추가(선택)
+    params: List[Any] = [district_code, dong_name, house_type]
+    if building_name:
+        params.append(building_name)
+
+    select_sql = _build_match_sql(cols, with_building=bool(building_name))
+    rows = pool.connection().execute(select_sql, params).fetchall()
+
+    # 2) 다중 매칭 해결
+    best = _select_best_row(rows, target_area=area_m2, prefer_latest=True) if rows else None
+
+    result = (cols, best)
+    cache.set(key, result)
+    return result
+
+
+def build_prediction_input_json(
+    user: UserInput,
+    schema_version: str = SCHEMA_V1_0,
+    include_history: bool = False,
+) -> Dict[str, Any]:
     """
     사용자 입력(폼) + DB(HOUSE_INFO) 조회로
-    예측 입력 JSON(v1.0)을 완성해서 반환한다.
+    예측 입력 JSON(v1.0 / v1.1)을 완성해서 반환한다.
 
     - DB 조회 키: district, dong_name, house_type (+ building_name 있으면 활용)
     - 다중 매칭 시: recent_yq 최신 + area_m2 가장 가까운 row 선택
     - 사용자 입력 built_year/floor/building_name 있으면 우선, 없으면 DB 값으로 보강
+    - v1.1: include_history=True 일 때만 "history": {"quarters", "deposit", "monthly_rent"} 배열 포함
     """
+    if schema_version not in SUPPORTED_SCHEMA_VERSIONS:
+        raise ValueError(f"'schema_version' must be one of {list(SUPPORTED_SCHEMA_VERSIONS)}")
+    lean = schema_version == SCHEMA_V1_1
 
     # 0) 기본 JSON 뼈대
     payload: Dict[str, Any] = {
-        "schema_version": "v1.0",
+        "schema_version": schema_version,
         "meta": {
             "request_id": None,
             "requested_at": datetime.now(KST).isoformat(),
@@ -152,91 +238,79 @@ def build_prediction_input_json(user: UserInput) -> Dict[str, Any]:
         },
     }
 
-    db_file = _db_path()
-    if not db_file.exists():
+    if lean:
+        # v1.1: 쓰이지 않는 블록 제거 (히스토리는 아래에서 요청 시에만 배열로)
+        del payload["db_context"]["deposit_history"]
+        del payload["db_context"]["monthly_rent_history"]
+        del payload["infra_features"]
+
+    # Flask-SQLAlchemy 엔진과 같은 DB 파일, 스레드별 연결 재사용 (close 하지 않음)
+    pool = get_pool()
+    if not pool.exists():
         payload["db_context"]["match_status"] = "db_not_found"
-        payload["db_context"]["error"] = f"DB 파일을 찾을 수 없습니다: {db_file}"
+        payload["db_context"]["error"] = f"DB 파일을 찾을 수 없습니다: {pool.path}"
         return payload
 
-    conn = sqlite3.connect(str(db_file))
-    conn.row_factory = sqlite3.Row
-
-    try:
-        cols = _get_house_info_columns(conn)
-
-        # 1) 조회 쿼리 구성 (컬럼명은 DB 그대로 사용)
-        # building_name이 들어오면 매칭 정확도 올리기 위해 조건 추가(선택)
-        where_clauses = [
-            "district = ?",
-            "dong_name = ?",
-            "house_type = ?",
-        ]
-        params: List[Any] = [user.district_code, user.dong_name, user.house_type]
-
-        if user.building_name:
-            where_clauses.append("building_name = ?")
-            params.append(user.building_name)
-
-        where_sql = " AND ".join(where_clauses)
-
-        # rowid 포함해서 추적 가능하게 가져오기
-        select_sql = f"""
-            SELECT
-                rowid AS _rowid,
-                {", ".join(cols)}
-            FROM HOUSE_INFO
-            WHERE {where_sql}
-        """
-
-        cur = conn.cursor()
-        cur.execute(select_sql, params)
-        rows = cur.fetchall()
-
-        if not rows:
-            payload["db_context"]["match_status"] = "no_match"
-            return payload
-
-        # 2) 다중 매칭 해결
-        best = _select_best_row(rows, target_area=float(user.area_m2), prefer_latest=True)
-
-        # 3) DB 값으로 보강 (사용자 입력 우선)
-        payload["db_context"]["match_status"] = "matched"
-        payload["db_context"]["matched_rowid"] = best["_rowid"]
-
-        # property 보강
-        if payload["property"]["built_year"] is None:
-            payload["property"]["built_year"] = best["built_year"]
-        if payload["property"]["floor"] is None:
-            payload["property"]["floor"] = best["floor"]
-        if payload["property"]["building_name"] is None:
-            payload["property"]["building_name"] = best["building_name"]
-
-        # 위치
-        payload["location"]["latitude"] = best["latitude"]
-        payload["location"]["longitude"] = best["longitude"]
-
-        # 최근값/주소
-        payload["db_context"]["recent_deposit_krw"] = best["recent_deposit"]
-        payload["db_context"]["recent_monthly_rent_krw"] = best["recent_monthly"]
-        payload["db_context"]["recent_yq"] = best["recent_yq"]
-        payload["db_context"]["road_address"] = best["road_address"]
-        payload["db_context"]["jibun_address"] = best["jibun_address"]
-        payload["db_context"]["building_name"] = best["building_name"]
-
-        # 4) 분기 히스토리: deposit_25q1~30q4, monthly_rent_25q1~30q4
-        deposit_hist: Dict[str, Any] = {}
-        monthly_hist: Dict[str, Any] = {}
-
-        for c in cols:
-            if c.startswith("deposit_"):
-                deposit_hist[c] = best[c]
-            elif c.startswith("monthly_rent_"):
-                monthly_hist[c] = best[c]
-
-        payload["db_context"]["deposit_history"] = deposit_hist
-        payload["db_context"]["monthly_rent_history"] = monthly_hist
+    cols, best = resolve_match(
+        pool,
+        user.district_code,
+        user.dong_name,
+        user.house_type,
+        user.area_m2,
+        building_name=user.building_name,
+    )
+
+    if best is None:
+        payload["db_context"]["match_status"] = "no_match"
+        return payload
 
+    # 3) DB 값으로 보강 (사용자 입력 우선)
+    payload["db_context"]["match_status"] = "matched"
+    payload["db_context"]["matched_rowid"] = best["_rowid"]
+
+    # property 보강
+    if payload["property"]["built_year"] is None:
+        payload["property"]["built_year"] = best["built_year"]
+    if payload["property"]["floor"] is None:
+        payload["property"]["floor"] = best["floor"]
+    if payload["property"]["building_name"] is None:
+        payload["property"]["building_name"] = best["building_name"]
+
+    # 위치
+    payload["location"]["latitude"] = best["latitude"]
+    payload["location"]["longitude"] = best["longitude"]
+
+    # 최근값/주소
+    payload["db_context"]["recent_deposit_krw"] = best["recent_deposit"]
+    payload["db_context"]["recent_monthly_rent_krw"] = best["recent_monthly"]
+    payload["db_context"]["recent_yq"] = best["recent_yq"]
+    payload["db_context"]["road_address"] = best["road_address"]
+    payload["db_context"]["jibun_address"] = best["jibun_address"]
+    payload["db_context"]["building_name"] = best["building_name"]
+
+    # 4) 분기 히스토리
+    if lean:
+        if include_history:
+            # 2025Q1~2030Q4 순서 배열 (컬럼이 없으면 null)
+            colset = set(cols)
+            payload["history"] = {
+                "quarters": list(QUARTERS),
+                "deposit": [best[c] if c in colset else None for c in FORECAST_COLUMNS["deposit"]],
+                "monthly_rent": [best[c] if c in colset else None for c in FORECAST_COLUMNS["monthly_rent"]],
+            }
         return payload
 
-    finally:
-        conn.close()
+    # v1.0: deposit_25q1~30q4, monthly_rent_25q1~30q4 컬럼명 dict
+    deposit_hist: Dict[str, Any] = {}
+    monthly_hist: Dict[str, Any] = {}
+
+    for c in cols:
+        if c.startswith("deposit_"):
+            deposit_hist[c] = best[c]
+        elif c.startswith("monthly_rent_"):
+            monthly_hist[c] = best[c]
+
+    payload["db_context"]["deposit_history"] = deposit_hist
+    payload["db_context"]["monthly_rent_history"] = monthly_hist
+
+    return payload
@@ -0,0 +1,52 @@
+# app/services/match_cache.py
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+from flask import current_app
+
+from app.services.cache import TTLCache
+from app.services.data_version import data_version
+
+
+# 캐시 이름 -> TTLCache (프로세스 전역)
+#   input_builder.match     : (district, dong, house_type, building, area) -> 매칭 row
+#   prediction_lookup.pick  : (payload 매칭 조건, lease_type, 분기) -> 선택 row 인덱스
+_caches: Dict[str, TTLCache] = {}
+_lock = threading.Lock()
+
+
+def get_match_cache(name: str) -> TTLCache:
+    cache = _caches.get(name)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache = _caches[name] = TTLCache(
+                    maxsize=current_app.config.get("MATCH_CACHE_SIZE", 4096),
+                    ttl=current_app.config.get("MATCH_CACHE_TTL", 300),
+                )
+    return cache
+
+
+def versioned_key(*parts: Any) -> tuple:
+    """
+    캐시 키 앞에 DB 데이터 버전을 붙임
+    -> DB 파일이 바뀌면 예전 키는 다시 안 맞고 LRU/TTL로 자연히 밀려남
+    """
+    return (data_version(),) + parts
+
+
+def norm_text(v) -> str:
+    return (v or "").strip()
+
+
+def match_cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in sorted(_caches.items())}
+
+
+def clear_match_caches() -> None:
+    with _lock:
+        for cache in _caches.values():
+            cache.clear()
@@ -0,0 +1,274 @@
+# app/services/name_index.py
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app import db
+from app.services.data_version import versioned_singleton
+
+
+# -------------------------------------------------
+# 한글 자모 분해
+#   '래미안' -> 'ㄹㅐㅁㅣㅇㅏㄴ'
+#   입력 중인 글자('래밒', '래미ㅇ')도 접두사로 맞도록 겹받침/겹모음은 기본 자모로 풀어 씀
+# -------------------------------------------------
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+_SPLIT = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ", "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+# 공백/기호는 무시 ('e편한세상 2차' == 'e편한세상2차')
+_DROP_RE = re.compile(r"[\s\-_.,·()\[\]{}'\"/]+")
+
+
+def to_jamo(s: str) -> str:
+    out = []
+    for ch in unicodedata.normalize("NFC", s or ""):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            code -= _HANGUL_BASE
+            parts = (_CHOSEONG[code // 588], _JUNGSEONG[(code % 588) // 28], _JONGSEONG[code % 28])
+            for p in parts:
+                if p != " ":
+                    out.append(_SPLIT.get(p, p))
+        else:
+            out.append(_SPLIT.get(ch, ch))
+    return "".join(out)
+
+
+def normalize_name(s: str) -> str:
+    """비교용 키: 소문자 + 공백/기호 제거 + 자모 분해"""
+    return to_jamo(_DROP_RE.sub("", (s or "").lower()))
+
+
+def to_choseong(s: str) -> str:
+    """초성 키: '래미안5' -> 'ㄹㅁㅇ5' (초성 검색용)"""
+    out = []
+    for ch in unicodedata.normalize("NFC", _DROP_RE.sub("", (s or "").lower())):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            out.append(_CHOSEONG[(code - _HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def is_choseong_query(s: str) -> bool:
+    """'ㄹㅁㅇ' 처럼 자음만 2글자 이상이면 초성 검색"""
+    key = _DROP_RE.sub("", s or "")
+    return len(key) >= 2 and all(ch in _CHOSEONG for ch in key)
+
+
+# n-gram (자모 기준 3글자 ≒ 한글 1음절)
+NGRAM = 3
+_PAD = "\x00"
+
+
+def ngrams(key: str, n: int = NGRAM) -> List[str]:
+    padded = _PAD * (n - 1) + key + _PAD * (n - 1)
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+class BuildingNotFoundError(ValueError):
+    """건물명 매칭 실패 (응답에 자동완성 후보를 붙일 수 있게 이름/구를 들고 있음)"""
+
+    def __init__(self, message: str, building_name: str, district: Optional[str] = None):
+        super().__init__(message)
+        self.building_name = building_name
+        self.district = district
+
+
+# -------------------------------------------------
+# 인덱스
+# -------------------------------------------------
+@dataclass(frozen=True)
+class NameEntry:
+    building_name: str
+    district: str
+    dong_name: Optional[str]
+    count: int          # HOUSE_INFO row 수 (같은 점수면 많은 쪽 먼저)
+
+
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.top: List[int] = []      # 이 접두사로 시작하는 entry id (순위순, 최대 TOP_PER_NODE)
+
+
+class NameIndex:
+    """
+    HOUSE_INFO.building_name 자동완성 인덱스 (읽기 전용, 메모리)
+
+    - 접두사 트라이: 자모 단위 노드마다 상위 후보를 미리 정렬해 둠 -> 조회는 입력 길이만큼 내려가기만 함
+      (전체용 + 구별 트라이, 구 필터가 있어도 상위 후보가 잘리지 않게)
+    - 초성 트라이: 'ㄹㅁㅇ' -> 래미안...
+    - n-gram 역색인: 중간 글자 / 오타 (접두사로 못 찾을 때 보충)
+    """
+
+    TOP_PER_NODE = 50
+    MIN_SCORE = 0.3
+
+    def __init__(self, entries: List[NameEntry]):
+        # 순위 기본값: row 많은 순 -> 이름 짧은 순 -> 이름순
+        order = sorted(range(len(entries)), key=lambda i: (-entries[i].count, len(entries[i].building_name), entries[i].building_name))
+        self.entries = [entries[i] for i in order]
+        self.keys = [normalize_name(e.building_name) for e in self.entries]
+
+        # (초성 여부, 구) -> 트라이 루트, 구 None = 전체
+        self._roots: Dict[Tuple[bool, Optional[str]], _TrieNode] = {}
+        self._grams: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+
+        for i, key in enumerate(self.keys):
+            cho = to_choseong(self.entries[i].building_name)
+            for district in (None, self.entries[i].district):
+                self._insert((False, district), key, i)
+                self._insert((True, district), cho, i)
+
+            grams = set(ngrams(key))
+            self._gram_counts.append(len(grams))
+            for g in grams:
+                self._grams.setdefault(g, []).append(i)
+
+    def _insert(self, root_key, key: str, i: int) -> None:
+        node = self._roots.setdefault(root_key, _TrieNode())
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if len(node.top) < self.TOP_PER_NODE:
+                node.top.append(i)
+
+    @classmethod
+    def load(cls) -> "NameIndex":
+        rows = db.session.execute(text(
+            "SELECT building_name, district, dong_name, COUNT(*) AS n "
+            "FROM HOUSE_INFO WHERE building_name IS NOT NULL AND building_name != '' "
+            "GROUP BY district, building_name, dong_name"
+        )).fetchall()
+
+        # (구, 건물명)당 1개, 동은 row가 가장 많은 동
+        counts: Dict[Tuple[str, str], Counter] = {}
+        for name, district, dong, n in rows:
+            counts.setdefault((district, name), Counter())[dong] += n
+        entries = [
+            NameEntry(building_name=name, district=district, dong_name=c.most_common(1)[0][0], count=sum(c.values()))
+            for (district, name), c in counts.items()
+        ]
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # -------------------------------------------------
+    # 조회
+    # -------------------------------------------------
+    def _prefix(self, key: str, district: Optional[str] = None, choseong: bool = False) -> List[int]:
+        node = self._roots.get((choseong, district))
+        if node is None:
+            return []
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.top
+
+    def _fuzzy(self, key: str) -> Dict[int, float]:
+        """
+        n-gram 겹침 점수: 0.7 × 포함도(입력 n-gram 중 겹친 비율) + 0.3 × Dice
+        -> 이름 중간 일부만 입력해도 / 자모 한두 개 틀려도 잡힘
+        """
+        q = set(ngrams(key))
+        hits: Counter = Counter()
+        for g in q:
+            for i in self._grams.get(g, ()):
+                hits[i] += 1
+        out = {}
+        for i, shared in hits.items():
+            containment = shared / len(q)
+            dice = 2 * shared / (len(q) + self._gram_counts[i])
+            score = 0.7 * containment + 0.3 * dice
+            if score >= self.MIN_SCORE:
+                out[i] = score
+        return out
+
+    def suggest(self, query: str, district: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """
+        순위: 완전 일치 > 접두사 일치 (row 많은 순) > n-gram 점수순
+        자음만 입력하면 초성 접두사 검색 ('ㄹㅁㅇ')
+        반환 항목: building_name, district, dong_name, count, match(exact/prefix/choseong/fuzzy), score
+        """
+        key = normalize_name(query)
+        if not key or limit <= 0:
+            return []
+
+        def ok(i: int) -> bool:
+            return district is None or self.entries[i].district == district
+
+        ranked: List[Tuple[int, str, float]] = []
+        seen = set()
+
+        if is_choseong_query(query):
+            cho = to_choseong(query)
+            ranked = [(i, "choseong", 1.0) for i in self._prefix(cho, district, choseong=True)]
+            return self._items(ranked[:limit])
+
+        for i in self._prefix(key, district):
+            match = "exact" if self.keys[i] == key else "prefix"
+            ranked.append((i, match, 1.0))
+            seen.add(i)
+        # 완전 일치를 맨 앞으로 (나머지는 트라이 순서 = 기본 순위)
+        ranked.sort(key=lambda r: r[1] != "exact")
+
+        if len(ranked) < limit:
+            fuzzy = sorted(
+                ((i, s) for i, s in self._fuzzy(key).items() if i not in seen and ok(i)),
+                key=lambda t: (-t[1], t[0]),
+            )
+            ranked += [(i, "fuzzy", s) for i, s in fuzzy]
+
+        return self._items(ranked[:limit])
+
+    def _items(self, ranked: List[Tuple[int, str, float]]) -> List[Dict]:
+        out = []
+        for i, match, score in ranked:
+            e = self.entries[i]
+            out.append({
+                "building_name": e.building_name,
+                "district": e.district,
+                "dong_name": e.dong_name,
+                "count": e.count,
+                "match": match,
+                "score": round(score, 3),
+            })
+        return out
+
+
+# -------------------------------------------------
+# 프로세스 전역 싱글톤 (Lazy)
+#   APP_META.data_version 이 바뀌면 다시 만듦 (그동안 다른 스레드는 이전 인덱스 사용)
+# -------------------------------------------------
+_index = versioned_singleton(NameIndex.load)
+
+
+def get_name_index() -> NameIndex:
+    return _index.get()
+
+
+def reset_name_index() -> None:
+    """데이터 갱신 후 다음 조회에서 다시 만들도록 비움"""
+    _index.reset()
@@ -0,0 +1,449 @@
+# app/services/nlq_rules.py
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app import db
+from app.services.address_index import get_address_index
+from app.services.data_version import versioned_singleton
+from app.services.house_search import DEFAULT_NLQ_LIMIT, ListingQuery
+from app.services.input_builder import DISTRICT_DISPLAY_MAP
+from app.services.name_index import get_name_index
+
+
+# -------------------------------------------------
+# 규칙 기반 NLQ 파서 (LLM 앞단 fast path)
+#   '구로구 전세 2억 이하 최근 5개'   -> intent=search: 조건 검색 (ListingQuery)
+#   '녹번동 래미안17 전세 얼마'        -> intent=lookup: 건물 1곳 예측 조회 payload
+#   lease_type / district / dong / house_type / building + 금액·개수 필터 + confidence
+#   confidence 가 낮으면 (건물 못 찾음, 전세/월세 애매, 모르는 단어 남음 등) 호출 쪽에서 LLM 으로 넘김
+# -------------------------------------------------
+
+# DB 값 -> 입력에서 쓰는 다른 표현 (DB 에 있는 값만 사용)
+HOUSE_TYPE_ALIASES = {
+    "빌라": ("빌라", "다세대", "연립"),
+    "오피스텔": ("오피스텔", "오피"),
+}
+
+# 금액 앞 라벨 -> 필터 종류
+_DEPOSIT_LABELS = ("보증금", "전세금", "전세가", "전세")
+_RENT_LABELS = ("월세", "월")
+
+# 조건 없이 붙는 말 (건물명 후보에서 뺌)
+_STOPWORDS = {
+    "질문", "매물", "집", "방", "시세", "가격", "예측", "예상", "얼마", "얼마야", "얼마임", "알려줘", "보여줘",
+    "찾아줘", "찾아", "검색", "있나", "있어", "있니", "있는", "조회", "최근", "최신", "서울", "서울시",
+    "서울특별시", "근처", "주변", "정도", "쯤", "좀", "로", "으로", "에서", "의", "거래",
+}
+# 건물명 뒤에 붙은 조사 ('래미안에서', '온세샤인빌은')
+_PARTICLE_RE = re.compile(r"(?:에서|으로|이랑|에는|은|는|이|가|을|를|의|로|에|랑|도)$")
+# 요청 동사 ('알려줄래', '예측해줘', '궁금해요')
+_REQUEST_RE = re.compile(r"^(?:알려|보여|찾아|예측|검색|조회|궁금)")
+
+_LABEL = r"(?<![\w.])(?:(?P<label>보증금|전세금|전세가|전세|월세|월)\s*)?"
+_AMT = (
+    r"\d+(?:\.\d+)?\s*억(?:\s*\d+(?:,\d{3})*\s*(?:천만|천|만)?)?"      # 2억 / 1억5000 / 1억 5천
+    r"|\d+(?:,\d{3})*(?:\.\d+)?\s*(?:천만|천|만)\s*원?"                 # 60만원 / 3천만
+    r"|\d+(?:,\d{3})*\s*원"                                             # 600,000원
+    r"|\d+(?:,\d{3})*(?![\d,.]|\s*(?:개|건|층|평|㎡|m|동|호|차|년|분기))"   # 5000 (만원, 라벨/조건 있을 때만)
+)
+# 범위: '3억~5억', '3~5억', '보증금 3억에서 5억 사이'
+_RANGE_RE = re.compile(
+    _LABEL + rf"(?P<lo>{_AMT})\s*(?:~|에서|부터)\s*(?P<hi>{_AMT})\s*(?:사이|까지|이하)?"
+)
+_AMOUNT_RE = re.compile(_LABEL + rf"(?P<amt>{_AMT})\s*(?P<op>이하|이상|미만|초과|까지)?")
+_BARE_NUMBER_RE = re.compile(r"[\d,]+")
+_UNIT_RE = re.compile(r"억|천만|천|만")
+_LIMIT_RE = re.compile(r"(?<![\w.])(\d{1,3})\s*(?:개|건)")
+_RECENT_RE = re.compile(r"최근|최신")
+# 목록을 달라는 말 (금액/개수 조건이 없어도 검색)
+_SEARCH_RE = re.compile(r"매물|목록|리스트|보여|찾아|검색|있나|있어|있는지|있니")
+_DONG_RE = re.compile(r"[가-힣]+\d*동")
+_ANY_GU_RE = re.compile(r"[가-힣]{1,4}구(?=[\s,에의은는로]|$)")
+
+
+def parse_amount(s: str) -> Optional[int]:
+    """
+    한국어 금액 -> 원
+      '2억' 200,000,000 / '1억5000' 150,000,000 / '1억 5천' 150,000,000 / '1.5억'
+      '60만원' 600,000 / '3천만' 30,000,000 / '600,000원' 600,000
+      숫자만 있으면 만원 단위 ('보증금 5000 이하' -> 50,000,000, '월세 50' -> 500,000)
+    """
+    s = re.sub(r"[\s,]", "", s or "")
+    m = re.fullmatch(r"(?:(\d+(?:\.\d+)?)억)?(?:(\d+(?:\.\d+)?)(천만|천|만)?)?(원)?", s)
+    if not m or not (m.group(1) or m.group(2)):
+        return None
+    eok, num, unit, won = m.groups()
+    total = float(eok) * 100_000_000 if eok else 0.0
+    if num:
+        value = float(num)
+        if unit == "천만":
+            total += value * 10_000_000
+        elif unit == "천":
+            # '1억 5천' = 1억 5천만, '5천' 단독도 보통 5천만
+            total += value * 10_000_000
+        elif unit == "만":
+            total += value * 10_000
+        elif won and not eok:
+            total += value
+        else:
+            total += value * 10_000
+    return int(round(total))
+
+
+# -------------------------------------------------
+# 어휘 (HOUSE_INFO distinct 값)
+# -------------------------------------------------
+@dataclass(frozen=True)
+class NlqLexicon:
+    districts: Dict[str, str]                       # '구로구' -> 'guro'
+    dongs: Dict[str, Tuple[str, ...]]               # '오류동' -> ('guro',)
+    house_types: Dict[str, str]                     # '다세대' -> '빌라'
+    lease_types: Tuple[str, ...]                    # ('월세', '전세')
+
+    @classmethod
+    def load(cls) -> "NlqLexicon":
+        dongs: Dict[str, List[str]] = {}
+        for district, dong in db.session.execute(text(
+            "SELECT DISTINCT district, dong_name FROM HOUSE_INFO WHERE dong_name IS NOT NULL AND dong_name != ''"
+        )).fetchall():
+            dongs.setdefault(dong, []).append(district)
+
+        house_types: Dict[str, str] = {}
+        for (value,) in db.session.execute(text(
+            "SELECT DISTINCT house_type FROM HOUSE_INFO WHERE house_type IS NOT NULL AND house_type != ''"
+        )).fetchall():
+            for alias in HOUSE_TYPE_ALIASES.get(value, (value,)):
+                house_types[alias] = value
+
+        lease_types = tuple(sorted(
+            v for (v,) in db.session.execute(text("SELECT DISTINCT lease_type FROM HOUSE_INFO")).fetchall()
+            if v in ("전세", "월세")
+        ))
+        return cls(
+            districts={name: code for code, name in DISTRICT_DISPLAY_MAP.items()},
+            dongs={k: tuple(sorted(v)) for k, v in dongs.items()},
+            house_types=house_types,
+            lease_types=lease_types,
+        )
+
+
+# -------------------------------------------------
+# 파싱 결과
+# -------------------------------------------------
+@dataclass
+class NlqParse:
+    lease_type: Optional[str] = None
+    district: Optional[str] = None          # 구 코드 (서비스 밖 구면 '?')
+    dong_name: Optional[str] = None
+    house_type: Optional[str] = None
+    building_name: Optional[str] = None
+    building_match: Optional[str] = None    # address / exact / prefix / fuzzy
+    building_prefix: Optional[str] = None   # search: 이름 앞부분으로 여러 건물 ('온세샤인빌')
+    intent: str = "lookup"                  # lookup (건물 1곳 예측) / search (조건 검색)
+    filters: Dict = field(default_factory=dict)     # deposit_max, monthly_rent_max (원), limit, sort ...
+    words: List[str] = field(default_factory=list)  # 조건으로 안 쓰인 단어 (건물명 후보)
+    alternatives: List[Dict] = field(default_factory=list)   # lookup: 같은 이름의 다른 구 건물
+    search_districts: Tuple[str, ...] = ()  # search: 구를 안 말하면 서비스 구 전체
+    scores: Dict[str, float] = field(default_factory=dict)
+    confidence: float = 0.0
+
+    def to_payload(self) -> Dict:
+        """/nlq -> run_prediction_lookup payload (LLM 이 만드는 것과 같은 모양)"""
+        prop = {"building_name": self.building_name or ""}
+        if self.house_type:
+            prop["house_type"] = self.house_type
+        return {
+            "contract": {"lease_type": self.lease_type or ""},
+            "region": {"district_code": self.district or "", "dong_name": self.dong_name or ""},
+            "property": prop,
+            "db_context": {"district_code": self.district or "", "building_name": self.building_name or ""},
+        }
+
+    def to_listing_query(self) -> ListingQuery:
+        """/nlq search -> 목록 조회 조건 (원 -> 만원)"""
+        f = self.filters
+
+        def man(key: str) -> Optional[float]:
+            return None if f.get(key) is None else f[key] / 10_000
+
+        monthly = self.lease_type == "월세"
+        return ListingQuery(
+            districts=self.search_districts,
+            lease_type=self.lease_type or "",
+            dong_name=self.dong_name,
+            house_type=self.house_type,
+            building_name=None if self.building_prefix else self.building_name,
+            building_prefix=self.building_prefix,
+            deposit_min=man("deposit_min"),
+            deposit_max=man("deposit_max"),
+            monthly_rent_min=man("monthly_rent_min") if monthly else None,
+            monthly_rent_max=man("monthly_rent_max") if monthly else None,
+            limit=f.get("limit") or DEFAULT_NLQ_LIMIT,
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "intent": self.intent,
+            "lease_type": self.lease_type,
+            "district": self.district,
+            "dong_name": self.dong_name,
+            "house_type": self.house_type,
+            "building_name": self.building_name,
+            "building_match": self.building_match,
+            "building_prefix": self.building_prefix,
+            "filters": self.filters,
+            "words": self.words,
+            "alternatives": self.alternatives,
+            "scores": {k: round(v, 3) for k, v in self.scores.items()},
+            "confidence": round(self.confidence, 3),
+        }
+
+
+class NlqRuleParser:
+    """
+    사전 + 정규식으로 NLQ 조건 추출 (DB 조회는 메모리 인덱스만 — 수 ms)
+
+    - 구/동/주택유형/전월세: HOUSE_INFO distinct 값 사전
+    - 금액: 억/천/만/원 ('보증금 1억 이하', '월세 60만원 이하')
+    - 건물: 주소 역색인(번지/도로명) -> 건물명 인덱스(완전/접두사/n-gram) 순
+    - intent: 금액/개수 조건이나 '매물·보여줘·있나' 가 있으면 search (건물 없어도 됨), 아니면 lookup
+    - confidence = min(전월세, 건물, coverage)
+        search 에서 건물명이 없으면 건물 점수 1.0 / coverage = 남은 단어 중 건물명으로 쓰인 비율
+    """
+
+    # 건물명 매칭 종류별 점수
+    EXACT = 1.0
+    AMBIGUOUS_EXACT = 0.9    # lookup: 같은 이름이 여러 구에 — row 많은 쪽 + alternatives
+    UNIQUE_PREFIX = 0.85
+    PREFIX = 0.5
+    FUZZY_WEIGHT = 0.8       # n-gram 점수 × 이 값 (1위와 2위 차이가 작으면 더 깎음)
+
+    def __init__(self, lexicon: NlqLexicon):
+        self.lexicon = lexicon
+
+    def parse(self, prompt: str) -> NlqParse:
+        lx = self.lexicon
+        s = unicodedata.normalize("NFC", prompt or "")
+        s = re.sub(r"^\s*질문\s*:", " ", s)
+        out = NlqParse()
+
+        # 1) 전세/월세 — 둘 다 나오면 애매 ('월세 말고 전세')
+        leases = [t for t in lx.lease_types if t in s]
+        out.lease_type = leases[0] if len(leases) == 1 else None
+        out.scores["lease_type"] = 1.0 if out.lease_type else 0.0
+
+        # 2) 금액 / 개수 / 정렬 (건물명 후보에서 지움)
+        #   같은 조건이 두 번 ('2억 이하 ... 3억 이하') 이거나 억 단위 월세 ('월세 2억' = 보증금?) 면
+        #   규칙으로 확정하지 않음 -> coverage 0 으로 LLM 에 넘김
+        doubtful = False
+
+        def put(label: Optional[str], bound: str, amt: str) -> None:
+            nonlocal doubtful
+            value = parse_amount(amt)
+            if value is None:
+                return
+            kind = "monthly_rent" if label in _RENT_LABELS else "deposit"
+            key = f"{kind}_{bound}"
+            if out.filters.get(key, value) != value or (kind == "monthly_rent" and "억" in amt):
+                doubtful = True
+            out.filters[key] = value
+
+        def amount_range(m: re.Match) -> str:
+            lo, hi = m.group("lo"), m.group("hi")
+            unit = _UNIT_RE.search(hi)
+            if _BARE_NUMBER_RE.fullmatch(lo) and unit:
+                lo += unit.group(0)     # '3~5억' -> 3억 ~ 5억
+            if (parse_amount(lo) or 0) > (parse_amount(hi) or 0):
+                lo, hi = hi, lo
+            put(m.group("label"), "min", lo)
+            put(m.group("label"), "max", hi)
+            return " "
+
+        def amount(m: re.Match) -> str:
+            label, op = m.group("label"), m.group("op")
+            if not label and not op and _BARE_NUMBER_RE.fullmatch(m.group("amt")):
+                return m.group(0)       # 라벨/조건 없는 숫자는 건물명 후보 ('래미안 17')
+            # 조건 없이 금액만 ('보증금 1000') = 예산 -> 상한
+            put(label, "min" if op in ("이상", "초과") else "max", m.group("amt"))
+            return " "
+
+        s = _RANGE_RE.sub(amount_range, s)
+        s = _AMOUNT_RE.sub(amount, s)
+        m = _LIMIT_RE.search(s)
+        if m:
+            out.filters["limit"] = int(m.group(1))
+            s = s[:m.start()] + " " + s[m.end():]
+        if _RECENT_RE.search(s):
+            out.filters["sort"] = "recent"
+        # 정렬만으로는 검색이 아님 ('최근 시세 얼마')
+        search = _SEARCH_RE.search(s) or any(k != "sort" for k in out.filters)
+        out.intent = "search" if search else "lookup"
+
+        # 3) 구 / 동 / 주택유형
+        for name, code in lx.districts.items():
+            if name in s:
+                out.district = code
+                s = s.replace(name, " ")
+        if out.district is None and _ANY_GU_RE.search(s):
+            out.district = "?"      # 서비스 밖 구
+        for m in _DONG_RE.finditer(s):
+            dong = m.group(0)
+            for cand in (dong, re.sub(r"\d+동$", "동", dong)):     # 행정동 -> 법정동
+                districts = lx.dongs.get(cand)
+                if districts and (out.district in (None, *districts)):
+                    out.dong_name = cand
+                    if out.district is None and len(districts) == 1:
+                        out.district = districts[0]
+                    s = s.replace(dong, " ")
+                    break
+            if out.dong_name:
+                break
+        for alias in sorted(lx.house_types, key=len, reverse=True):
+            if alias in s:
+                out.house_type = lx.house_types[alias]
+                s = s.replace(alias, " ")
+                break
+        for t in ("전세", "월세", "반전세"):
+            s = s.replace(t, " ")
+
+        out.words = [
+            w for w in (re.sub(r"[?!.~,]+$", "", w) for w in re.split(r"[\s,]+", s))
+            if w and w not in _STOPWORDS and _PARTICLE_RE.sub("", w) not in _STOPWORDS
+            and not _REQUEST_RE.match(w)
+        ]
+
+        # 4) 건물: 주소가 한 곳으로 정해지면 그걸로, 아니면 남은 단어로 이름 매칭
+        if out.district == "?":
+            out.scores["building"] = out.scores["coverage"] = 0.0
+        else:
+            self._match_building(prompt, out)
+        if doubtful:
+            out.scores["coverage"] = 0.0
+        if out.intent == "search":
+            out.search_districts = (
+                (out.district,) if out.district else tuple(sorted(set(lx.districts.values())))
+            )
+        out.confidence = min(out.scores.values())
+        return out
+
+    # -------------------------------------------------
+    # 건물 매칭
+    # -------------------------------------------------
+    def _match_building(self, prompt: str, out: NlqParse) -> None:
+        """out.building_* / scores['building'] / scores['coverage'] 채움"""
+        resolved = get_address_index().resolve(prompt, limit=1)
+        if resolved["confident"]:
+            top = resolved["items"][0]
+            if out.district in (None, top["district"]):
+                out.district = top["district"]
+                out.dong_name = out.dong_name or top["dong_name"]
+                out.building_name = top["building_name"]
+                out.building_match = "address"
+                out.scores["building"] = out.scores["coverage"] = self.EXACT
+                house_types = {k["house_type"] for k in top["keys"]}
+                if out.house_type is None and len(house_types) == 1:
+                    out.house_type = house_types.pop()
+                return
+
+        search = out.intent == "search"
+        if not out.words:
+            # 조건 검색은 건물 없이도 됨 / 건물 조회는 건물이 있어야 함
+            out.scores["building"] = self.EXACT if search else 0.0
+            out.scores["coverage"] = 1.0
+            return
+
+        best: Optional[Tuple[float, Dict, str, List[Dict], int]] = None
+        for phrase, n in self._phrases(out.words):
+            found = self._score_name(phrase, out.district, search)
+            if found and (best is None or found[0] > best[0]):
+                best = (*found, n)
+            if best and best[0] >= self.EXACT:
+                break
+        # 건물명으로 안 쓰인 단어가 남으면 (모르는 조건) 규칙으로 다 못 읽은 것
+        out.scores["coverage"] = best[-1] / len(out.words) if best else 0.0
+        if best is None:
+            out.scores["building"] = 0.0
+            return
+
+        score, item, match, others, _ = best
+        out.building_match = match
+        out.scores["building"] = score
+        if match == "prefix" and search:
+            out.building_prefix = item["building_name"]
+            return
+        out.building_name = item["building_name"]
+        if search:
+            return      # 이름 조건만 — 구/동은 사용자가 말한 것만 씀
+        out.alternatives = [
+            {k: it[k] for k in ("building_name", "district", "dong_name", "count")} for it in others
+        ]
+        if out.district is None:
+            out.district = item["district"]
+        elif out.district != item["district"]:
+            out.scores["building"] = 0.0
+        if out.dong_name is None:
+            out.dong_name = item["dong_name"]
+
+    @staticmethod
+    def _phrases(words: List[str]) -> List[Tuple[str, int]]:
+        """건물명 후보 (묶음, 단어 수): 이어진 단어 묶음 (긴 것부터, 'e편한세상 2차') + 조사 뗀 형태"""
+        out: List[Tuple[str, int]] = []
+        seen = set()
+        for n in range(min(3, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(words[i:i + n])
+                for p in (phrase, _PARTICLE_RE.sub("", phrase)):
+                    if p and p not in seen:
+                        seen.add(p)
+                        out.append((p, n))
+        return out
+
+    def _score_name(
+        self, phrase: str, district: Optional[str], search: bool = False
+    ) -> Optional[Tuple[float, Dict, str, List[Dict]]]:
+        """(점수, 1위 항목, match, 같은 이름의 다른 항목) — search 의 prefix 는 1위 항목 building_name 이 접두사"""
+        items = get_name_index().suggest(phrase, district=district, limit=5)
+        if not items:
+            return None
+        top = items[0]
+
+        if top["match"] == "exact":
+            exact = [it for it in items if it["match"] == "exact"]
+            if len(exact) == 1 or search:
+                return self.EXACT, top, "exact", []
+            # 구 없이 같은 이름이 여러 구에 — row 많은 쪽으로 조회하고 나머지는 후보로 돌려줌
+            return self.AMBIGUOUS_EXACT, top, "exact", exact[1:]
+        if top["match"] == "prefix":
+            # search: '온세샤인빌' -> 온세샤인빌2, 온세샤인빌24 ... 전부 (글자 단위 접두사일 때만)
+            prefix = phrase.replace(" ", "")
+            if search and len(prefix) >= 2 and top["building_name"].lower().startswith(prefix.lower()):
+                return self.EXACT, dict(top, building_name=top["building_name"][:len(prefix)]), "prefix", []
+            n_prefix = sum(it["match"] == "prefix" for it in items)
+            return (self.UNIQUE_PREFIX if n_prefix == 1 else self.PREFIX * 0.8), top, "prefix", []
+        if top["match"] == "fuzzy":
+            gap = top["score"] - (items[1]["score"] if len(items) > 1 else 0.0)
+            score = top["score"] * self.FUZZY_WEIGHT * (1.0 if gap >= 0.1 else 0.75)
+            return score, top, "fuzzy", []
+        return None
+
+
+# -------------------------------------------------
+# 프로세스 전역 싱글톤 (Lazy)
+#   APP_META.data_version 이 바뀌면 사전을 다시 만듦 (그동안 다른 스레드는 이전 사전 사용)
+# -------------------------------------------------
+_parser = versioned_singleton(lambda: NlqRuleParser(NlqLexicon.load()))
+
+
+def get_nlq_parser() -> NlqRuleParser:
+    return _parser.get()
+
+
+def reset_nlq_parser() -> None:
+    """데이터 갱신 후 다음 조회에서 다시 만들도록 비움"""
+    _parser.reset()
@@ -1,124 +1,284 @@
 # app/services/prediction_lookup.py
-from app.model import HouseInfo
+import re
+
+import numpy as np
+
+from app.services.forecast_stats import summarize
+from app.services.forecast_repository import QUARTERS
+from app.services.forecast_store import get_forecast_store
+from app.services.input_builder import check_schema_version
+from app.services.match_cache import get_match_cache, versioned_key
+from app.services.name_index import BuildingNotFoundError
+
+_YQ_RE = re.compile(r"(?:20)?(\d{2})Q([1-4])")
+
 
 def _norm_yq(yq: str) -> str:
-    return (yq or "").strip().upper().replace(" ", "")
+    """
+    '2025Q1' / '25Q1' / '25q1' -> '2025Q1' (형식이 다르면 그대로 — _col_for 에서 오류)
+    """
+    s = (yq or "").strip().upper().replace(" ", "")
+    m = _YQ_RE.fullmatch(s)
+    return f"20{m.group(1)}Q{m.group(2)}" if m else s
 
 def _col_for(prefix: str, target_yq: str) -> str:
     # prefix: "deposit" or "monthly_rent"
-    # target_yq: "2025Q1"
-    yq = _norm_yq(target_yq)
-    if len(yq) != 6 or yq[4] != "Q":
-        raise ValueError("target_yq must be like 2025Q1")
-    yy = yq[2:4]   # "25"
-    q = yq[-1]     # "1"
+    # target_yq: "2025Q1" / "25Q1" / "25q1"
+    m = _YQ_RE.fullmatch(_norm_yq(target_yq))
+    if not m:
+        raise ValueError("target_yq must be like 2025Q1 or 25q1")
+    yy, q = m.groups()   # "25", "1"
     return f"{prefix}_{yy}q{q}"
 
-def _pick_best_row(rows, lease_type: str, target_yq: str):
+def _pick_best_row(store, idx: np.ndarray, lease_type: str, target_yq: str):
+    """
+    후보 row 인덱스(idx) 중 최적 row 인덱스 반환 (numpy 벡터 스코어링)
+    동점이면 앞쪽(rowid 작은) row 우선 — 기존 sorted(..., reverse=True)[0]과 동일
+    """
     lease_type = (lease_type or "").strip()
-    dep_col = _col_for("deposit", target_yq)
-    mr_col  = _col_for("monthly_rent", target_yq)
+    key = _col_for("deposit", target_yq).split("_")[-1]   # '25q1'
+    if idx.size == 0:
+        return None
 
-    def score(r):
-        dep = getattr(r, dep_col, None)
-        mr  = getattr(r, mr_col, None)
-        s = 0
+    dep = store.quarter_values(idx, "deposit", key)
+    mr = store.quarter_values(idx, "monthly_rent", key)
 
+    # NaN(NULL) 비교는 항상 False → 기존 None 체크와 동일
+    with np.errstate(invalid="ignore"):
         # lease_type 정확 일치 (여기서 이미 필터하지만 안전하게 가산)
-        if getattr(r, "lease_type", None) == lease_type:
-            s += 10000
+        score = np.where(store.meta["lease_type"][idx] == lease_type, 10000, 0)
 
         # 월세면: 해당 분기 월세값이 "양수"인 row 최우선
         if lease_type == "월세":
-            if mr is not None and float(mr) > 0:
-                s += 1000
+            score = score + np.where(mr > 0, 1000, 0)
             # 월세도 보증금이 의미가 있으면 가산
-            if dep is not None and float(dep) >= 0:
-                s += 10
+            score = score + np.where(dep >= 0, 10, 0)
 
         # 전세면: 보증금(전세금)이 양수인 row 우선
         if lease_type == "전세":
-            if dep is not None and float(dep) > 0:
-                s += 1000
+            score = score + np.where(dep > 0, 1000, 0)
 
-        return s
+    return int(idx[int(np.argmax(score))])
 
-    return sorted(rows, key=score, reverse=True)[0] if rows else None
+def _match_inputs(payload: dict):
+    """payload -> (lease_type, district, building_name, house_type, dong_name) 정규화 + 검증"""
+    check_schema_version(payload)   # v1.0 / v1.1 (조회 키는 동일)
 
-def run_prediction_lookup(payload: dict, target_yq: str = "2025Q1") -> dict:
-    target_yq = _norm_yq(target_yq)
+    # 배치에서는 항목별 {"ok": false} 로 돌려줘야 하므로 모양이 틀리면 전부 ValueError
+    sections = {}
+    for name in ("contract", "region", "property", "db_context"):
+        sections[name] = payload.get(name) or {}
+        if not isinstance(sections[name], dict):
+            raise ValueError(f"payload.{name} must be an object")
+
+    def text(*paths) -> str:
+        # 앞쪽 경로 우선 ('region.district_code' 없으면 'db_context.district_code')
+        for path in paths:
+            section, key = path.split(".")
+            value = sections[section].get(key)
+            if value and not isinstance(value, str):
+                raise ValueError(f"payload.{path} must be a string")
+            if value:
+                return value.strip()
+        return ""
 
-    contract = payload.get("contract", {}) or {}
-    lease_type = (contract.get("lease_type") or "").strip()
+    lease_type = text("contract.lease_type")
     if lease_type not in ("전세", "월세"):
         raise ValueError("payload.contract.lease_type must be '전세' or '월세'")
 
-    region = payload.get("region", {}) or {}
-    prop = payload.get("property", {}) or {}
-    dbctx = payload.get("db_context", {}) or {}
-
-    district = (region.get("district_code") or dbctx.get("district_code") or "").strip()
-    building_name = (prop.get("building_name") or dbctx.get("building_name") or "").strip()
-    house_type = (prop.get("house_type") or "").strip()
-    dong_name = (region.get("dong_name") or "").strip()
+    district = text("region.district_code", "db_context.district_code")
+    building_name = text("property.building_name", "db_context.building_name")
+    house_type = text("property.house_type")
+    dong_name = text("region.dong_name")
 
     if not district or not building_name:
         raise ValueError("payload.region.district_code and payload.property.building_name are required")
 
-    # ✅ 1) 후보 rows: lease_type을 WHERE로 강제 (전세 row가 끼는 걸 원천 차단)
-    q = HouseInfo.query.filter(
-        HouseInfo.district == district,
-        HouseInfo.building_name == building_name,
-    )
+    return lease_type, district, building_name, house_type, dong_name
+
+
+def _candidates(store, district: str, building_name: str, house_type: str, dong_name: str) -> np.ndarray:
+    # ✅ 1) 후보 rows: district + building_name (메모리 인덱스), house_type/dong_name은 마스크로 좁힘
+    base = store.candidates(building_name, district)
+    idx = base
 
     if house_type:
-        q = q.filter(HouseInfo.house_type == house_type)
+        idx = idx[store.meta["house_type"][idx] == house_type]
     if dong_name:
-        q = q.filter(HouseInfo.dong_name == dong_name)
-
-    rows = q.all()
+        idx = idx[store.meta["dong_name"][idx] == dong_name]
 
     # 너무 좁혀서 rows가 0이면, house_type/dong_name 조건을 풀고 다시 검색
-    if not rows:
-        q2 = HouseInfo.query.filter(
-            HouseInfo.district == district,
-            HouseInfo.building_name == building_name,
-        )
-        rows = q2.all()
+    if idx.size == 0:
+        idx = base
+
+    if idx.size == 0:
+        raise BuildingNotFoundError("No matching rows found in DB for building/district", building_name, district)
 
-    if not rows:
-        raise ValueError("No matching rows found in DB for building/district")
+    return idx
 
-    # ✅ 2) 같은 lease_type 내에서도 월세=0 같은 row 피하려면 스코어링
-    chosen = _pick_best_row(rows, lease_type=lease_type, target_yq=target_yq)
-    if chosen is None:
-        raise ValueError("No usable row found after scoring")
 
+def _resolve_candidates(store, payload: dict):
+    """payload -> (lease_type, 후보 row 인덱스) / 매칭 실패면 ValueError"""
+    lease_type, *match = _match_inputs(payload)
+    return lease_type, _candidates(store, *match)
+
+
+def _build_result(store, chosen: int, lease_type: str, target_yq: str) -> dict:
     # 3) 컬럼 결정
     dep_col = _col_for("deposit", target_yq)
     mr_col  = _col_for("monthly_rent", target_yq)
+    key = dep_col.split("_")[-1]
 
-    dep_val = getattr(chosen, dep_col, None)
-    mr_val  = getattr(chosen, mr_col, None)
+    dep_val = store.value(chosen, "deposit", key)
+    mr_val  = store.value(chosen, "monthly_rent", key)
+    selected_lease_type = store.meta["lease_type"][chosen]
 
     # 4) 반환 규칙
     if lease_type == "전세":
         return {
             "lease_type": "전세",
             "target_yq": target_yq,
+            "column": dep_col,          # 예전 ml_model 응답 호환 (= deposit_column)
             "deposit_column": dep_col,
-            "predicted_deposit_krw": float(dep_val) if dep_val is not None else None,
-            "selected_rowid": getattr(chosen, "id", None) or getattr(chosen, "rowid", None),
-            "selected_lease_type": getattr(chosen, "lease_type", None),
+            "predicted_deposit_krw": dep_val,
+            "selected_rowid": store.rowid(chosen),
+            "selected_lease_type": selected_lease_type,
         }
 
     return {
         "lease_type": "월세",
         "target_yq": target_yq,
+        "column": mr_col,               # 예전 ml_model 응답 호환 (= monthly_rent_column)
         "deposit_column": dep_col,
         "monthly_rent_column": mr_col,
-        "predicted_deposit_krw": float(dep_val) if dep_val is not None else None,
-        "predicted_monthly_rent_krw": float(mr_val) if mr_val is not None else None,
-        "selected_rowid": getattr(chosen, "id", None) or getattr(chosen, "rowid", None),
-        "selected_lease_type": getattr(chosen, "lease_type", None),
+        "predicted_deposit_krw": dep_val,
+        "predicted_monthly_rent_krw": mr_val,
+        "selected_rowid": store.rowid(chosen),
+        "selected_lease_type": selected_lease_type,
+    }
+
+
+def run_prediction_lookup(payload: dict, target_yq: str = "2025Q1") -> dict:
+    target_yq = _norm_yq(target_yq)
+    store = get_forecast_store()
+
+    lease_type, *match = _match_inputs(payload)
+
+    def pick():
+        idx = _candidates(store, *match)
+        # ✅ 2) 같은 lease_type 내에서도 월세=0 같은 row 피하려면 스코어링
+        chosen = _pick_best_row(store, idx, lease_type=lease_type, target_yq=target_yq)
+        if chosen is None:
+            raise ValueError("No usable row found after scoring")
+        return chosen
+
+    # 같은 건물/조건/분기 반복 요청은 선택 row를 메모이즈 (저장소가 다시 적재되면 id가 바뀌어 무효)
+    key = versioned_key(id(store), lease_type, *match, target_yq)
+    chosen = get_match_cache("prediction_lookup.pick").get_or_set(key, pick)
+
+    return _build_result(store, chosen, lease_type, target_yq)
+
+
+# -------------------------------------------------
+# 배치 조회 (/predict/run-batch)
+#   payload 여러 개 × 분기 여러 개를 한 번에 스코어링
+# -------------------------------------------------
+def _pick_best_rows(store, groups, lease_types, target_yqs) -> np.ndarray:
+    """
+    _pick_best_row를 (payload 그룹 × 분기) 전체에 한 번에 적용
+
+    groups: payload별 후보 row 인덱스 배열 (각각 1개 이상)
+    반환: (그룹 수, 분기 수) 선택 row 인덱스 — 그룹 안 동점은 앞쪽 우선 (단건과 동일)
+    """
+    keys = [_col_for("deposit", yq).split("_")[-1] for yq in target_yqs]
+
+    sizes = np.fromiter((g.size for g in groups), dtype=np.int64, count=len(groups))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    cand = np.concatenate(groups)                                   # (C,)
+    lease = np.repeat(np.asarray(lease_types, dtype=object), sizes)  # 후보별 요청 lease_type
+
+    dep = np.stack([store.quarter_values(cand, "deposit", k) for k in keys], axis=1)       # (C, Q)
+    mr = np.stack([store.quarter_values(cand, "monthly_rent", k) for k in keys], axis=1)
+
+    is_monthly = (lease == "월세")[:, None]
+    is_jeonse = (lease == "전세")[:, None]
+
+    with np.errstate(invalid="ignore"):
+        score = np.where(store.meta["lease_type"][cand] == lease, 10000, 0)[:, None]
+        score = score + np.where(is_monthly & (mr > 0), 1000, 0)
+        score = score + np.where(is_monthly & (dep >= 0), 10, 0)
+        score = score + np.where(is_jeonse & (dep > 0), 1000, 0)
+
+    # 그룹별 최대값 -> 최대값인 후보 중 가장 앞 위치
+    best = np.maximum.reduceat(score, starts, axis=0)                # (G, Q)
+    pos = np.arange(cand.size)[:, None]
+    hit = np.where(score == np.repeat(best, sizes, axis=0), pos, cand.size)
+    first = np.minimum.reduceat(hit, starts, axis=0)
+    return cand[first]
+
+
+def run_prediction_batch(payloads, target_yqs) -> list:
+    """
+    payload 목록 × 분기 목록 조회, 입력 순서대로
+      성공: {"index": i, "ok": True, "results": {"2025Q1": {...run_prediction_lookup 결과...}, ...}}
+      실패: {"index": i, "ok": False, "error": "..."}
+    """
+    target_yqs = [_norm_yq(yq) for yq in target_yqs]
+    for yq in target_yqs:
+        _col_for("deposit", yq)   # 형식 검증 (잘못되면 전체 요청 오류)
+
+    store = get_forecast_store()
+
+    out = [None] * len(payloads)
+    ok_pos, groups, lease_types = [], [], []
+    for i, payload in enumerate(payloads):
+        try:
+            if not isinstance(payload, dict):
+                raise ValueError("payload must be an object")
+            lease_type, idx = _resolve_candidates(store, payload)
+        except ValueError as e:
+            out[i] = {"index": i, "ok": False, "error": str(e)}
+            continue
+        ok_pos.append(i)
+        groups.append(idx)
+        lease_types.append(lease_type)
+
+    if groups and target_yqs:
+        chosen = _pick_best_rows(store, groups, lease_types, target_yqs)
+        for g, i in enumerate(ok_pos):
+            out[i] = {
+                "index": i,
+                "ok": True,
+                "results": {
+                    yq: _build_result(store, int(chosen[g, q]), lease_types[g], yq)
+                    for q, yq in enumerate(target_yqs)
+                },
+            }
+    else:
+        for i in ok_pos:
+            out[i] = {"index": i, "ok": True, "results": {}}
+
+    return out
+
+
+# -------------------------------------------------
+# 전체 예측 구간 궤적 (/predict/trajectory)
+#   2025Q1~2030Q4를 한 번에: 분기별 /predict/run 24번과 같은 row 선택
+# -------------------------------------------------
+def run_prediction_trajectory(payload: dict) -> dict:
+    store = get_forecast_store()
+    lease_type, idx = _resolve_candidates(store, payload)
+
+    # 분기마다 스코어링 결과가 다를 수 있어서 분기별 선택 row (24,)
+    chosen = _pick_best_rows(store, [idx], [lease_type], QUARTERS)[0]
+    cols = np.arange(len(QUARTERS))
+
+    out = {
+        "lease_type": lease_type,
+        "quarters": list(QUARTERS),
+        "selected_rowids": [store.rowid(i) for i in chosen],
+        "deposit": summarize(store.matrix("deposit")[chosen, cols], QUARTERS),
     }
+    if lease_type == "월세":
+        out["monthly_rent"] = summarize(store.matrix("monthly_rent")[chosen, cols], QUARTERS)
+    return out
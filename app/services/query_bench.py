@@ -0,0 +1,119 @@
+# app/services/query_bench.py
+from __future__ import annotations
+
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import create_engine, event
+
+from app.services.forecast_repository import FORECAST_COLUMNS, FORECAST_TABLE, HOUSE_KEY_SQL, has_forecast_table
+from app.services.query_plans import production_queries
+from app.snapshots import current_db_path
+from app.sqlite_tuning import apply_pragmas, pragma_items
+
+
+@dataclass
+class BenchResult:
+    name: str
+    profile: str
+    median_ms: float
+    p95_ms: float
+    rows: int
+
+
+def bench_queries() -> List[Tuple[str, str, Sequence[Any]]]:
+    """
+    벤치마크 대상 = 운영 쿼리 (query_plans와 같은 빌더)
+    + /predict/run 이 쓰는 예측 저장소 적재 쿼리 (프로세스당 1회지만 가장 무거운 읽기)
+    """
+    out = [(c.name, c.sql, c.params) for c in production_queries()]
+
+    if has_forecast_table():
+        out.append(("forecast_store.load", f"SELECT house_key, metric, yq, value FROM {FORECAST_TABLE}", ()))
+    else:
+        cols = FORECAST_COLUMNS["deposit"] + FORECAST_COLUMNS["monthly_rent"]
+        out.append((
+            "forecast_store.load",
+            f"SELECT rowid, {HOUSE_KEY_SQL}, {', '.join(cols)} FROM HOUSE_INFO ORDER BY rowid",
+            (),
+        ))
+    return out
+
+
+def _engine(uri: str, tuned: bool):
+    engine = create_engine(uri)
+    if tuned:
+        items = pragma_items(current_app.config)
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_conn, connection_record):
+            apply_pragmas(dbapi_conn, items)
+    return engine
+
+
+def run_benchmark(repeat: int = 50) -> List[BenchResult]:
+    """
+    같은 쿼리를 'default'(SQLite 기본 PRAGMA) / 'tuned'(Config.SQLITE_PRAGMAS) 엔진에서 반복 실행
+    두 프로필을 번갈아 실행해서 시간에 따른 노이즈(CPU 클럭, 다른 프로세스)가 한쪽에 몰리지 않게 함
+
+    journal_mode 는 DB 파일에 저장되는 값이라 두 프로필이 같은 모드로 읽음
+    (벤치마크가 DB 파일 설정을 바꾸지 않도록 일부러 건드리지 않음)
+    """
+    uri = f"sqlite:///{current_db_path()}"
+    queries = bench_queries()
+    profiles = (("default", False), ("tuned", True))
+
+    engines = {name: _engine(uri, tuned) for name, tuned in profiles}
+    results: List[BenchResult] = []
+    try:
+        conns = {name: engine.connect() for name, engine in engines.items()}
+        for name, sql, params in queries:
+            samples: Dict[str, List[float]] = {p: [] for p in conns}
+            rows = 0
+            for conn in conns.values():
+                conn.exec_driver_sql(sql, tuple(params)).fetchall()   # 워밍업 (페이지 캐시/statement 준비)
+            for _ in range(repeat):
+                for profile, conn in conns.items():
+                    t0 = time.perf_counter()
+                    rows = len(conn.exec_driver_sql(sql, tuple(params)).fetchall())
+                    samples[profile].append((time.perf_counter() - t0) * 1000)
+
+            for profile, xs in samples.items():
+                xs.sort()
+                results.append(BenchResult(
+                    name=name,
+                    profile=profile,
+                    median_ms=statistics.median(xs),
+                    p95_ms=xs[min(len(xs) - 1, int(len(xs) * 0.95))],
+                    rows=rows,
+                ))
+        for conn in conns.values():
+            conn.close()
+    finally:
+        for engine in engines.values():
+            engine.dispose()
+    return results
+
+
+def compare(results: Sequence[BenchResult]) -> List[Dict[str, Any]]:
+    """쿼리별 default vs tuned 나란히"""
+    by_key = {(r.name, r.profile): r for r in results}
+    names = list(dict.fromkeys(r.name for r in results))
+    rows = []
+    for name in names:
+        d, t = by_key.get((name, "default")), by_key.get((name, "tuned"))
+        if d is None or t is None:
+            continue
+        rows.append({
+            "name": name,
+            "rows": t.rows,
+            "default_ms": d.median_ms,
+            "tuned_ms": t.median_ms,
+            "default_p95_ms": d.p95_ms,
+            "tuned_p95_ms": t.p95_ms,
+            "speedup": (d.median_ms / t.median_ms) if t.median_ms else None,
+        })
+    return rows
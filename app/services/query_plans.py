@@ -0,0 +1,152 @@
+# app/services/query_plans.py
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app import db
+from app.services.forecast_cube import CUBE_TABLE, build_cube_query, has_cube_table
+from app.services.forecast_repository import FORECAST_TABLE, QUARTERS, has_forecast_table
+from app.services.house_search import (
+    ListingQuery,
+    SearchFilter,
+    build_cluster_queries,
+    build_listing_query,
+    build_nlq_listing_query,
+    build_page_query,
+    encode_cursor,
+)
+from app.services.input_builder import _build_match_sql
+
+
+# 풀 스캔이 나오면 안 되는 테이블
+WATCHED_TABLES = ("HOUSE_INFO", FORECAST_TABLE, CUBE_TABLE)
+
+# 'SCAN HOUSE_INFO' (3.36+) / 'SCAN TABLE HOUSE_INFO' (구버전)
+# 'SCAN HOUSE_INFO USING INDEX ...' 같은 인덱스 스캔은 허용
+_FULL_SCAN_RE = re.compile(
+    r"^SCAN (?:TABLE )?(?P<table>\w+)(?:\s+AS\s+\w+)?\s*$"
+)
+
+# 'SEARCH HOUSE_INFO USING INDEX ...' (커버링이면 'USING COVERING INDEX')
+_INDEX_READ_RE = re.compile(
+    r"^(?:SEARCH|SCAN) (?:TABLE )?(?P<table>\w+)(?:\s+AS\s+\w+)?\s+USING (?P<covering>COVERING )?INDEX"
+)
+
+
+# text() 바인드 파라미터 (:name)
+_NAMED_RE = re.compile(r":(\w+)")
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    sql: str
+    params: Sequence[Any] = ()
+    covering: bool = False      # True 면 HOUSE_INFO 를 인덱스만으로 읽어야 함 (테이블 row 조회 X)
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+    row_lookups: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.full_scans and not self.row_lookups
+
+
+def _compile(query) -> str:
+    # ORM Query / Core select 둘 다
+    stmt = getattr(query, "statement", query).compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    return str(stmt)
+
+
+def _qmark(sql: str, params: Dict[str, Any]) -> Tuple[str, Tuple[Any, ...]]:
+    # text() 스타일 :name -> exec_driver_sql 용 ? + 순서대로 값
+    names = _NAMED_RE.findall(sql)
+    return _NAMED_RE.sub("?", sql), tuple(params[n] for n in names)
+
+
+def production_queries() -> List[PlanCheck]:
+    """운영 코드와 같은 빌더로 만든 쿼리 목록"""
+    checks: List[PlanCheck] = []
+
+    # 1) /predict/search 목록 (층 구간별로 WHERE 모양이 달라짐)
+    for floor in ("all", "basement", "low", "mid", "high"):
+        f = SearchFilter(gu="eunpyeong", house_type="빌라", lease_type="월세", area="10-19", floor=floor)
+        checks.append(PlanCheck(f"predict_search[floor={floor}]", _compile(build_listing_query(f))))
+
+    # 1-1) /predict/api/search 키셋 페이지 (첫 페이지 / 다음 페이지)
+    f = SearchFilter(gu="eunpyeong", house_type="빌라", lease_type="월세", area="10-19", floor="all")
+    checks.append(PlanCheck("api_search[first]", _compile(build_page_query(f, limit=200))))
+    checks.append(PlanCheck(
+        "api_search[after]",
+        _compile(build_page_query(f, after=encode_cursor(40.0, 3, 1000), limit=200)),
+    ))
+
+    # 1-2) /predict/api/clusters 동 단위 집계 (ix_house_info_search 커버링)
+    #   목록/매칭 쿼리는 컬럼이 많아서 (사실상 테이블 사본) 커버링 대상 아님 — 페이지 크기만큼만 row 조회
+    for name, q in zip(("summary", "median_deposit", "median_monthly"), build_cluster_queries(f)):
+        checks.append(PlanCheck(f"api_clusters[{name}]", _compile(q), covering=True))
+
+    # 1-3) /nlq 조건 검색 (구 IN + 전월세 + 금액 / 건물명 / 건물명 접두사)
+    q = ListingQuery(districts=("eunpyeong", "guro"), lease_type="월세", deposit_max=5000.0, monthly_rent_max=60.0)
+    checks.append(PlanCheck("nlq_search", _compile(build_nlq_listing_query(q))))
+    q = ListingQuery(districts=("eunpyeong", "guro"), lease_type="전세", building_name="샘플빌")
+    checks.append(PlanCheck("nlq_search[building_name]", _compile(build_nlq_listing_query(q))))
+    q = ListingQuery(districts=("eunpyeong", "guro"), lease_type="전세", building_prefix="샘플빌")
+    checks.append(PlanCheck("nlq_search[building_prefix]", _compile(build_nlq_listing_query(q))))
+
+    # 2) input_builder 매칭 (building_name 유무)
+    cols = ["building_name", "area_m2", "recent_yq"]
+    checks.append(PlanCheck(
+        "input_builder.match",
+        _build_match_sql(cols, with_building=False),
+        ("eunpyeong", "불광동", "빌라"),
+    ))
+    checks.append(PlanCheck(
+        "input_builder.match[building_name]",
+        _build_match_sql(cols, with_building=True),
+        ("eunpyeong", "불광동", "빌라", "샘플빌"),
+    ))
+
+    # 3) forecast_repository.fetch_forecasts (롱 포맷 테이블이 있을 때만)
+    if has_forecast_table():
+        checks.append(PlanCheck(
+            "forecast_repository.fetch_forecasts",
+            f"SELECT house_key, metric, yq, value FROM {FORECAST_TABLE} "
+            f"WHERE house_key IN (?, ?) AND metric IN (?, ?) AND yq IN (?)",
+            ("k1", "k2", "deposit", "monthly_rent", QUARTERS[0]),
+        ))
+
+    # 4) /predict/api/market-summary (집계 테이블이 있을 때만)
+    if has_cube_table():
+        sql, params = build_cube_query("eunpyeong", "불광동", quarters=[QUARTERS[6]])
+        checks.append(PlanCheck("forecast_cube.query", *_qmark(sql, params)))
+        sql, params = build_cube_query("eunpyeong")
+        checks.append(PlanCheck("forecast_cube.query[rollup]", *_qmark(sql, params)))
+
+    return checks
+
+
+def explain(sql: str, params: Sequence[Any] = ()) -> List[str]:
+    conn = db.session.connection()
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", tuple(params)).fetchall()
+    # (id, parent, notused, detail)
+    return [r[-1] for r in rows]
+
+
+def run_plan_checks() -> List[PlanCheck]:
+    checks = production_queries()
+    for c in checks:
+        c.plan = explain(c.sql, c.params)
+        for detail in c.plan:
+            m = _FULL_SCAN_RE.match(detail.strip())
+            if m and m.group("table") in WATCHED_TABLES:
+                c.full_scans.append(detail)
+            m = _INDEX_READ_RE.match(detail.strip())
+            if c.covering and m and m.group("table") == "HOUSE_INFO" and not m.group("covering"):
+                c.row_lookups.append(detail)
+    return checks
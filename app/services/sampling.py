@@ -0,0 +1,119 @@
+# app/services/sampling.py
+from __future__ import annotations
+
+import random
+from typing import List, Optional, Sequence
+
+from sqlalchemy import text
+
+from app import db
+
+
+# 후보 rowid를 필요한 개수보다 넉넉히 뽑아서 한 번에 조회 (rowid 구멍 대비)
+_OVERSAMPLE = 2
+_MAX_ROUNDS = 4
+
+
+def _rowid_bounds(table: str):
+    # min/max(rowid)는 B-tree 양 끝만 보므로 테이블 크기와 무관
+    return db.session.execute(text(f"SELECT min(rowid), max(rowid) FROM {table}")).first()
+
+
+def _existing(table: str, candidates: Sequence[int]) -> List[int]:
+    if not candidates:
+        return []
+    names = [f"r{i}" for i in range(len(candidates))]
+    rows = db.session.execute(
+        text(f"SELECT rowid FROM {table} WHERE rowid IN ({', '.join(':' + n for n in names)})"),
+        dict(zip(names, candidates)),
+    )
+    return [r[0] for r in rows]
+
+
+def _successor(table: str, rowid: int, wrap_to: int) -> Optional[int]:
+    # rowid 이상 첫 row (끝을 넘으면 처음부터)
+    for start in (rowid, wrap_to):
+        row = db.session.execute(
+            text(f"SELECT rowid FROM {table} WHERE rowid >= :r ORDER BY rowid LIMIT 1"),
+            {"r": start},
+        ).first()
+        if row is not None:
+            return row[0]
+    return None
+
+
+def sample_rowids(table: str, k: int, rng: Optional[random.Random] = None) -> List[int]:
+    """
+    테이블에서 중복 없이 무작위 rowid k개 (ORDER BY random() 없이)
+
+    1) [min(rowid), max(rowid)] 구간에서 후보를 뽑아 rowid IN (...)으로 존재 확인
+    2) 삭제 등으로 구멍이 많아 모자라면 '다음 rowid' 조회로 채움
+    -> 조회 비용은 O(k log n), 테이블 전체 정렬 없음
+    """
+    rng = rng or random
+    if k <= 0:
+        return []
+
+    lo, hi = _rowid_bounds(table)
+    if lo is None:
+        return []
+
+    span = hi - lo + 1
+    if span <= k:
+        ids = [r[0] for r in db.session.execute(text(f"SELECT rowid FROM {table}"))]
+        rng.shuffle(ids)
+        return ids[:k]
+
+    picked: List[int] = []
+    seen = set()
+    for _ in range(_MAX_ROUNDS):
+        need = k - len(picked)
+        if need <= 0:
+            break
+        n_draw = min(need * _OVERSAMPLE, span - len(seen))
+        if n_draw <= 0:
+            break
+        candidates = []
+        while len(candidates) < n_draw:
+            r = rng.randint(lo, hi)
+            if r not in seen:
+                seen.add(r)
+                candidates.append(r)
+        found = _existing(table, candidates)
+        rng.shuffle(found)
+        picked.extend(found[:need])
+
+    # 구멍이 많은 테이블: 남은 개수는 후속 rowid로
+    chosen = set(picked)
+    tries = 0
+    while len(picked) < k and tries < k * _OVERSAMPLE:
+        tries += 1
+        r = _successor(table, rng.randint(lo, hi), lo)
+        if r is not None and r not in chosen:
+            chosen.add(r)
+            picked.append(r)
+
+    # 그래도 모자라면 (극단적으로 듬성듬성한 테이블) 남은 개수만 DB에서 무작위로
+    need = k - len(picked)
+    if need > 0:
+        names = [f"c{i}" for i in range(len(picked))]
+        not_in = f"WHERE rowid NOT IN ({', '.join(':' + n for n in names)}) " if names else ""
+        rows = db.session.execute(
+            text(f"SELECT rowid FROM {table} {not_in}ORDER BY random() LIMIT :need"),
+            {**dict(zip(names, picked)), "need": need},
+        )
+        picked.extend(r[0] for r in rows)
+
+    return picked
+
+
+def sample_rows(model, k: int, rng: Optional[random.Random] = None) -> list:
+    """ORM 모델 무작위 k개 (뽑힌 순서 유지)"""
+    table = model.__tablename__
+    ids = sample_rowids(table, k, rng)
+    if not ids:
+        return []
+
+    rowid = db.literal_column(f"{table}.rowid")
+    by_id = {rid: obj for obj, rid in db.session.query(model, rowid).filter(rowid.in_(ids))}
+    return [by_id[r] for r in ids if r in by_id]
@@ -0,0 +1,288 @@
+# app/services/spatial_index.py
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app import db
+from app.services.data_version import versioned_singleton
+from app.services.house_search import (
+    ROWID,
+    SearchFilter,
+    area_range_m2,
+    build_listing_base_query,
+    floor_range,
+)
+
+
+# 격자 한 칸 크기 (도 단위, 위도 0.005° ≈ 550m / 서울 경도 0.005° ≈ 440m)
+CELL_DEG = 0.005
+
+EARTH_RADIUS_M = 6_371_000.0
+
+# 필터에 쓰는 범주형 컬럼 (정수 코드로 들고 있음)
+_CATEGORY_COLUMNS = ("district", "house_type", "lease_type")
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """두 좌표 사이 거리(m), numpy 배열도 그대로 받음"""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    HOUSE_INFO 좌표 위 균일 격자 인덱스 (읽기 전용, 프로세스 메모리).
+
+    - 좌표 있는 row만 셀 번호(iy * nx + ix) 순으로 정렬해 둠
+    - 같은 셀 줄(iy)은 ix가 연속이라 bbox 한 줄당 searchsorted 2번으로 범위가 나옴
+    - 검색 조건(구/유형/거래/면적/층)은 후보에 numpy 마스크로 적용
+    """
+
+    def __init__(
+        self,
+        rowids: np.ndarray,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        categories: Dict[str, np.ndarray],
+        area_m2: np.ndarray,
+        floor: np.ndarray,
+        cell_deg: float = CELL_DEG,
+    ):
+        self.cell_deg = cell_deg
+
+        n = len(rowids)
+        if n:
+            self.lat0 = float(lat.min())
+            self.lng0 = float(lng.min())
+            self.nx = int((lng.max() - self.lng0) // cell_deg) + 1
+            self.ny = int((lat.max() - self.lat0) // cell_deg) + 1
+        else:
+            self.lat0 = self.lng0 = 0.0
+            self.nx = self.ny = 0
+
+        cells = self._cell_of(lat, lng) if n else np.empty(0, dtype=np.int64)
+        order = np.argsort(cells, kind="stable")  # 같은 셀 안에서는 rowid 순
+
+        self.cells = cells[order]
+        self.rowids = rowids[order]
+        self.lat = lat[order]
+        self.lng = lng[order]
+        self.area_m2 = area_m2[order]
+        self.floor = floor[order]
+
+        # 범주형: 값 -> 코드 사전 + 코드 배열
+        self._codes: Dict[str, np.ndarray] = {}
+        self._vocab: Dict[str, Dict[str, int]] = {}
+        for col, values in categories.items():
+            uniq, inv = np.unique(values[order].astype(str), return_inverse=True)
+            self._vocab[col] = {v: i for i, v in enumerate(uniq)}
+            self._codes[col] = inv.astype(np.int32)
+
+    @classmethod
+    def load(cls) -> "SpatialIndex":
+        cols = ", ".join(_CATEGORY_COLUMNS)
+        rows = db.session.execute(text(
+            f"SELECT rowid, latitude, longitude, {cols}, area_m2, floor FROM HOUSE_INFO "
+            f"WHERE latitude IS NOT NULL AND longitude IS NOT NULL ORDER BY rowid"
+        )).fetchall()
+
+        n_cat = len(_CATEGORY_COLUMNS)
+        rowids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        lat = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        lng = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+        categories = {
+            c: np.array([r[3 + j] or "" for r in rows], dtype=object)
+            for j, c in enumerate(_CATEGORY_COLUMNS)
+        }
+        area_m2 = np.array([r[3 + n_cat] for r in rows], dtype=np.float64)
+        floor = np.array([r[4 + n_cat] for r in rows], dtype=np.float64)
+
+        return cls(rowids, lat, lng, categories, area_m2, floor)
+
+    def __len__(self) -> int:
+        return int(self.rowids.shape[0])
+
+    # -------------------------------------------------
+    # 격자
+    # -------------------------------------------------
+    def _ix(self, lng):
+        return np.floor((np.asarray(lng) - self.lng0) / self.cell_deg).astype(np.int64)
+
+    def _iy(self, lat):
+        return np.floor((np.asarray(lat) - self.lat0) / self.cell_deg).astype(np.int64)
+
+    def _cell_of(self, lat, lng) -> np.ndarray:
+        return self._iy(lat) * self.nx + self._ix(lng)
+
+    def _positions_in_cells(self, ix0: int, ix1: int, iy0: int, iy1: int) -> np.ndarray:
+        """셀 사각형 [ix0..ix1] × [iy0..iy1] 안의 row 위치 (격자 밖은 잘라냄)"""
+        ix0, ix1 = max(ix0, 0), min(ix1, self.nx - 1)
+        iy0, iy1 = max(iy0, 0), min(iy1, self.ny - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+
+        rows_y = np.arange(iy0, iy1 + 1, dtype=np.int64) * self.nx
+        starts = np.searchsorted(self.cells, rows_y + ix0, side="left")
+        ends = np.searchsorted(self.cells, rows_y + ix1, side="right")
+        parts = [np.arange(s, e, dtype=np.int64) for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    # -------------------------------------------------
+    # 필터
+    # -------------------------------------------------
+    def _filter_mask(self, pos: np.ndarray, f: Optional[SearchFilter]) -> np.ndarray:
+        mask = np.ones(len(pos), dtype=bool)
+        if f is None or not len(pos):
+            return mask
+
+        for col, value in (("district", f.gu), ("house_type", f.house_type), ("lease_type", f.lease_type)):
+            code = self._vocab[col].get(value)
+            if code is None:
+                return np.zeros(len(pos), dtype=bool)
+            mask &= self._codes[col][pos] == code
+
+        area = area_range_m2(f)
+        if area is not None:
+            a = self.area_m2[pos]
+            mask &= (a >= area[0]) & (a <= area[1])
+
+        floors = floor_range(f)
+        if floors is not None:
+            lo, hi = floors
+            fl = self.floor[pos]
+            if lo is not None:
+                mask &= fl >= lo
+            if hi is not None:
+                mask &= fl <= hi
+
+        return mask
+
+    # -------------------------------------------------
+    # 조회
+    # -------------------------------------------------
+    def bbox(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        f: Optional[SearchFilter] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[np.ndarray, int]:
+        """
+        viewport 안 매물 rowid (bbox 중심에서 가까운 순), 전체 건수
+        limit을 넘으면 중심에서 먼 쪽부터 잘림
+        """
+        if not len(self) or south > north or west > east:
+            return np.empty(0, dtype=np.int64), 0
+
+        pos = self._positions_in_cells(
+            int(self._ix(west)), int(self._ix(east)), int(self._iy(south)), int(self._iy(north))
+        )
+        lat, lng = self.lat[pos], self.lng[pos]
+        inside = (lat >= south) & (lat <= north) & (lng >= west) & (lng <= east)
+        pos = pos[inside & self._filter_mask(pos, f)]
+        total = len(pos)
+
+        dist = haversine_m((south + north) / 2, (west + east) / 2, self.lat[pos], self.lng[pos])
+        order = np.lexsort((self.rowids[pos], dist))
+        if limit is not None:
+            order = order[:limit]
+        return self.rowids[pos[order]], total
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        f: Optional[SearchFilter] = None,
+        max_distance_m: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (lat, lng) 주변 k개 (rowid, 거리 m), 가까운 순
+
+        점이 있는 셀에서 한 칸씩 링을 넓혀 가다가
+        k번째 거리가 '지금까지 확실히 훑은 반경' 안에 들어오면 멈춤
+        """
+        if not len(self) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        cx, cy = int(self._ix(lng)), int(self._iy(lat))
+        # 셀 한 칸이 보장하는 최소 거리 (경도 방향이 더 짧음)
+        cell_m = self.cell_deg * math.pi / 180 * EARTH_RADIUS_M * math.cos(math.radians(min(abs(lat), 89.0)))
+        # 격자 밖의 점이면 격자에 처음 닿는 링부터 (안쪽 링은 어차피 비어 있음)
+        r = max(0, -cx, cx - (self.nx - 1), -cy, cy - (self.ny - 1))
+        max_ring = max(abs(cx), abs(cx - (self.nx - 1)), abs(cy), abs(cy - (self.ny - 1)))
+
+        seen: List[np.ndarray] = []
+        while True:
+            if r == 0:
+                ring = self._positions_in_cells(cx, cx, cy, cy)
+            else:
+                # 링 테두리만: 윗줄/아랫줄 + 좌우 세로줄
+                ring = np.concatenate([
+                    self._positions_in_cells(cx - r, cx + r, cy + r, cy + r),
+                    self._positions_in_cells(cx - r, cx + r, cy - r, cy - r),
+                    self._positions_in_cells(cx - r, cx - r, cy - r + 1, cy + r - 1),
+                    self._positions_in_cells(cx + r, cx + r, cy - r + 1, cy + r - 1),
+                ])
+            if len(ring):
+                seen.append(ring[self._filter_mask(ring, f)])
+
+            covered_m = r * cell_m
+            pos = np.concatenate(seen) if seen else np.empty(0, dtype=np.int64)
+            done = r >= max_ring
+            if max_distance_m is not None and covered_m >= max_distance_m:
+                done = True
+            if len(pos) >= k:
+                dist = haversine_m(lat, lng, self.lat[pos], self.lng[pos])
+                if np.partition(dist, k - 1)[k - 1] <= covered_m:
+                    done = True
+            if done:
+                break
+            r += 1
+
+        dist = haversine_m(lat, lng, self.lat[pos], self.lng[pos])
+        if max_distance_m is not None:
+            keep = dist <= max_distance_m
+            pos, dist = pos[keep], dist[keep]
+        order = np.lexsort((self.rowids[pos], dist))[:k]
+        return self.rowids[pos[order]], dist[order]
+
+
+# -------------------------------------------------
+# rowid -> 목록 row (순서 유지)
+# -------------------------------------------------
+def fetch_listings_by_rowid(rowids: Sequence[int]) -> list:
+    """rowid 순서 그대로 목록 컬럼 row 반환 (rowid 조회라 별도 인덱스 불필요)"""
+    ids = [int(r) for r in rowids]
+    by_id = {}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        for row in build_listing_base_query().add_columns(ROWID.label("rid")).filter(ROWID.in_(chunk)):
+            by_id[row.rid] = row
+    return [by_id[r] for r in ids if r in by_id]
+
+
+# -------------------------------------------------
+# 프로세스 전역 싱글톤 (Lazy)
+#   APP_META.data_version 이 바뀌면 다시 만듦 (그동안 다른 스레드는 이전 인덱스 사용)
+# -------------------------------------------------
+_index = versioned_singleton(SpatialIndex.load)
+
+
+def get_spatial_index() -> SpatialIndex:
+    return _index.get()
+
+
+def reset_spatial_index() -> None:
+    """데이터 갱신 후 다음 조회에서 다시 만들도록 비움"""
+    _index.reset()
@@ -0,0 +1,146 @@
+# app/services/sqlite_pool.py
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app.snapshots import current_db_path
+from app.sqlite_tuning import apply_pragmas, pragma_items
+
+
+# sqlite3 모듈의 연결별 prepared statement 캐시 크기 (기본 128)
+CACHED_STATEMENTS = 256
+
+
+class SQLitePool:
+    """
+    스레드별 sqlite3 연결 재사용 + 테이블 컬럼 캐시
+
+    - DB 경로는 활성 스냅샷 경로 (app/snapshots.py, 따로 경로 계산 안 함)
+    - 연결은 스레드당 1개, 처음 쓸 때 열고 PRAGMA 프로필(Config.SQLITE_PRAGMAS + query_only) 적용
+    - 끝난 스레드의 연결은 새 연결을 열 때 정리
+    - fork 후 자식 프로세스에서는 새로 엶 (pid 확인)
+    - 컬럼 목록은 PRAGMA schema_version 이 바뀔 때(마이그레이션)만 다시 읽음
+    """
+
+    def __init__(self, path: str, pragmas=(), cached_statements: int = CACHED_STATEMENTS):
+        self.path = path
+        self.pragmas = tuple(pragmas)
+        self.cached_statements = cached_statements
+
+        self._lock = threading.Lock()
+        self._conns: Dict[int, sqlite3.Connection] = {}   # thread ident -> 연결
+        self._pid = os.getpid()
+
+        # table -> (schema_version, columns)
+        self._columns: Dict[str, Tuple[int, List[str]]] = {}
+
+    def exists(self) -> bool:
+        return Path(self.path).exists()
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False: 정리/close_all은 다른 스레드에서 함 (사용은 스레드별 1개)
+        conn = sqlite3.connect(
+            self.path,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _prune_dead(self) -> None:
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._conns if i not in alive]:
+            self._conns.pop(ident).close()
+
+    def connection(self) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            # fork된 자식: 부모 연결은 버리고 새로
+            self._conns = {}
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+        ident = threading.get_ident()
+        conn = self._conns.get(ident)
+        if conn is None:
+            conn = self._open()
+            with self._lock:
+                self._prune_dead()
+                self._conns[ident] = conn
+        return conn
+
+    def close_all(self) -> None:
+        """열린 연결 전부 닫기 (DB 파일 교체/종료 시)"""
+        with self._lock:
+            conns, self._conns = list(self._conns.values()), {}
+            self._columns.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    # -------------------------------------------------
+    # 스키마 메타데이터 캐시
+    # -------------------------------------------------
+    def schema_version(self) -> int:
+        # DB 헤더 값만 읽음 (스키마 파싱 없음), DDL마다 증가
+        return self.connection().execute("PRAGMA schema_version").fetchone()[0]
+
+    def table_columns(self, table: str) -> List[str]:
+        version = self.schema_version()
+        cached = self._columns.get(table)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        cols = [row[1] for row in self.connection().execute(f"PRAGMA table_info({table})")]
+        self._columns[table] = (version, cols)
+        return cols
+
+
+# -------------------------------------------------
+# 프로세스 전역 (DB 경로별 1개)
+# -------------------------------------------------
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> SQLitePool:
+    """현재 활성 SQLite 파일에 대한 풀 (조회 전용 연결)"""
+    path = current_db_path()
+    if not path:
+        raise RuntimeError("SQLALCHEMY_DATABASE_URI가 SQLite 파일 DB가 아닙니다.")
+
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = _pools[path] = SQLitePool(path, pragma_items(current_app.config, reader=True))
+    return pool
+
+
+def reset_pool(path: Optional[str] = None) -> None:
+    """풀 제거 (다음 get_pool()에서 새로 만듦)"""
+    with _pools_lock:
+        targets = [path] if path else list(_pools)
+        for p in targets:
+            pool = _pools.pop(p, None)
+            if pool is not None:
+                pool.close_all()
+
+
+def retire_pools(keep: str) -> None:
+    """
+    스냅샷 교체 후: keep 외 경로의 풀을 목록에서 뺌
+    다른 스레드가 쓰는 중일 수 있어 바로 닫지 않음 (참조가 없어지면 연결도 닫힘)
+    """
+    with _pools_lock:
+        for p in [p for p in _pools if p != keep]:
+            del _pools[p]
@@ -0,0 +1,272 @@
+# app/snapshots.py
+"""
+읽기 전용 DB 스냅샷 교체 (무중단 데이터 갱신)
+
+  SNAPSHOT_DIR/
+    realestate_20261017_153000.db   <- flask snapshot build (활성 DB 온라인 복사)
+    ACTIVE                          <- 활성 스냅샷 파일명 1줄 (os.replace 로 원자적 교체)
+
+- 포인터가 없으면 Config.BASE_DB_PATH (기존 단일 파일)
+- REALESTATE_DB 환경변수가 있으면 그 파일 고정 (새 스냅샷에 적재하는 CLI 작업용)
+- 엔진 연결은 creator 로 '현재 활성 파일'을 열고, 요청마다 포인터 stat 만 확인해서
+  바뀌었으면 엔진 풀 dispose + 조회 전용 풀 교체 + 메모리 캐시 비움 (Flask 재시작 없음)
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from flask import current_app
+
+
+POINTER_NAME = "ACTIVE"
+SNAPSHOT_SUFFIX = ".db"
+
+# 스냅샷에 꼭 있어야 하는 테이블
+REQUIRED_TABLES = ("HOUSE_INFO", "SUPPORT_LIST")
+
+
+class SnapshotManager:
+    def __init__(self, snapshot_dir, base_path, override: Optional[str] = None, timeout: float = 5):
+        self.dir = Path(snapshot_dir)
+        self.base_path = Path(base_path)
+        self.override = Path(override).resolve() if override else None
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._stamp = self._pointer_stamp()
+        self.path = self._resolve()
+
+    @property
+    def pointer(self) -> Path:
+        return self.dir / POINTER_NAME
+
+    def _pointer_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.pointer)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def active_name(self) -> Optional[str]:
+        try:
+            name = self.pointer.read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return name or None
+
+    def _resolve(self) -> str:
+        if self.override is not None:
+            return str(self.override)
+        name = self.active_name()
+        if name and (self.dir / name).exists():
+            return str(self.dir / name)
+        return str(self.base_path)
+
+    def connect(self) -> sqlite3.Connection:
+        """SQLAlchemy 엔진 creator: 새 연결은 항상 현재 활성 파일로"""
+        return sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+
+    def poll(self) -> bool:
+        """포인터가 바뀌었으면 활성 경로 갱신, 실제로 파일이 바뀌면 True"""
+        if self.override is not None:
+            return False
+        stamp = self._pointer_stamp()
+        if stamp == self._stamp:
+            return False
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            new_path = self._resolve()
+            if new_path == self.path:
+                return False
+            self.path = new_path
+            return True
+
+
+# -------------------------------------------------
+# 앱 연결
+# -------------------------------------------------
+def init_snapshots(app, db) -> None:
+    """db.init_app 전에 호출 (엔진 URL / creator 설정)"""
+    connect_args = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}).get("connect_args", {})
+    manager = SnapshotManager(
+        app.config["SNAPSHOT_DIR"],
+        app.config["BASE_DB_PATH"],
+        override=app.config.get("DB_PATH_OVERRIDE"),
+        timeout=connect_args.get("timeout", 5),
+    )
+    app.extensions["snapshots"] = manager
+
+    # URL은 dialect/마이그레이션 표시용, 실제 연결은 creator
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{Path(manager.path).as_posix()}"
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    options.pop("connect_args", None)
+    options["creator"] = manager.connect
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    @app.before_request
+    def _switch_snapshot_if_changed():
+        if manager.poll():
+            app.logger.info("DB snapshot switched -> %s", manager.path)
+            on_switch(db)
+
+
+def on_switch(db) -> None:
+    """활성 파일이 바뀐 뒤: 연결 drain + 파일 단위 메모리 캐시 비움"""
+    from app.services.address_index import reset_address_index
+    from app.services.forecast_cube import reset_cube_cache
+    from app.services.forecast_repository import reset_repository_cache
+    from app.services.forecast_store import reset_forecast_store
+    from app.services.match_cache import clear_match_caches
+    from app.services.name_index import reset_name_index
+    from app.services.nlq_rules import reset_nlq_parser
+    from app.services.spatial_index import reset_spatial_index
+    from app.services.sqlite_pool import retire_pools
+
+    # 쉬고 있는 연결은 바로 닫고, 사용 중인 연결은 반납될 때 닫힘
+    db.engine.dispose()
+    retire_pools(keep=current_db_path())
+
+    reset_repository_cache()
+    reset_cube_cache()
+    reset_forecast_store()
+    reset_spatial_index()
+    clear_match_caches()
+    reset_name_index()
+    reset_address_index()
+    reset_nlq_parser()
+
+
+def get_manager() -> Optional[SnapshotManager]:
+    return current_app.extensions.get("snapshots")
+
+
+def current_db_path() -> Optional[str]:
+    """지금 읽어야 하는 SQLite 파일 경로"""
+    manager = get_manager()
+    if manager is not None:
+        return manager.path
+    from app import db
+    return db.engine.url.database
+
+
+# -------------------------------------------------
+# 스냅샷 만들기 / 검증 / 활성화 (flask snapshot ...)
+# -------------------------------------------------
+def list_snapshots(manager: SnapshotManager) -> List[Path]:
+    """스냅샷 파일 (오래된 순)"""
+    if not manager.dir.exists():
+        return []
+    return sorted(manager.dir.glob(f"*{SNAPSHOT_SUFFIX}"), key=lambda p: p.stat().st_mtime_ns)
+
+
+def build_snapshot(manager: SnapshotManager, name: Optional[str] = None) -> Path:
+    """
+    현재 활성 DB -> 새 스냅샷 파일 (sqlite3 backup API: 쓰는 중이어도 일관된 복사본)
+    임시 파일에 만든 뒤 이름 변경
+    """
+    name = name or f"realestate_{datetime.now():%Y%m%d_%H%M%S}{SNAPSHOT_SUFFIX}"
+    if not name.endswith(SNAPSHOT_SUFFIX) or os.sep in name or name == POINTER_NAME:
+        raise ValueError(f"스냅샷 이름은 '{SNAPSHOT_SUFFIX}' 로 끝나는 파일명이어야 합니다: {name}")
+    dest = manager.dir / name
+    if dest.exists():
+        raise ValueError(f"이미 있는 스냅샷입니다: {name}")
+
+    manager.dir.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    src = sqlite3.connect(f"file:{manager.path}?mode=ro", uri=True)
+    dst = sqlite3.connect(tmp)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    os.replace(tmp, dest)
+    return dest
+
+
+def _schema_head(conn) -> Optional[str]:
+    try:
+        row = conn.execute("SELECT version_num FROM alembic_version").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def validate_snapshot(path, reference: Optional[str] = None) -> List[str]:
+    """
+    교체 전 검사 -> 문제 목록 (비어 있으면 통과)
+      무결성(quick_check) / 필수 테이블 / HOUSE_INFO 행 존재 / 마이그레이션 버전이 현재 DB와 같은지
+    """
+    path = Path(path)
+    if not path.exists():
+        return [f"파일이 없습니다: {path}"]
+
+    problems: List[str] = []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            problems.append(f"quick_check: {check}")
+
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [t for t in REQUIRED_TABLES if t not in tables]
+        if missing:
+            problems.append(f"테이블 없음: {missing}")
+        elif not conn.execute("SELECT 1 FROM HOUSE_INFO LIMIT 1").fetchone():
+            problems.append("HOUSE_INFO 가 비어 있습니다.")
+
+        if reference:
+            ref = sqlite3.connect(f"file:{reference}?mode=ro", uri=True)
+            try:
+                want = _schema_head(ref)
+            finally:
+                ref.close()
+            got = _schema_head(conn)
+            if want != got:
+                problems.append(f"마이그레이션 버전 불일치: {got} (현재 DB {want})")
+    except sqlite3.Error as e:
+        problems.append(f"열기 실패: {e}")
+    finally:
+        conn.close()
+    return problems
+
+
+def activate_snapshot(manager: SnapshotManager, name: str) -> Path:
+    """
+    스냅샷 WAL 체크포인트(파일 하나로 완결) 후 포인터 원자적 교체
+    실행 중인 웹 프로세스는 다음 요청에서 포인터 변경을 보고 새 파일로 넘어감
+    """
+    path = manager.dir / name
+    if not path.exists():
+        raise ValueError(f"없는 스냅샷입니다: {name}")
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+    tmp = manager.pointer.with_name(POINTER_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        fp.write(name + "\n")
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, manager.pointer)
+    return path
+
+
+def prune_snapshots(manager: SnapshotManager, keep: int) -> List[Path]:
+    """활성 스냅샷 + 최근 keep개만 남기고 삭제 (-wal/-shm 포함)"""
+    active = manager.active_name()
+    candidates = [p for p in list_snapshots(manager) if p.name != active]
+    removed = candidates[:-keep] if keep > 0 else candidates
+    for p in removed:
+        for f in (p, Path(f"{p}-wal"), Path(f"{p}-shm")):
+            if f.exists():
+                f.unlink()
+    return removed
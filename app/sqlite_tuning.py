@@ -0,0 +1,56 @@
+# app/sqlite_tuning.py
+"""
+SQLite 연결 PRAGMA 프로필 (Config.SQLITE_PRAGMAS)
+- Flask-SQLAlchemy 엔진: connect 이벤트로 새 연결마다 적용
+- sqlite_pool(조회 전용 raw 연결): 같은 프로필 + query_only
+"""
+from typing import Any, List, Mapping, Tuple
+
+from sqlalchemy import event
+
+
+# journal_mode 는 DB 파일 단위 설정이라 쓰기 가능한 연결에서 먼저 적용
+# query_only 는 맨 마지막 (그 뒤로는 쓰기 PRAGMA도 막힘)
+_ORDER = ("journal_mode",)
+
+
+def pragma_items(config: Mapping[str, Any], reader: bool = False) -> List[Tuple[str, Any]]:
+    """설정 -> [(pragma, value), ...] 적용 순서대로"""
+    pragmas = dict(config.get("SQLITE_PRAGMAS") or {})
+    items = [(k, pragmas.pop(k)) for k in _ORDER if k in pragmas]
+    items += sorted(pragmas.items())
+    if reader or config.get("SQLITE_QUERY_ONLY"):
+        items.append(("query_only", "ON"))
+    return items
+
+
+def apply_pragmas(dbapi_conn, items) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for name, value in items:
+            try:
+                cur.execute(f"PRAGMA {name} = {value}")
+            except Exception:
+                # 읽기 전용 파일 등에서 journal_mode 변경 실패 -> 기존 설정으로 계속
+                if name != "journal_mode":
+                    raise
+    finally:
+        cur.close()
+
+
+def init_sqlite_tuning(app, db) -> None:
+    """앱의 SQLite 엔진들에 connect 이벤트 등록"""
+    items = pragma_items(app.config)
+    if not items:
+        return
+
+    with app.app_context():
+        engines = db.engines.values()
+
+    for engine in engines:
+        if engine.dialect.name != "sqlite":
+            continue
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_conn, connection_record, items=items):
+            apply_pragmas(dbapi_conn, items)
@@ -1,28 +1,35 @@
 from flask import Blueprint, render_template
 from app.model import SupportList, HouseInfo
-from sqlalchemy import func
-import random
+from app.caching import get_fragment, set_fragment
+from app.services.sampling import sample_rowids, sample_rows
 
 bp = Blueprint('index', __name__, url_prefix='/')
 
+# 메인 화면 카드 개수 (테이블이 커져도 이 개수만 조회)
+POLICY_CARD_COUNT = 12
+HOUSE_CARD_COUNT = 10
+
 @bp.route('/')
 def index():
 
-    # 1) 정책 데이터 — 랜덤 셔플
-    policy_items = SupportList.query.all()
-    random.shuffle(policy_items)
+    # 1) 정책 데이터 — 랜덤 일부만, 카드 HTML은 id 단위 조각 캐시 (없는 것만 DB 조회)
+    policy_ids = sample_rowids(SupportList.__tablename__, POLICY_CARD_COUNT)
+    cards = {pid: get_fragment(("policy_card", pid)) for pid in policy_ids}
+    missing = [pid for pid, html in cards.items() if html is None]
+    if missing:
+        for item in SupportList.query.filter(SupportList.id.in_(missing)):
+            cards[item.id] = set_fragment(
+                ("policy_card", item.id),
+                render_template("index/_policy_card.html", item=item),
+            )
+    policy_cards = [cards[pid] for pid in policy_ids if cards.get(pid) is not None]
 
-    # 2) 전월세 매물 — DB에서 랜덤 10개
-    house_items = (
-        HouseInfo.query
-        .order_by(func.random())     # 🔥 랜덤 섞기
-        .limit(10)                   # 🔥 10개만 가져오기
-        .all()
-    )
+    # 2) 전월세 매물 — rowid 샘플링으로 랜덤 10개 (ORDER BY random() 전체 정렬 없음)
+    house_items = sample_rows(HouseInfo, HOUSE_CARD_COUNT)
 
     # 3) 템플릿 렌더링
     return render_template(
         "index/index.html",
-        policy_cards=policy_items,
+        policy_cards=policy_cards,
         house_cards=house_items
     )
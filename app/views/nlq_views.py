@@ -3,9 +3,13 @@ import os
 import json
 import re
 import requests
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 
+from app.services.house_search import build_nlq_listing_query
+from app.services.input_builder import DISTRICT_DISPLAY_MAP
+from app.services.nlq_rules import get_nlq_parser
 from app.services.prediction_lookup import run_prediction_lookup
+from app.views.predict_views import _listing_row
 
 bp = Blueprint("nlq", __name__, url_prefix="")
 
@@ -22,6 +26,56 @@ SYSTEM_PROMPT = """
 }
 """.strip()
 
+# ✅ 생성 JSON 모양 (llama_server json_schema: object/string/enum, 속성 순서 = 출력 순서)
+_DISTRICT_CODES = sorted(DISTRICT_DISPLAY_MAP)
+NLQ_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "contract": {
+            "type": "object",
+            "properties": {"lease_type": {"type": "string", "enum": ["전세", "월세"]}},
+            "required": ["lease_type"],
+        },
+        "region": {
+            "type": "object",
+            "properties": {
+                "district_code": {"type": "string", "enum": _DISTRICT_CODES},
+                "dong_name": {"type": "string", "maxLength": 20},
+            },
+            "required": ["district_code"],
+        },
+        "property": {
+            "type": "object",
+            "properties": {
+                "building_name": {"type": "string", "maxLength": 40},
+                "house_type": {"type": "string", "maxLength": 10},
+            },
+            "required": ["building_name"],
+        },
+        "db_context": {
+            "type": "object",
+            "properties": {
+                "district_code": {"type": "string", "enum": _DISTRICT_CODES},
+                "building_name": {"type": "string", "maxLength": 40},
+            },
+        },
+    },
+    "required": ["contract", "region", "property"],
+}
+
+# ✅ 요청마다 똑같은 앞부분 (시스템 프롬프트 + 규칙) — llama_server 가 이 부분 KV 캐시를 재사용
+#    사용자 입력은 맨 뒤에 붙음 (prefix + text)
+NLQ_PREFIX = f"""{SYSTEM_PROMPT}
+
+규칙:
+- 반드시 JSON만 출력
+- JSON 바깥 텍스트(설명/마크다운/코드블록) 금지
+- 모든 키는 스키마 그대로 사용
+- 문자열 값은 반드시 큰따옴표로 감싸기
+
+사용자 입력:
+"""
+
 def _extract_json(text: str) -> str:
     if not text:
         raise ValueError("Empty LLM response")
@@ -39,9 +93,9 @@ def _extract_json(text: str) -> str:
 
 def call_llm_make_payload(prompt: str) -> dict:
     """
-    1) SYSTEM_PROMPT + 사용자 prompt로 LLM 호출
-    2) 응답에서 JSON만 추출
-    3) json.loads 실패하면 'JSON만 다시' 1회 재시도
+    1) NLQ_PREFIX(시스템 프롬프트 + 규칙) + 사용자 prompt로 LLM 호출
+    2) llama_server 가 NLQ_SCHEMA 모양의 JSON만 생성 (스키마 제약 디코딩, 객체가 닫히면 바로 끝)
+       -> 깨진 JSON 재시도 왕복 없음
     """
     base = (os.getenv("RUNPOD_BASE_URL") or "").strip().rstrip("/")
     if not base:
@@ -49,21 +103,11 @@ def call_llm_make_payload(prompt: str) -> dict:
 
     url = f"{base}/llama/generate"
 
-    # ✅ LLM에게 'JSON만' 강하게 요구
-    full_prompt = f"""{SYSTEM_PROMPT}
-
-사용자 입력:
-{prompt}
-
-규칙:
-- 반드시 JSON만 출력
-- JSON 바깥 텍스트(설명/마크다운/코드블록) 금지
-- 모든 키는 스키마 그대로 사용
-- 문자열 값은 반드시 큰따옴표로 감싸기
-"""
-
+    # ✅ 고정 앞부분은 prefix 로 따로 보내서 서버 캐시 재사용
     body = {
-        "text": full_prompt,
+        "prefix": NLQ_PREFIX,
+        "text": prompt,
+        "json_schema": NLQ_SCHEMA,
         "max_new_tokens": 256,
         "temperature": 0.0,   # ✅ JSON 안정성 위해 0.0 권장
         "top_p": 0.95
@@ -76,39 +120,11 @@ def call_llm_make_payload(prompt: str) -> dict:
     if not text:
         raise ValueError(f"RunPod response missing 'answer': {r.text[:200]}")
 
-    json_str = _extract_json(text)
-
-    # 1차 파싱 시도
     try:
-        return json.loads(json_str)
-
-    except json.JSONDecodeError:
-        # ✅ 1회 자동 수정 재시도
-        fix_prompt = f"""{SYSTEM_PROMPT}
-
-아래 출력은 JSON이 깨져있다.
-반드시 올바른 JSON "한 개"만 출력해라.
-추가 텍스트/설명/마크다운/코드블록 금지.
-
-깨진 출력:
-{json_str}
-"""
-        body2 = {
-            "text": fix_prompt,
-            "max_new_tokens": 256,
-            "temperature": 0.0,
-            "top_p": 0.95
-        }
-
-        r2 = requests.post(url, json=body2, timeout=120)
-        r2.raise_for_status()
-
-        text2 = (r2.json().get("answer") or "").strip()
-        if not text2:
-            raise ValueError(f"RunPod response missing 'answer' (retry): {r2.text[:200]}")
-
-        json_str2 = _extract_json(text2)
-        return json.loads(json_str2)
+        return json.loads(_extract_json(text))
+    except json.JSONDecodeError as e:
+        # 스키마 제약이면 여기 올 일 없음 (max_new_tokens 에서 잘린 경우 등)
+        raise ValueError(f"LLM output is not valid JSON: {text[:200]}") from e
 
 
 
@@ -123,12 +139,39 @@ def nlq():
     if not prompt:
         return jsonify({"ok": False, "error": "prompt is required"}), 400
 
-    payload = call_llm_make_payload(prompt)
+    # 규칙 파서로 조건이 확실히 정해지면 LLM 왕복 생략 (수 ms)
+    parsed = get_nlq_parser().parse(prompt)
+    confident = parsed.confidence >= current_app.config.get("NLQ_RULE_MIN_CONFIDENCE", 0.8)
+
+    # 조건 검색 ('구로구 전세 2억 이하 최근 5개') -> 목록
+    if confident and parsed.intent == "search":
+        query = parsed.to_listing_query()
+        rows = build_nlq_listing_query(query).all()
+        return jsonify({
+            "ok": True,
+            "source": "rules",
+            "intent": "search",
+            "parsed": parsed.to_dict(),
+            "query": query.to_dict(),
+            "count": len(rows),
+            "items": [_listing_row(r) for r in rows],
+        }), 200
+
+    # 건물 1곳 예측 조회
+    if confident:
+        payload = parsed.to_payload()
+        source = "rules"
+    else:
+        payload = call_llm_make_payload(prompt)
+        source = "llm"
     result = run_prediction_lookup(payload, target_yq=target_yq)
 
     return jsonify({
         "ok": True,
         "target_yq": target_yq,
+        "source": source,
+        "intent": "lookup",
+        "parsed": parsed.to_dict(),
         "payload": payload,
         "result": result
     }), 200
@@ -1,7 +1,27 @@
-from flask import Blueprint, render_template, request, jsonify
-from app.model import HouseInfo
-from app.services.input_builder import UserInput, build_prediction_input_json
-from app.ml_model import run_prediction_lookup
+import json
+import re
+from flask import Blueprint, Response, current_app, render_template, request, jsonify, stream_with_context
+from app.services.input_builder import (
+    SCHEMA_V1_0,
+    SUPPORTED_SCHEMA_VERSIONS,
+    UserInput,
+    build_prediction_input_json,
+)
+from app.services.address_index import get_address_index
+from app.services.forecast_cube import has_cube_table, query_cube
+from app.services.forecast_repository import METRICS, QUARTERS, fetch_forecasts
+from app.services.house_search import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    SearchFilter,
+    build_page_query,
+    dong_clusters,
+    encode_cursor,
+)
+from app.services.match_cache import match_cache_stats
+from app.services.name_index import BuildingNotFoundError, get_name_index
+from app.services.spatial_index import fetch_listings_by_rowid, get_spatial_index
+from app.services.prediction_lookup import run_prediction_batch, run_prediction_lookup, run_prediction_trajectory
 
 bp = Blueprint("predict", __name__, url_prefix="/predict")
 
@@ -80,6 +100,10 @@ def build_input():
         # ✅ 월세면 월세값도 받을 수 있게(선택/필수는 너희 정책)
         monthly_rent_krw = _get_int(form, "monthly_rent_krw", required=False, min_value=0)
 
+        # 응답 스키마: v1.0(기본, 히스토리 dict 포함) / v1.1(경량, include_history=1일 때만 배열 히스토리)
+        schema_version = _get_str(form, "schema_version", default=SCHEMA_V1_0)
+        include_history = _get_str(form, "include_history", default="0").lower() in ("1", "true", "yes")
+
         if district_code not in ALLOWED_DISTRICTS:
             raise ValueError(f"'district_code' must be one of {sorted(ALLOWED_DISTRICTS)}")
         if house_type not in ALLOWED_HOUSE_TYPES:
@@ -110,7 +134,11 @@ def build_input():
             monthly_rent_krw=monthly_rent_krw,  # ✅ UserInput에 필드 추가 필요(선택)
         )
 
-        payload = build_prediction_input_json(user)  # ✅ 여기서 lease_type 기반 매칭하도록 수정 필요
+        payload = build_prediction_input_json(
+            user,
+            schema_version=schema_version,
+            include_history=include_history,
+        )
         return jsonify(payload), 200
 
     except ValueError as e:
@@ -120,6 +148,7 @@ def build_input():
             "hint": {
                 "required_keys": ["district_code", "dong_name", "house_type", "lease_type", "area_m2", "deposit_krw"],
                 "allowed_lease_type": ["전세", "월세"],
+                "allowed_schema_version": list(SUPPORTED_SCHEMA_VERSIONS),
             }
         }), 400
 
@@ -150,12 +179,84 @@ def run_prediction():
             },
             "result": result
         }), 200
+    except BuildingNotFoundError as e:
+        # 건물명 오타/일부 입력 -> 비슷한 건물명 후보를 같이 돌려줌
+        suggestions = get_name_index().suggest(e.building_name, district=e.district, limit=5)
+        return jsonify({"ok": False, "error": str(e), "suggestions": suggestions}), 400
     except ValueError as e:
         return jsonify({"ok": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"ok": False, "error": "server_error"}), 500
 
 
+# 배치 요청 한도
+MAX_BATCH_ITEMS = 1000
+
+
+@bp.route("/run-batch", methods=["POST"])
+def run_prediction_batch_api():
+    """
+    request JSON:
+      { "items": [payload, ...], "quarters": ["2026Q1", "2026Q2"] | "all" }
+      (quarters 대신 "target_yq": "2025Q1" 도 가능, 둘 다 없으면 2025Q1)
+    response JSON:
+      { "ok": true, "quarters": [...], "count": n,
+        "results": [ {"index": 0, "ok": true, "results": {"2026Q1": {...}}},
+                     {"index": 1, "ok": false, "error": "..."} ] }
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"ok": False, "error": "request body must be a JSON object"}), 400
+
+    items = body.get("items")
+    if not isinstance(items, list):
+        return jsonify({"ok": False, "error": "'items' must be a list of payloads"}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"ok": False, "error": f"'items' must have at most {MAX_BATCH_ITEMS} entries"}), 400
+
+    try:
+        quarters = body.get("quarters")
+        if isinstance(quarters, list):
+            quarters = _parse_quarters(",".join(str(q) for q in quarters))
+        elif quarters:
+            quarters = _parse_quarters(str(quarters))
+        else:
+            quarters = [(body.get("target_yq") or "2025Q1").strip()]
+
+        results = run_prediction_batch(items, quarters)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception:
+        return jsonify({"ok": False, "error": "server_error"}), 500
+
+    return jsonify({
+        "ok": True,
+        "quarters": quarters,
+        "count": len(results),
+        "results": results,
+    }), 200
+
+
+@bp.route("/trajectory", methods=["POST"])
+def run_prediction_trajectory_api():
+    """
+    payload(/predict/run 과 동일) -> 2025Q1~2030Q4 보증금/월세 궤적 + 요약 지표
+      values / qoq / yoy (분기 순서), cagr, peak/trough 분기, total_change, mean
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"ok": False, "error": "request body must be a JSON object"}), 400
+
+    try:
+        result = run_prediction_trajectory(payload)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    except Exception:
+        return jsonify({"ok": False, "error": "server_error"}), 500
+
+    return jsonify({"ok": True, **result}), 200
+
+
 # -------------------------------------------------
 # 2) (기존) 검색 UI용 헬퍼
 # -------------------------------------------------
@@ -190,104 +291,290 @@ def convert_floor(floor):
     return f"{floor}층"
 
 
+def _listing_row(item):
+    """목록 1건 -> 화면/API 공용 dict (예측값 제외)"""
+    return {
+        "building_name": item.building_name,
+        "house_key": item.house_key,
+
+        # display + code 둘 다 내려주기 (매우 중요)
+        "district_code": item.district,
+        "district": convert_gu_to_kor(item.district),
+
+        "floor": convert_floor(item.floor),
+        "floor_raw": item.floor,
+        "area_m2": item.area_m2,
+        "area_p": convert_m2_to_pyeong(item.area_m2),
+        "built_year": item.built_year,
+        "house_type": item.house_type,
+        "latitude": item.latitude,
+        "longitude": item.longitude,
+
+        "recent_yq": convert_yq_to_kor(item.recent_yq),
+        "recent_yq_raw": item.recent_yq,
+        "recent_deposit": item.recent_deposit,
+        "recent_monthly": item.recent_monthly,
+
+        "road_address": item.road_address,
+        "jibun_address": item.jibun_address,
+        "dong_name": item.dong_name,
+        "lease_type": item.lease_type,
+
+        "monthly_rent": item.monthly_rent,
+    }
+
+
+_YQ_RE = re.compile(r"^20\d{2}Q[1-4]$")
+
+
+def _parse_quarters(raw):
+    """
+    quarters 파라미터: 없으면 [] (예측값 미포함), 'all'이면 2025Q1~2030Q4, 아니면 '2026Q1,2026Q2'
+    """
+    raw = (raw or "").strip()
+    if not raw:
+        return []
+    if raw.lower() == "all":
+        return list(QUARTERS)
+
+    out = []
+    for part in raw.split(","):
+        yq = part.strip().upper()
+        if not _YQ_RE.match(yq):
+            raise ValueError(f"'quarters' must be like 2026Q1 (got '{part}')")
+        out.append(yq)
+    return out
+
+
 # -------------------------------------------------
-# 3) (기존) 검색 화면
+# 3) 검색 화면 (목록은 /predict/api/bbox 에서 지도 화면 범위만 가져감)
 # -------------------------------------------------
 @bp.route("/search")
 def predict_search():
-    def get_param(name, default):
-        val = request.args.get(name)
-        if val is None or val.strip() == "":
-            return default
-        return val.strip()
-
-    gu = get_param("gu", "eunpyeong")
-    house_type = get_param("house_type", "빌라")
-    lease_type = get_param("lease_type", "월세")
-    area_range = get_param("area", "10-19")
-    floor_range = get_param("floor", "low")
-
-    query = HouseInfo.query
-    query = query.filter(HouseInfo.district == gu)
-    query = query.filter(HouseInfo.house_type == house_type)
-    query = query.filter(HouseInfo.lease_type == lease_type)
-
-    # 면적 필터
-    try:
-        min_p, max_p = area_range.split("-")
-        min_p = int(min_p)
-        max_p = int(max_p)
-        min_m2 = min_p * 3.305785
-        max_m2 = max_p * 3.305785
-        query = query.filter(HouseInfo.area_m2 >= min_m2, HouseInfo.area_m2 <= max_m2)
-    except Exception:
-        pass
-
-    # 층수 필터
-    if floor_range == "basement":
-        query = query.filter(HouseInfo.floor < 0)
-    elif floor_range == "low":
-        query = query.filter(HouseInfo.floor >= 1, HouseInfo.floor <= 4)
-    elif floor_range == "mid":
-        query = query.filter(HouseInfo.floor >= 5, HouseInfo.floor <= 10)
-    elif floor_range == "high":
-        query = query.filter(HouseInfo.floor >= 11)
-
-    raw_items = query.all()
-
-    items = []
-    for item in raw_items:
-        row = {
-            "building_name": item.building_name,
-
-            # display + code 둘 다 내려주기 (매우 중요)
-            "district_code": item.district,
-            "district": convert_gu_to_kor(item.district),
-
-            "floor": convert_floor(item.floor),
-            "floor_raw": item.floor,
-            "area_m2": item.area_m2,
-            "area_p": convert_m2_to_pyeong(item.area_m2),
-            "built_year": item.built_year,
-            "house_type": item.house_type,
-            "latitude": item.latitude,
-            "longitude": item.longitude,
-
-            "recent_yq": convert_yq_to_kor(item.recent_yq),
-            "recent_yq_raw": item.recent_yq,
-            "recent_deposit": item.recent_deposit,
-            "recent_monthly": item.recent_monthly,
-
-            "road_address": item.road_address,
-            "jibun_address": item.jibun_address,
-            "dong_name": item.dong_name,
-            "lease_type": item.lease_type,
-
-            "monthly_rent": item.monthly_rent,
-        }
-
-        # 전세 예측값 (2025~2030) - 안전 getattr
-        for year in range(25, 31):
-            for q in range(1, 5):
-                key = f"deposit_{year}q{q}"
-                row[key] = getattr(item, key, None)
-
-        # 월세 예측값 (2025~2030) - 안전 getattr
-        for year in range(25, 31):
-            for q in range(1, 5):
-                key = f"monthly_rent_{year}q{q}"
-                row[key] = getattr(item, key, None)
-
-        items.append(row)
-
+    f = SearchFilter.from_args(request.args)
     return render_template(
         "predict/predict_search.html",
-        items=items,
-        init_filter={
-            "gu": gu,
+        init_filter=f.to_dict(),
+        bbox_limit=MAX_PAGE_SIZE,
+    )
+
+
+# -------------------------------------------------
+# 4) 검색 API: 키셋 페이지네이션 + 필드 프로젝션 + 스트리밍
+#   GET /predict/api/search?gu=&house_type=&lease_type=&area=&floor=
+#       &limit=200&after=<cursor>&quarters=2026Q1,2026Q2|all&format=json|ndjson
+# -------------------------------------------------
+@bp.get("/api/search")
+def api_search():
+    try:
+        f = SearchFilter.from_args(request.args)
+        limit = _get_int(request.args, "limit", min_value=1, max_value=MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+        quarters = _parse_quarters(request.args.get("quarters"))
+        fmt = (request.args.get("format") or "json").strip().lower()
+        if fmt not in ("json", "ndjson"):
+            raise ValueError("'format' must be one of ['json', 'ndjson']")
+
+        rows = build_page_query(f, after=request.args.get("after"), limit=limit).all()
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    next_cursor = encode_cursor(last.area_m2, last.floor, last.rid) if (has_more and last) else None
+
+    forecasts = fetch_forecasts([r.house_key for r in rows], quarters=quarters) if quarters else {}
+
+    def iter_items():
+        for r in rows:
+            row = _listing_row(r)
+            if quarters:
+                row["forecast"] = forecasts.get(r.house_key, {})
+            yield json.dumps(row, ensure_ascii=False)
+
+    meta = {"count": len(rows), "has_more": has_more, "next_cursor": next_cursor}
+
+    if fmt == "ndjson":
+        def generate():
+            for line in iter_items():
+                yield line + "\n"
+            # 마지막 줄: 페이지 메타
+            yield json.dumps({"_meta": meta}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    def generate():
+        yield '{"items": ['
+        for i, line in enumerate(iter_items()):
+            yield ("," if i else "") + line
+        yield "], " + json.dumps(meta)[1:]
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+@bp.get("/api/forecast")
+def api_forecast():
+    """매물 1건 예측값 (상세 팝업 열 때만 호출)"""
+    house_key = (request.args.get("house_key") or "").strip()
+    if not house_key:
+        return jsonify({"ok": False, "error": "'house_key' is required"}), 400
+    try:
+        quarters = _parse_quarters(request.args.get("quarters") or "all")
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    forecast = fetch_forecasts([house_key], quarters=quarters).get(house_key, {})
+    return jsonify({"ok": True, "house_key": house_key, "forecast": forecast}), 200
+
+
+@bp.get("/api/clusters")
+def api_clusters():
+    """
+    동 단위 클러스터: 동별 매물 수 / 좌표 중심 / 최근 보증금·월세 중앙값
+    (검색 조건은 /predict/api/search 와 동일)
+    """
+    f = SearchFilter.from_args(request.args)
+    return jsonify({"ok": True, "filter": f.to_dict(), "clusters": dong_clusters(f)}), 200
+
+
+# -------------------------------------------------
+# 5) 지도 viewport / 주변 매물 (격자 공간 인덱스)
+#   GET /predict/api/bbox?south=&west=&north=&east=&limit=   (+ 검색 조건)
+#   GET /predict/api/bbox?lat=&lng=&k=10&radius_m=            (k-최근접)
+# -------------------------------------------------
+@bp.get("/api/bbox")
+def api_bbox():
+    args = request.args
+    try:
+        f = SearchFilter.from_args(args)
+        index = get_spatial_index()
+
+        if args.get("lat") is not None or args.get("lng") is not None:
+            lat = _get_float(args, "lat", required=True, min_value=-90, max_value=90)
+            lng = _get_float(args, "lng", required=True, min_value=-180, max_value=180)
+            k = _get_int(args, "k", min_value=1, max_value=MAX_PAGE_SIZE) or 10
+            radius_m = _get_float(args, "radius_m", min_value=0)
+
+            rowids, dists = index.nearest(lat, lng, k, f=f, max_distance_m=radius_m)
+            # 사라진 rowid 는 fetch 결과에서 빠지므로 거리는 위치가 아니라 rowid 로 맞춤
+            dist_by_rowid = dict(zip((int(r) for r in rowids), dists))
+            items = []
+            for r in fetch_listings_by_rowid(rowids):
+                row = _listing_row(r)
+                row["distance_m"] = round(float(dist_by_rowid[r.rid]), 1)
+                items.append(row)
+            return jsonify({"ok": True, "mode": "knn", "count": len(items), "items": items}), 200
+
+        south = _get_float(args, "south", required=True, min_value=-90, max_value=90)
+        north = _get_float(args, "north", required=True, min_value=-90, max_value=90)
+        west = _get_float(args, "west", required=True, min_value=-180, max_value=180)
+        east = _get_float(args, "east", required=True, min_value=-180, max_value=180)
+        if south > north or west > east:
+            raise ValueError("bbox must satisfy south <= north and west <= east")
+        limit = _get_int(args, "limit", min_value=1, max_value=MAX_PAGE_SIZE) or MAX_PAGE_SIZE
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    rowids, total = index.bbox(south, west, north, east, f=f, limit=limit)
+    items = [_listing_row(r) for r in fetch_listings_by_rowid(rowids)]
+    return jsonify({
+        "ok": True,
+        "mode": "bbox",
+        "count": len(items),
+        "total": total,
+        "truncated": total > len(items),
+        "items": items,
+    }), 200
+
+
+@bp.get("/api/cache-stats")
+def api_cache_stats():
+    """매칭 메모이즈 캐시 hit/miss (운영 모드면 HTML 조각 캐시 포함)"""
+    stats = match_cache_stats()
+    fragment_cache = current_app.extensions.get("fragment_cache")
+    if fragment_cache is not None:
+        stats["fragments"] = fragment_cache.stats()
+    return jsonify({"ok": True, "caches": stats}), 200
+
+
+# -------------------------------------------------
+# 6) 건물명 자동완성
+#   GET /predict/api/suggest?q=래미&district=eunpyeong&limit=10
+# -------------------------------------------------
+MAX_SUGGEST = 50
+
+
+@bp.get("/api/suggest")
+def api_suggest():
+    args = request.args
+    try:
+        q = _get_str(args, "q", required=True)
+        district = _get_str(args, "district")
+        if district is not None and district not in ALLOWED_DISTRICTS:
+            raise ValueError(f"'district' must be one of {sorted(ALLOWED_DISTRICTS)}")
+        limit = _get_int(args, "limit", min_value=1, max_value=MAX_SUGGEST) or 10
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    items = get_name_index().suggest(q, district=district, limit=limit)
+    return jsonify({"ok": True, "q": q, "count": len(items), "items": items}), 200
+
+
+# -------------------------------------------------
+# 7) 주소 -> 매물 키 (도로명/지번 역색인)
+#   GET /predict/api/resolve-address?q=구로구 오류동 616-11&limit=5
+# -------------------------------------------------
+@bp.get("/api/resolve-address")
+def api_resolve_address():
+    args = request.args
+    try:
+        q = _get_str(args, "q", required=True)
+        limit = _get_int(args, "limit", min_value=1, max_value=MAX_SUGGEST) or 5
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    resolved = get_address_index().resolve(q, limit=limit)
+    return jsonify({"ok": True, "q": q, "count": len(resolved["items"]), **resolved}), 200
+
+
+# -------------------------------------------------
+# 8) 시장 요약 (HOUSE_FORECAST_CUBE 미리 계산된 집계)
+#   GET /predict/api/market-summary?district=eunpyeong&dong_name=불광동&house_type=&lease_type=
+#       &metric=deposit|monthly_rent&quarters=2026Q3|all
+#   지정 안 한 차원은 전체 합산 셀 (dong_name 없음 -> 구 전체)
+# -------------------------------------------------
+@bp.get("/api/market-summary")
+def api_market_summary():
+    args = request.args
+    try:
+        district = _get_str(args, "district")
+        if district is not None and district not in ALLOWED_DISTRICTS:
+            raise ValueError(f"'district' must be one of {sorted(ALLOWED_DISTRICTS)}")
+        house_type = _get_str(args, "house_type")
+        if house_type is not None and house_type not in ALLOWED_HOUSE_TYPES:
+            raise ValueError(f"'house_type' must be one of {sorted(ALLOWED_HOUSE_TYPES)}")
+        lease_type = _get_str(args, "lease_type")
+        if lease_type is not None and lease_type not in ("전세", "월세"):
+            raise ValueError("'lease_type' must be one of ['전세','월세']")
+        metric = _get_str(args, "metric")
+        metrics = [metric] if metric else list(METRICS)
+        quarters = _parse_quarters(args.get("quarters"))
+        dong_name = _get_str(args, "dong_name")
+
+        if not has_cube_table():
+            return jsonify({"ok": False, "error": "market summary is not built yet"}), 503
+        summary = query_cube(district, dong_name, house_type, lease_type, metrics, quarters)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    return jsonify({
+        "ok": True,
+        "filter": {
+            "district": district,
+            "dong_name": dong_name,
             "house_type": house_type,
             "lease_type": lease_type,
-            "area": area_range,
-            "floor": floor_range,
-        }
-    )
+        },
+        "unit": "만원",
+        "summary": summary,
+    }), 200
@@ -1,13 +1,16 @@
 import os
 import json
 import requests
-from flask import Blueprint, render_template, request, url_for, jsonify
+from flask import Blueprint, Response, render_template, request, url_for, jsonify, stream_with_context
 from app.nlp.pipelines import run_policy_qa, run_sentiment, translate_ko_to_en, generate_text, run_ner
 from app.model import SupportList
+from app.caching import cached_fragment, conditional_page
 
 
 # ✅ LLaMA 서버 주소 (RunPod 외부 URL은 환경변수로 넣고, 없으면 로컬 기본값)
 LLAMA_URL = os.getenv("LLAMA_URL", "http://127.0.0.1:8000/llama/generate").strip()
+# ✅ 스트리밍(SSE) 주소 — 없으면 LLAMA_URL + "/stream"
+LLAMA_STREAM_URL = (os.getenv("LLAMA_STREAM_URL") or f"{LLAMA_URL.rstrip('/')}/stream").strip()
 
 # ✅ requests 세션(커넥션 재사용)
 _http = requests.Session()
@@ -39,13 +42,54 @@ def call_llama3(text: str, max_new_tokens: int = 256, temperature: float = 0.2,
     return (data.get("answer") or "").strip()
 
 
+def open_llama3_stream(text: str, max_new_tokens: int = 256, temperature: float = 0.2, top_p: float = 0.95):
+    """
+    LLaMA 서버 SSE 스트림 열기 -> requests.Response (stream=True, 다 읽은 뒤 close 필요)
+    read timeout 은 '토큰 사이' 대기 시간 (전체 생성 시간 아님)
+    """
+    if not LLAMA_STREAM_URL:
+        raise RuntimeError("LLAMA_STREAM_URL이 비어있습니다. 환경변수 LLAMA_URL을 설정하세요.")
+
+    payload = {
+        "text": text,
+        "max_new_tokens": max_new_tokens,
+        "temperature": temperature,
+        "top_p": top_p,
+    }
+    r = _http.post(LLAMA_STREAM_URL, json=payload, stream=True, timeout=(10, 180))
+    if r.status_code >= 400:
+        body = r.text[:800]
+        r.close()
+        raise RuntimeError(f"LLaMA server error {r.status_code}: {body}")
+    return r
+
+
 bp = Blueprint("support", __name__, url_prefix="/support")
 
 
+SUPPORT_SECTIONS = ("청년", "신혼부부")
+
+
 @bp.route("/search")
 def support_search():
-    all_items = SupportList.query.all()
-    return render_template("support/support_search.html", items=all_items)
+    def render_page():
+        items = None
+
+        def render_section(section):
+            nonlocal items
+            if items is None:
+                items = SupportList.query.all()
+            return render_template("support/_support_section.html", section=section, items=items)
+
+        # 섹션 HTML은 데이터 버전 단위 조각 캐시 (캐시가 다 차 있으면 DB 조회 없음)
+        sections = [
+            cached_fragment(("support_section", s), lambda s=s: render_section(s))
+            for s in SUPPORT_SECTIONS
+        ]
+        return render_template("support/support_search.html", sections=sections)
+
+    # 데이터가 안 바뀌었으면 304
+    return conditional_page("support.search", render_page)
 
 
 @bp.get("/<int:pid>")
@@ -183,3 +227,45 @@ def llama3_api():
     except Exception as e:
         print("LLAMA3 API ERROR:", repr(e))
         return jsonify({"error": str(e)}), 500
+
+
+@bp.route("/api/llama3/stream", methods=["POST"])
+def llama3_stream_api():
+    """
+    /api/llama3 와 같은 입력 -> LLaMA 서버 SSE 를 그대로 중계 (text/event-stream)
+      data: {"token": "..."} ... / event: done {"answer": "..."} / event: error {"error": "..."}
+    """
+    data = request.get_json(silent=True) or {}
+
+    text = (data.get("text") or "").strip()
+    if not text:
+        return jsonify({"error": "text가 비어있습니다."}), 400
+
+    try:
+        upstream = open_llama3_stream(
+            text,
+            max_new_tokens=int(data.get("max_new_tokens", 256)),
+            temperature=float(data.get("temperature", 0.2)),
+            top_p=float(data.get("top_p", 0.95)),
+        )
+    except Exception as e:
+        print("LLAMA3 STREAM ERROR:", repr(e))
+        return jsonify({"error": str(e)}), 502
+
+    def relay():
+        try:
+            # chunk_size=None: 도착한 만큼 바로 넘김 (버퍼링 없음)
+            for chunk in upstream.iter_content(chunk_size=None):
+                if chunk:
+                    yield chunk
+        except requests.RequestException as e:
+            print("LLAMA3 STREAM ERROR:", repr(e))
+            yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+        finally:
+            upstream.close()
+
+    return Response(
+        stream_with_context(relay()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
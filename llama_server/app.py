@@ -1,82 +1,396 @@
 # llama_server/app.py
+import asyncio
+import copy
+import json
 import os
+import threading
+from typing import Optional
+
 import torch
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import (
+    AutoTokenizer,
+    AutoModelForCausalLM,
+    DynamicCache,
+    LogitsProcessorList,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextStreamer,
+)
+
+from json_constraint import JsonSchemaLogitsProcessor, JsonVocab, compile_schema, schema_key
+from prefix_cache import PrefixCache
+from scheduler import BatchScheduler
 
-MODEL_ID = os.getenv("MODEL_ID", "meta-llama/Meta-Llama-3-8B-Instruct")
+MODEL_ID = os.getenv("MODEL_ID", "meta-llama/Meta-Llama-3-8B-Instruct")   # 로컬 경로도 가능 (CPU 확인용 작은 모델)
 HF_TOKEN = os.getenv("HF_TOKEN")
+DEVICE = os.getenv("DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+
+# 마이크로 배치: 첫 요청 후 BATCH_WINDOW_MS 동안 최대 BATCH_MAX_SIZE 개까지 모아서 generate 1번
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "20"))
+
+# 고정 프롬프트 앞부분 KV 캐시 개수 (NLQ 시스템 프롬프트 등)
+PREFIX_CACHE_SIZE = int(os.getenv("PREFIX_CACHE_SIZE", "8"))
+
+# 스트리밍은 이 토큰 수씩 나눠 generate — 조각 사이에 기다리던 배치가 generate 스레드를 씀
+# (긴 스트림 하나가 /llama/generate 배치를 통째로 막지 않게, 배치 대기는 최대 조각 1개 시간)
+STREAM_CHUNK_TOKENS = max(1, int(os.getenv("STREAM_CHUNK_TOKENS", "16")))
 
 app = FastAPI()
 
 tokenizer = None
 model = None
+json_vocab = None
+scheduler = None
+prefix_cache = None
+stream_stats = {"active": 0, "total": 0, "chunks": 0}
 
 class GenReq(BaseModel):
     text: str
     max_new_tokens: int = 256
     temperature: float = 0.2
     top_p: float = 0.95
+    # 매번 같은 앞부분 (instruction = prefix + text) — KV 캐시를 재사용하고 text 만 새로 prefill
+    prefix: str = ""
+    # JSON 스키마(object/string/enum)를 주면 그 모양의 JSON 만 생성하고 객체가 닫히면 바로 끝냄
+    json_schema: Optional[dict] = None
 
-def build_prompt(user_text: str) -> str:
-    return f"""Below is an instruction that describes a task.
+class PrefixReq(BaseModel):
+    text: str
+
+PROMPT_HEAD = """Below is an instruction that describes a task.
 Write a response that appropriately completes the request.
 
 ### Instruction:
-{user_text}
+"""
+PROMPT_TAIL = """
 
 ### Response:
 """
 
+def build_prompt(user_text: str) -> str:
+    return PROMPT_HEAD + user_text + PROMPT_TAIL
+
 def load_model():
-    global tokenizer, model
+    global tokenizer, model, json_vocab
     if model is not None:
         return
 
-    dtype = torch.float16
-    if torch.cuda.is_available() and torch.cuda.is_bf16_supported():
-        dtype = torch.bfloat16
+    if DEVICE == "cpu":
+        dtype = torch.float32
+    else:
+        dtype = torch.float16
+        if torch.cuda.is_available() and torch.cuda.is_bf16_supported():
+            dtype = torch.bfloat16
 
     tokenizer = AutoTokenizer.from_pretrained(
         MODEL_ID, token=HF_TOKEN, use_fast=True
     )
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
+    # 배치 generate 는 왼쪽 패딩이어야 모든 row 가 같은 위치에서 이어 씀
+    tokenizer.padding_side = "left"
 
     model = AutoModelForCausalLM.from_pretrained(
         MODEL_ID,
         torch_dtype=dtype,
         token=HF_TOKEN,
-    ).to("cuda")   # fp16/bf16에서는 OK
+    ).to(DEVICE)   # fp16/bf16에서는 OK
 
     model.eval()
 
+    # 스키마 제약 디코딩용 토큰 바이트 표 (1번만)
+    json_vocab = JsonVocab(tokenizer, model.config.vocab_size, device=DEVICE)
+
+def batch_key(req: GenReq):
+    # 같은 prefix / 스키마 + 같은 generate 설정끼리만 한 배치 (greedy 는 temperature/top_p 무관)
+    base = (req.prefix, schema_key(req.json_schema))
+    if req.temperature > 0:
+        return base + (True, req.temperature, req.top_p)
+    return base + (False,)
+
+def generate_kwargs(req: GenReq):
+    if req.temperature > 0:
+        return {"do_sample": True, "temperature": req.temperature, "top_p": req.top_p}
+    return {"do_sample": False}
+
+def constraint_kwargs(req: GenReq, prompt_len: int):
+    if not req.json_schema:
+        return {}
+    processor = JsonSchemaLogitsProcessor(compile_schema(req.json_schema), json_vocab, prompt_len)
+    return {"logits_processor": LogitsProcessorList([processor])}
+
+def check_request(req: GenReq):
+    if req.json_schema:
+        try:
+            compile_schema(req.json_schema)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"json_schema: {e}")
+
+@torch.inference_mode()
+def build_prefix(text: str):
+    """PROMPT_HEAD + prefix -> (토큰, KV 캐시) — 한 번만 forward"""
+    ids = tokenizer(PROMPT_HEAD + text, return_tensors="pt")["input_ids"].to(DEVICE)
+    cache = DynamicCache()
+    model(input_ids=ids, past_key_values=cache, use_cache=True)
+    return ids, cache
+
+def encode(reqs):
+    """
+    같은 prefix 요청들 -> generate 입력 (input_ids, attention_mask, past_key_values)
+    prefix 가 있으면 [prefix 토큰 | 왼쪽 패딩 | text + 꼬리] 로 붙이고 prefix KV 캐시 복사본을 배치 크기만큼 늘려 넘김
+    (generate 는 캐시 길이 이후 토큰만 prefill)
+    """
+    prefix = reqs[0].prefix
+    if not prefix:
+        inputs = tokenizer([build_prompt(r.text) for r in reqs], return_tensors="pt", padding=True).to(DEVICE)
+        return inputs["input_ids"], inputs["attention_mask"], None
+
+    entry = prefix_cache.get(prefix)
+    rest = tokenizer(
+        [r.text + PROMPT_TAIL for r in reqs], return_tensors="pt", padding=True, add_special_tokens=False
+    ).to(DEVICE)
+    n = len(reqs)
+    input_ids = torch.cat([entry.ids.expand(n, -1), rest["input_ids"]], dim=1)
+    attention_mask = torch.cat([torch.ones_like(entry.ids).expand(n, -1), rest["attention_mask"]], dim=1)
+
+    # 원본 캐시는 generate 가 뒤에 덧붙이므로 항상 복사본
+    cache = copy.deepcopy(entry.cache)
+    if n > 1:
+        cache.batch_repeat_interleave(n)
+    return input_ids, attention_mask, cache
+
+@torch.inference_mode()
+def generate_batch(reqs):
+    """같은 prefix / 샘플링 설정의 요청 여러 개 -> answer 목록 (요청 순서대로)"""
+    input_ids, attention_mask, cache = encode(reqs)
+
+    out = model.generate(
+        input_ids=input_ids,
+        attention_mask=attention_mask,
+        past_key_values=cache,
+        max_new_tokens=max(r.max_new_tokens for r in reqs),
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        **generate_kwargs(reqs[0]),
+        **constraint_kwargs(reqs[0], input_ids.shape[1]),
+    )
+
+    # 프롬프트(왼쪽 패딩 포함) 뒤 새 토큰만, 요청별 max_new_tokens / eos 에서 자름
+    prompt_len = input_ids.shape[1]
+    answers = []
+    for row, r in zip(out, reqs):
+        new_tokens = row[prompt_len:prompt_len + r.max_new_tokens].tolist()
+        if tokenizer.eos_token_id in new_tokens:
+            new_tokens = new_tokens[:new_tokens.index(tokenizer.eos_token_id)]
+        answers.append(tokenizer.decode(new_tokens, skip_special_tokens=True).strip())
+    return answers
+
+class AsyncTextIteratorStreamer(TextStreamer):
+    """
+    TextIteratorStreamer 의 asyncio 판: generate 스레드에서 나온 텍스트 조각을 이벤트 루프 큐로
+    끝나면 None
+
+    generate 가 조각마다 end() 를 부르지만 finish() 전까지는 남은 토큰을 들고 다음 조각에서 이어서 디코딩
+    (조각 경계에서 한글이 깨지지 않게)
+    """
+    def __init__(self, tokenizer, loop, **kwargs):
+        super().__init__(tokenizer, skip_prompt=True, **kwargs)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.finished = False
+
+    def end(self):
+        if not self.finished:
+            self.next_tokens_are_prompt = True      # 다음 조각 generate 의 입력(지금까지 전체)은 건너뜀
+            return
+        super().end()
+
+    def finish(self):
+        if not self.finished:
+            self.finished = True
+            self.end()
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+        if stream_end:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        text = await self.queue.get()
+        if text is None:
+            raise StopAsyncIteration
+        return text
+
+class StopOnEvent(StoppingCriteria):
+    # 클라이언트가 끊으면 남은 토큰 생성 중단
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.event.is_set()
+
+class StreamJob:
+    """
+    스트리밍 요청 1건 — STREAM_CHUNK_TOKENS 씩 나눠 generate
+    조각마다 KV 캐시 / 지금까지 토큰 / 스키마 제약 상태를 넘겨 이어 씀 (조각으로 나눠도 결과는 한 번에 한 것과 같음)
+    step() 은 generate 스레드에서만 (scheduler.run_exclusive)
+    """
+    def __init__(self, req: GenReq, streamer, stop: threading.Event):
+        self.req = req
+        self.streamer = streamer
+        self.stop = stop
+        self.remaining = req.max_new_tokens
+        self.done = False
+        self.input_ids = None
+        self.attention_mask = None
+        self.cache = None
+        self.kwargs = None
+
+    @torch.inference_mode()
+    def step(self):
+        if self.input_ids is None:
+            self.input_ids, self.attention_mask, cache = encode([self.req])
+            self.cache = cache if cache is not None else DynamicCache()
+            self.kwargs = {**generate_kwargs(self.req), **constraint_kwargs(self.req, self.input_ids.shape[1])}
+
+        n = min(STREAM_CHUNK_TOKENS, self.remaining)
+        out = model.generate(
+            input_ids=self.input_ids,
+            attention_mask=self.attention_mask,
+            past_key_values=self.cache,
+            max_new_tokens=n,
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+            streamer=self.streamer,
+            stopping_criteria=StoppingCriteriaList([StopOnEvent(self.stop)]),
+            return_dict_in_generate=True,
+            **self.kwargs,
+        )
+        new = out.sequences.shape[1] - self.input_ids.shape[1]
+        self.input_ids = out.sequences
+        self.attention_mask = torch.cat([self.attention_mask, self.attention_mask.new_ones((1, new))], dim=1)
+        self.cache = out.past_key_values
+        self.remaining -= new
+
+        # eos / 끊김 / 길이 다 씀 -> 끝 (eos 면 조각이 n 보다 짧게 끝남)
+        self.done = (
+            new < n
+            or self.remaining <= 0
+            or self.stop.is_set()
+            or int(self.input_ids[0, -1]) == tokenizer.eos_token_id
+        )
+
+async def run_stream(job: StreamJob):
+    """조각을 하나씩 generate 스레드에 넣음 — 조각 사이에 먼저 들어온 배치가 실행됨"""
+    stream_stats["active"] += 1
+    stream_stats["total"] += 1
+    try:
+        while not job.done:
+            await scheduler.run_exclusive(job.step)
+            stream_stats["chunks"] += 1
+    finally:
+        stream_stats["active"] -= 1
+        # 예외로 끝나도 스트림은 닫히게
+        job.streamer.finish()
+
+def sse(data: dict, event: str = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return head + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @app.on_event("startup")
-def startup():
+async def startup():
+    global scheduler, prefix_cache
     load_model()
+    prefix_cache = PrefixCache(build_prefix, max_entries=PREFIX_CACHE_SIZE)
+    scheduler = BatchScheduler(
+        generate_batch,
+        max_batch_size=BATCH_MAX_SIZE,
+        window_ms=BATCH_WINDOW_MS,
+        group_key=batch_key,
+    )
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if scheduler is not None:
+        await scheduler.stop()
 
 @app.get("/health")
 def health():
-    return {"ok": True, "cuda": torch.cuda.is_available(), "model_loaded": model is not None}
+    return {
+        "ok": True,
+        "cuda": torch.cuda.is_available(),
+        "device": DEVICE,
+        "model_loaded": model is not None,
+        "queue_depth": scheduler.queue_depth() if scheduler is not None else 0,
+    }
+
+@app.get("/metrics")
+def metrics():
+    if scheduler is None:
+        return {}
+    return {
+        **scheduler.metrics(),
+        "prefix_cache": prefix_cache.metrics(),
+        "streams": {**stream_stats, "chunk_tokens": STREAM_CHUNK_TOKENS},
+    }
+
+@app.post("/llama/prefixes")
+async def register_prefix(req: PrefixReq):
+    """prefix KV 캐시 미리 만들기 (없어도 첫 요청 때 만들어짐)"""
+    if not req.text:
+        raise HTTPException(status_code=400, detail="text is required")
+    entry = await scheduler.run_exclusive(lambda: prefix_cache.get(req.text, count=False))
+    return prefix_cache.describe(entry)
+
+@app.get("/llama/prefixes")
+def list_prefixes():
+    return {"prefixes": prefix_cache.entries() if prefix_cache is not None else []}
 
 @app.post("/llama/generate")
-@torch.inference_mode()
-def generate(req: GenReq):
-    prompt = build_prompt(req.text)
-    inputs = tokenizer(prompt, return_tensors="pt").to("cuda")
+async def generate(req: GenReq):
+    check_request(req)
+    answer = await scheduler.submit(req)
+    return {"answer": answer}
 
-    out = model.generate(
-        **inputs,
-        max_new_tokens=req.max_new_tokens,
-        temperature=req.temperature,
-        top_p=req.top_p,
-        do_sample=req.temperature > 0,
-        pad_token_id=tokenizer.eos_token_id,
-        eos_token_id=tokenizer.eos_token_id,
-    )
+@app.post("/llama/generate/stream")
+async def generate_stream_sse(req: GenReq):
+    """
+    Server-Sent Events
+      data: {"token": "..."}                  (생성되는 대로)
+      event: done   data: {"answer": "..."}   (전체 답변)
+      event: error  data: {"error": "..."}
+    STREAM_CHUNK_TOKENS 토큰마다 generate 스레드를 양보 (배치 요청과 번갈아 실행)
+    """
+    check_request(req)
+    loop = asyncio.get_running_loop()
+    streamer = AsyncTextIteratorStreamer(tokenizer, loop, skip_special_tokens=True)
+    stop = threading.Event()
+
+    async def events():
+        task = asyncio.ensure_future(run_stream(StreamJob(req, streamer, stop)))
+        parts = []
+        try:
+            async for text in streamer:
+                parts.append(text)
+                yield sse({"token": text})
+            await task
+            yield sse({"answer": "".join(parts).strip()}, event="done")
+        except Exception as e:
+            yield sse({"error": str(e)}, event="error")
+        finally:
+            stop.set()
 
-    decoded = tokenizer.decode(out[0], skip_special_tokens=True)
-    if "### Response:" in decoded:
-        decoded = decoded.split("### Response:")[-1].strip()
-    return {"answer": decoded}
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
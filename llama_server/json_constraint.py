@@ -0,0 +1,393 @@
+# llama_server/json_constraint.py
+"""
+JSON 스키마 제약 디코딩 (logits processor)
+
+스키마(JSON Schema 일부: object / properties 순서 / required / string / enum / minLength / maxLength)를
+  고정 문자열  '{"contract": {"lease_type": "'
+  enum        전세 | 월세
+  고정 문자열  '"}, "region": {"district_code": "'
+  문자열      (따옴표/역슬래시/제어문자 없는 바이트, 길이 제한)
+  ...
+  고정 문자열  '"}}'
+순서의 구간으로 풀고, 매 스텝 현재 구간에서 가능한 토큰만 남김 (나머지 -inf)
+객체가 닫히면 eos 만 허용 -> 바로 생성 종료
+
+토큰은 바이트 단위로 비교 (byte-level BPE 에서 한글 한 글자가 토큰 여러 개로 쪼개져도 맞게)
+문자열 안 바이트는 UTF-8 상태기계로 검사 (잘못된 시작 바이트 / overlong / surrogate 토큰은 막음)
+"""
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import LogitsProcessor
+
+QUOTE = ord('"')
+BACKSLASH = ord("\\")
+
+# 필수가 아닌 문자열의 기본 최대 길이 (무한 문자열 방지)
+DEFAULT_MAX_LENGTH = 64
+
+
+# -------------------------------------------------
+# 스키마 -> 구간
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Lit:
+    text: bytes
+
+
+@dataclass(frozen=True)
+class Str:
+    min_chars: int
+    max_chars: int
+
+
+@dataclass(frozen=True)
+class Enum:
+    options: Tuple[bytes, ...]
+
+
+def _string_segment(schema: dict, required: bool):
+    if "enum" in schema:
+        options = []
+        for o in schema["enum"]:
+            if not isinstance(o, str):
+                raise ValueError("enum options must be strings")
+            encoded = json.dumps(o, ensure_ascii=False)[1:-1].encode("utf-8")
+            if b'"' in encoded:
+                raise ValueError("enum options must not contain quotes")
+            options.append(encoded)
+        if not required and b"" not in options:
+            options.append(b"")
+        return Enum(tuple(options))
+    min_chars = int(schema.get("minLength", 1 if required else 0))
+    max_chars = int(schema.get("maxLength", DEFAULT_MAX_LENGTH))
+    if max_chars < max(min_chars, 1):
+        raise ValueError("maxLength must be >= max(minLength, 1)")
+    return Str(min_chars, max_chars)
+
+
+def _emit(schema: dict, out: list, required: bool = True) -> None:
+    kind = schema.get("type")
+    if kind == "object":
+        props = schema.get("properties") or {}
+        if not props:
+            raise ValueError("object schema needs properties")
+        req = set(schema.get("required") or [])
+        out.append(b"{")
+        for i, (key, sub) in enumerate(props.items()):
+            out.append((", " if i else "").encode() + json.dumps(key, ensure_ascii=False).encode("utf-8") + b": ")
+            _emit(sub, out, required=key in req)
+        out.append(b"}")
+    elif kind == "string":
+        out.append(b'"')
+        out.append(_string_segment(schema, required))
+        out.append(b'"')
+    else:
+        raise ValueError(f"unsupported schema type: {kind!r} (object/string only)")
+
+
+@lru_cache(maxsize=32)
+def _compile(schema_json: str) -> Tuple:
+    parts: list = []
+    _emit(json.loads(schema_json), parts)
+
+    # 이웃한 고정 문자열 합치기
+    segments: List = []
+    for p in parts:
+        if isinstance(p, bytes):
+            if segments and isinstance(segments[-1], Lit):
+                segments[-1] = Lit(segments[-1].text + p)
+            else:
+                segments.append(Lit(p))
+        else:
+            segments.append(p)
+    return tuple(segments)
+
+
+def compile_schema(schema: dict) -> Tuple:
+    """스키마 -> 구간 목록 (지원 안 하는 스키마면 ValueError)"""
+    if not isinstance(schema, dict):
+        raise ValueError("json_schema must be an object")
+    return _compile(json.dumps(schema, ensure_ascii=False, sort_keys=False))
+
+
+def schema_key(schema: Optional[dict]) -> str:
+    # 속성 순서가 출력 순서라 정렬하지 않음
+    return json.dumps(schema, ensure_ascii=False) if schema else ""
+
+
+# -------------------------------------------------
+# UTF-8 상태기계 (Unicode Table 3-7 well-formed byte sequences)
+#   상태 = (남은 이어지는 바이트 수, 다음 바이트 하한, 상한), UTF8_START 는 글자 경계
+# -------------------------------------------------
+Utf8State = Tuple[int, int, int]
+
+UTF8_START: Utf8State = (0, 0x00, 0x7F)
+_CONT: Dict[int, Utf8State] = {1: (1, 0x80, 0xBF), 2: (2, 0x80, 0xBF)}
+
+UTF8_STATES: Tuple[Utf8State, ...] = (
+    UTF8_START,
+    (1, 0x80, 0xBF),
+    (2, 0xA0, 0xBF),    # E0 다음 (overlong 방지)
+    (2, 0x80, 0x9F),    # ED 다음 (surrogate 방지)
+    (2, 0x80, 0xBF),
+    (3, 0x90, 0xBF),    # F0 다음 (overlong 방지)
+    (3, 0x80, 0xBF),
+    (3, 0x80, 0x8F),    # F4 다음 (U+10FFFF 초과 방지)
+)
+
+
+def utf8_step(state: Utf8State, byte: int) -> Optional[Utf8State]:
+    """바이트 1개 진행, 잘못된 바이트면 None"""
+    need, lo, hi = state
+    if need:
+        if not lo <= byte <= hi:
+            return None
+        return _CONT[need - 1] if need > 1 else UTF8_START
+    if byte <= 0x7F:
+        return UTF8_START
+    if 0xC2 <= byte <= 0xDF:
+        return (1, 0x80, 0xBF)
+    if byte == 0xE0:
+        return (2, 0xA0, 0xBF)
+    if byte == 0xED:
+        return (2, 0x80, 0x9F)
+    if 0xE1 <= byte <= 0xEF:
+        return (2, 0x80, 0xBF)
+    if byte == 0xF0:
+        return (3, 0x90, 0xBF)
+    if 0xF1 <= byte <= 0xF3:
+        return (3, 0x80, 0xBF)
+    if byte == 0xF4:
+        return (3, 0x80, 0x8F)
+    return None     # 80..BF(경계에서), C0, C1, F5..FF
+
+
+def utf8_run(state: Utf8State, data: bytes) -> Optional[Utf8State]:
+    for byte in data:
+        state = utf8_step(state, byte)
+        if state is None:
+            return None
+    return state
+
+
+# -------------------------------------------------
+# 토큰 바이트 (토크나이저마다 1번)
+# -------------------------------------------------
+_BYTE_TOKEN_RE = re.compile(r"^<0x([0-9A-Fa-f]{2})>$")
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    # GPT-2 byte-level BPE 매핑 (transformers gpt2 토크나이저와 동일)
+    bs = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    cs = bs[:]
+    n = 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b)
+            cs.append(256 + n)
+            n += 1
+    return dict(zip(bs, map(chr, cs)))
+
+
+def _char_count(data: bytes) -> int:
+    """글자 수 = UTF-8 시작 바이트 수 (이어지는 바이트 10xxxxxx 제외, _RowState.chars 와 같은 기준)"""
+    return sum(1 for byte in data if byte & 0xC0 != 0x80)
+
+
+class JsonVocab:
+    """
+    토큰 id -> 바이트, UTF-8 상태별 문자열 안에 들어가도 되는 토큰 마스크, 닫는 따옴표 포함 토큰 목록,
+    토큰별 글자 수 (maxLength)
+    """
+
+    def __init__(self, tokenizer, vocab_size: int, device="cpu"):
+        self.vocab_size = vocab_size
+        self.device = device
+        self.eos_token_id = tokenizer.eos_token_id
+        special = set(tokenizer.all_special_ids)
+
+        vocab = tokenizer.get_vocab()
+        u2b = {u: b for b, u in _bytes_to_unicode().items()}
+        normal = [t for t, i in vocab.items() if i not in special]
+        byte_level = bool(normal) and all(ch in u2b for t in normal for ch in t)
+
+        self.token_bytes: List[Optional[bytes]] = [None] * vocab_size
+        for tok, i in vocab.items():
+            if i >= vocab_size or i in special or tok in tokenizer.all_special_tokens:
+                continue
+            if byte_level:
+                b = bytes(u2b[ch] for ch in tok)
+            else:
+                m = _BYTE_TOKEN_RE.match(tok)
+                b = bytes([int(m.group(1), 16)]) if m else tok.replace("▁", " ").encode("utf-8")
+            if b:
+                self.token_bytes[i] = b
+
+        # 정확히 이 바이트인 토큰들 (고정 문자열 접두사 조회용)
+        self.by_bytes: Dict[bytes, List[int]] = {}
+        # 문자열 안: 현재 UTF-8 상태에서 이어 붙여도 올바른 UTF-8 인 토큰 (상태별)
+        string_ok = {state: torch.zeros(vocab_size, dtype=torch.bool) for state in UTF8_STATES}
+        self.closers: List[Tuple[int, bytes, bytes, int]] = []   # (id, 따옴표 앞, 따옴표부터, 앞 글자 수)
+        chars = torch.zeros(vocab_size, dtype=torch.int32)
+        for i, b in enumerate(self.token_bytes):
+            if b is None:
+                continue
+            chars[i] = _char_count(b)
+            self.by_bytes.setdefault(b, []).append(i)
+            q = b.find(b'"')
+            head = b if q < 0 else b[:q]
+            if any(c < 0x20 or c == BACKSLASH or c == QUOTE for c in head):
+                continue
+            if q >= 0:
+                # 닫는 토큰: 글자 경계에서 시작해서 따옴표 앞에서 글자가 끝나야 함
+                if utf8_run(UTF8_START, head) == UTF8_START:
+                    self.closers.append((i, head, b[q:], _char_count(head)))
+                continue
+            # 이어지는 바이트로 시작하면 글자 중간 상태에서만, 아니면 글자 경계에서만 가능
+            starts = UTF8_STATES[1:] if b[0] & 0xC0 == 0x80 else (UTF8_START,)
+            for state in starts:
+                if utf8_run(state, b) is not None:
+                    string_ok[state][i] = True
+        self.string_masks: Dict[Utf8State, torch.Tensor] = {k: v.to(device) for k, v in string_ok.items()}
+        self.token_chars = chars.to(device)
+        self.max_token_chars = int(chars.max()) if vocab_size else 0
+
+        self._prefix_cache: Dict[bytes, torch.Tensor] = {}
+        self._closer_cache: Dict[Tuple[bytes, int], torch.Tensor] = {}
+        self._fits_cache: Dict[int, torch.Tensor] = {}
+
+    def _mask(self, ids: Sequence[int]) -> torch.Tensor:
+        m = torch.zeros(self.vocab_size, dtype=torch.bool, device=self.device)
+        if ids:
+            m[list(ids)] = True
+        return m
+
+    def prefix_mask(self, text: bytes) -> torch.Tensor:
+        """text 의 (비어 있지 않은) 접두사와 정확히 같은 토큰들"""
+        m = self._prefix_cache.get(text)
+        if m is None:
+            ids = [i for k in range(1, len(text) + 1) for i in self.by_bytes.get(text[:k], ())]
+            m = self._prefix_cache[text] = self._mask(ids)
+        return m
+
+    def fits_mask(self, budget: int) -> torch.Tensor:
+        """글자 수가 budget 이하인 토큰 (이어지는 바이트만 있는 토큰은 0글자)"""
+        budget = max(0, min(budget, self.max_token_chars))
+        m = self._fits_cache.get(budget)
+        if m is None:
+            m = self._fits_cache[budget] = self.token_chars <= budget
+        return m
+
+    def closer_mask(self, follow: bytes, max_head_chars: int) -> torch.Tensor:
+        """문자열을 닫는 토큰: (안전한 바이트, max_head_chars 글자 이하) + 따옴표로 시작하는 follow 의 접두사"""
+        key = (follow, max(0, min(max_head_chars, self.max_token_chars)))
+        m = self._closer_cache.get(key)
+        if m is None:
+            ids = [i for i, head, tail, n in self.closers if follow.startswith(tail) and n <= key[1]]
+            m = self._closer_cache[key] = self._mask(ids)
+        return m
+
+
+# -------------------------------------------------
+# 행별 상태 + logits processor
+# -------------------------------------------------
+class _RowState:
+    __slots__ = ("seg", "pos", "chars", "utf8", "cur")
+
+    def __init__(self):
+        self.seg = 0        # 현재 구간
+        self.pos = 0        # Lit: 맞춘 바이트 수
+        self.chars = 0      # Str: 글자 수 (UTF-8 시작 바이트 수)
+        self.utf8 = UTF8_START  # Str: UTF-8 상태 (글자 경계여야 닫을 수 있음)
+        self.cur = b""      # Enum: 지금까지 바이트
+
+
+class JsonSchemaLogitsProcessor(LogitsProcessor):
+    """
+    배치 행마다 구간 상태를 들고, 새로 붙은 토큰 바이트로 상태를 옮긴 뒤 허용 토큰만 남김
+    prompt_len: generate 에 넘긴 input_ids 길이 (그 뒤가 생성 토큰)
+    """
+
+    def __init__(self, segments: Tuple, vocab: JsonVocab, prompt_len: int):
+        self.segments = segments
+        self.vocab = vocab
+        self.prompt_len = prompt_len
+        self._rows: List[_RowState] = []
+        self._seen: List[int] = []
+
+    def _feed(self, st: _RowState, data: bytes) -> None:
+        segs = self.segments
+        for byte in data:
+            while st.seg < len(segs):
+                seg = segs[st.seg]
+                if isinstance(seg, Lit):
+                    st.pos += 1
+                    if st.pos == len(seg.text):
+                        st.seg, st.pos = st.seg + 1, 0
+                    break
+                if byte == QUOTE:
+                    # 문자열/enum 끝 -> 다음 고정 문자열(따옴표로 시작)에서 이 바이트 다시 처리
+                    st.seg, st.chars, st.utf8, st.cur = st.seg + 1, 0, UTF8_START, b""
+                    continue
+                if isinstance(seg, Str):
+                    if st.utf8 == UTF8_START:
+                        st.chars += 1
+                    # 마스크로 막혀서 None 일 일은 없지만, 오면 글자 경계로 되돌림
+                    st.utf8 = utf8_step(st.utf8, byte) or UTF8_START
+                else:
+                    st.cur += bytes([byte])
+                break
+
+    def _allowed(self, st: _RowState) -> torch.Tensor:
+        segs, vocab = self.segments, self.vocab
+        if st.seg >= len(segs):
+            return vocab._mask([vocab.eos_token_id])
+        seg = segs[st.seg]
+        if isinstance(seg, Lit):
+            return vocab.prefix_mask(seg.text[st.pos:])
+
+        follow = segs[st.seg + 1].text      # 닫는 따옴표로 시작하는 다음 고정 문자열
+        if isinstance(seg, Str):
+            # maxLength: 토큰이 새로 시작하는 글자 수가 남은 글자 수 이하인 것만
+            budget = seg.max_chars - st.chars
+            inner = vocab.string_masks[st.utf8] & vocab.fits_mask(budget)
+            if st.utf8 != UTF8_START or st.chars < seg.min_chars:
+                return inner
+            return inner | vocab.closer_mask(follow, budget)
+
+        m = torch.zeros(vocab.vocab_size, dtype=torch.bool, device=vocab.device)
+        for option in seg.options:
+            if option.startswith(st.cur):
+                m |= vocab.prefix_mask(option[len(st.cur):] + follow)
+        return m
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if not self._rows:
+            self._rows = [_RowState() for _ in range(input_ids.shape[0])]
+            self._seen = [self.prompt_len] * input_ids.shape[0]
+
+        vocab = self.vocab
+        masks = []
+        for b, st in enumerate(self._rows):
+            for tok in input_ids[b, self._seen[b]:].tolist():
+                if st.seg < len(self.segments):
+                    data = vocab.token_bytes[tok] if tok < vocab.vocab_size else None
+                    if data:
+                        self._feed(st, data)
+            self._seen[b] = input_ids.shape[1]
+
+            m = self._allowed(st)
+            if not bool(m.any()):
+                m = vocab._mask([vocab.eos_token_id])   # 갈 곳이 없으면 끝냄
+            masks.append(m)
+
+        allowed = torch.stack(masks).to(scores.device)
+        if allowed.shape[1] < scores.shape[1]:
+            pad = torch.zeros(allowed.shape[0], scores.shape[1] - allowed.shape[1], dtype=torch.bool, device=scores.device)
+            allowed = torch.cat([allowed, pad], dim=1)
+        return scores.masked_fill(~allowed, float("-inf"))
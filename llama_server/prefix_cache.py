@@ -0,0 +1,85 @@
+# llama_server/prefix_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+
+@dataclass
+class PrefixEntry:
+    key: str
+    chars: int
+    ids: Any            # (1, L) 프롬프트 앞부분 토큰
+    cache: Any          # 그 토큰들의 past_key_values (DynamicCache) — 쓸 때는 복사본으로
+    build_ms: float
+    hits: int = 0
+
+
+class PrefixCache:
+    """
+    고정 프롬프트 앞부분(시스템 프롬프트 + 규칙) -> 미리 계산한 KV 캐시 (LRU)
+
+    - build(text) -> (ids, cache) 는 generate 스레드에서만 호출 (GPU 작업 직렬화)
+    - 같은 prefix 로 오는 요청은 prefill 을 뒷부분(사용자 입력)만 함
+    """
+
+    def __init__(self, build: Callable[[str], Tuple[Any, Any]], max_entries: int = 8):
+        self.build = build
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, PrefixEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, text: str, count: bool = True) -> PrefixEntry:
+        key = self.key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if count:
+                    entry.hits += 1
+                    self.hits += 1
+                    self.tokens_saved += int(entry.ids.shape[1])
+                return entry
+
+        started = time.perf_counter()
+        ids, cache = self.build(text)
+        entry = PrefixEntry(key, len(text), ids, cache, (time.perf_counter() - started) * 1000)
+        with self._lock:
+            if count:
+                self.misses += 1
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def describe(self, entry: PrefixEntry) -> Dict[str, Any]:
+        return {
+            "key": entry.key,
+            "chars": entry.chars,
+            "tokens": int(entry.ids.shape[1]),
+            "hits": entry.hits,
+            "build_ms": round(entry.build_ms, 1),
+        }
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self.describe(e) for e in self._entries.values()]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "tokens_saved": self.tokens_saved,
+        }
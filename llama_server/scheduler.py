@@ -0,0 +1,189 @@
+# llama_server/scheduler.py
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class _Pending:
+    req: Any
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class BatchScheduler:
+    """
+    요청 모아서 한 번에 generate (마이크로 배치)
+
+    - 첫 요청이 들어오면 window_ms 동안 (또는 max_batch_size 찰 때까지) 더 모음
+    - 샘플링 설정이 같은 요청끼리만 한 배치 (generate 설정은 배치당 1개)
+    - run_batch(reqs) -> answers 는 스레드 1개에서 실행 (GPU 작업 직렬화, 그동안 이벤트 루프는 다음 배치 수집)
+    - 결과/예외는 요청별 future 로 돌려줌
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[str]],
+        max_batch_size: int = 8,
+        window_ms: float = 20.0,
+        group_key: Optional[Callable[[Any], Tuple]] = None,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self.group_key = group_key or (lambda req: ())
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generate")
+        self._carry: List[_Pending] = []     # 다른 설정이라 이번 배치에서 빠진 요청
+
+        # 지표
+        self.batches = 0
+        self.requests = 0
+        self.errors = 0
+        self.exclusive_runs = 0
+        self._exclusive_s_total = 0.0
+        self.max_exclusive_s = 0.0
+        self.batch_sizes: Counter = Counter()
+        self.in_flight = 0
+        self._wait_s_total = 0.0
+        self._gen_s_total = 0.0
+        self.last_batch_s = 0.0
+
+    # -------------------------------------------------
+    # 시작 / 종료 (FastAPI startup / shutdown)
+    # -------------------------------------------------
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, req: Any) -> str:
+        if self._queue is None:
+            raise RuntimeError("scheduler is not started")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Pending(req, future))
+        return await future
+
+    async def run_exclusive(self, fn: Callable, *args) -> Any:
+        """
+        배치 말고 단독 실행 (스트리밍 generate 조각, prefix 캐시 만들기) — 같은 스레드라 배치 generate 와 겹치지 않음
+        실행하는 동안 배치는 기다림 -> 오래 걸리는 일은 잘게 나눠서 여러 번 호출 (max_exclusive_ms 로 확인)
+        """
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                took = time.perf_counter() - started
+                self._exclusive_s_total += took
+                self.max_exclusive_s = max(self.max_exclusive_s, took)
+
+        self.exclusive_runs += 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+
+    # -------------------------------------------------
+    # 배치 수집 / 실행
+    # -------------------------------------------------
+    async def _collect(self) -> List[_Pending]:
+        """첫 요청 기준 window 동안 같은 설정 요청을 max_batch_size 까지"""
+        first = self._carry.pop(0) if self._carry else await self._queue.get()
+        key = self.group_key(first.req)
+        batch = [first]
+
+        # 지난번에 밀린 요청 중 같은 설정부터
+        rest = []
+        for p in self._carry:
+            if len(batch) < self.max_batch_size and self.group_key(p.req) == key:
+                batch.append(p)
+            else:
+                rest.append(p)
+        self._carry = rest
+
+        deadline = time.perf_counter() + self.window_s
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                p = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if self.group_key(p.req) == key:
+                batch.append(p)
+            else:
+                self._carry.append(p)
+        return batch
+
+    async def _loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            batch = [p for p in batch if not p.future.cancelled()]   # 기다리다 끊긴 요청 제외
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self.in_flight = len(batch)
+            try:
+                answers = await loop.run_in_executor(self._executor, self.run_batch, [p.req for p in batch])
+                if len(answers) != len(batch):
+                    raise RuntimeError(f"run_batch returned {len(answers)} answers for {len(batch)} requests")
+            except Exception as e:
+                self.errors += len(batch)
+                for p in batch:
+                    if not p.future.done():
+                        p.future.set_exception(e)
+            else:
+                for p, answer in zip(batch, answers):
+                    if not p.future.done():
+                        p.future.set_result(answer)
+            finally:
+                self.in_flight = 0
+
+            self.last_batch_s = time.perf_counter() - started
+            self.batches += 1
+            self.requests += len(batch)
+            self.batch_sizes[len(batch)] += 1
+            self._gen_s_total += self.last_batch_s
+            self._wait_s_total += sum(started - p.enqueued for p in batch)
+
+    # -------------------------------------------------
+    # 지표 (/metrics)
+    # -------------------------------------------------
+    def queue_depth(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._carry)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "in_flight": self.in_flight,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": round(self.window_s * 1000, 1),
+            "batches": self.batches,
+            "requests": self.requests,
+            "errors": self.errors,
+            "exclusive_runs": self.exclusive_runs,
+            "avg_exclusive_ms": round(self._exclusive_s_total / self.exclusive_runs * 1000, 1) if self.exclusive_runs else 0.0,
+            "max_exclusive_ms": round(self.max_exclusive_s * 1000, 1),
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "batch_size_hist": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            "avg_queue_wait_ms": round(self._wait_s_total / self.requests * 1000, 1) if self.requests else 0.0,
+            "avg_batch_ms": round(self._gen_s_total / self.batches * 1000, 1) if self.batches else 0.0,
+            "last_batch_ms": round(self.last_batch_s * 1000, 1),
+        }
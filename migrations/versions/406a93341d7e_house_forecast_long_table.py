@@ -0,0 +1,52 @@
+"""HOUSE_FORECAST long-format forecast table
+
+Revision ID: 406a93341d7e
+Revises: 
+Create Date: 2026-10-17 10:12:31.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '406a93341d7e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# app/services/forecast_repository.HOUSE_KEY_SQL 과 같은 식이어야 함
+HOUSE_KEY_SQL = (
+    "(district || '|' || building_name || '|' || house_type || '|' || floor || '|' || area_m2)"
+)
+
+METRICS = ("deposit", "monthly_rent")
+QUARTERS = [(yy, q) for yy in range(25, 31) for q in range(1, 5)]
+
+
+def upgrade():
+    op.create_table(
+        'HOUSE_FORECAST',
+        sa.Column('house_key', sa.Text(), nullable=False),
+        sa.Column('metric', sa.Text(), nullable=False),
+        sa.Column('yq', sa.Text(), nullable=False),
+        sa.Column('value', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('house_key', 'metric', 'yq'),
+    )
+    op.create_index('ix_house_forecast_metric_yq', 'HOUSE_FORECAST', ['metric', 'yq'], unique=False)
+
+    # HOUSE_INFO 와이드 컬럼(deposit_25q1 ...) -> 롱 포맷 백필
+    for metric in METRICS:
+        for yy, q in QUARTERS:
+            col = f"{metric}_{yy}q{q}"
+            op.execute(
+                f"INSERT OR REPLACE INTO HOUSE_FORECAST (house_key, metric, yq, value) "
+                f"SELECT {HOUSE_KEY_SQL}, '{metric}', '20{yy}Q{q}', {col} "
+                f"FROM HOUSE_INFO WHERE {col} IS NOT NULL"
+            )
+
+
+def downgrade():
+    op.drop_index('ix_house_forecast_metric_yq', table_name='HOUSE_FORECAST')
+    op.drop_table('HOUSE_FORECAST')
@@ -0,0 +1,40 @@
+"""HOUSE_INFO composite indexes for search / match access patterns
+
+Revision ID: 493cb4a4a19c
+Revises: 406a93341d7e
+Create Date: 2026-10-17 11:03:54.207115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '493cb4a4a19c'
+down_revision = '406a93341d7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /predict/search: district + house_type + lease_type (=) + area_m2 (범위) + floor
+    op.create_index(
+        'ix_house_info_search',
+        'HOUSE_INFO',
+        ['district', 'house_type', 'lease_type', 'area_m2', 'floor'],
+        unique=False,
+    )
+    # input_builder: district + dong_name + house_type (+ building_name)
+    op.create_index(
+        'ix_house_info_match',
+        'HOUSE_INFO',
+        ['district', 'dong_name', 'house_type', 'building_name'],
+        unique=False,
+    )
+    # 플래너가 새 인덱스 선택도를 알 수 있게 통계 갱신
+    op.execute("ANALYZE HOUSE_INFO")
+
+
+def downgrade():
+    op.drop_index('ix_house_info_match', table_name='HOUSE_INFO')
+    op.drop_index('ix_house_info_search', table_name='HOUSE_INFO')
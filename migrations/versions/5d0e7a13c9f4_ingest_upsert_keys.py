@@ -0,0 +1,39 @@
+"""unique keys for bulk ingest upserts (HOUSE_INFO composite PK, SUPPORT_LIST source_type+title)
+
+Revision ID: 5d0e7a13c9f4
+Revises: b81f4c0de2a7
+Create Date: 2026-10-17 15:40:12.388104
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0e7a13c9f4'
+down_revision = 'b81f4c0de2a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 배포된 DB 파일의 HOUSE_INFO 에는 PK 제약이 없음 (모델의 복합 PK만 있음)
+    # -> INSERT ... ON CONFLICT 대상이 될 unique 인덱스 (HOUSE_KEY_SQL 과 같은 컬럼 순서)
+    op.create_index(
+        'ux_house_info_key',
+        'HOUSE_INFO',
+        ['district', 'building_name', 'house_type', 'floor', 'area_m2'],
+        unique=True,
+    )
+    # SUPPORT_LIST.id 는 적재 때마다 새로 생성 -> 자연키 (구분 + 제목)
+    op.create_index(
+        'ux_support_list_source_title',
+        'SUPPORT_LIST',
+        ['source_type', 'title'],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ux_support_list_source_title', table_name='SUPPORT_LIST')
+    op.drop_index('ux_house_info_key', table_name='HOUSE_INFO')
@@ -0,0 +1,41 @@
+"""HOUSE_FORECAST_CUBE per-quarter district/dong aggregate table
+
+Revision ID: b81f4c0de2a7
+Revises: 493cb4a4a19c
+Create Date: 2026-10-17 14:22:05.613042
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4c0de2a7'
+down_revision = '493cb4a4a19c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 집계값은 numpy로 계산해서 채움 (app/services/forecast_cube.py)
+    # 차원 값 '*' = 그 차원 전체 롤업 셀 (예: dong_name='*' -> 구 전체)
+    # 마이그레이션 후: FLASK_APP=run.py flask rebuild-cube
+    op.create_table(
+        'HOUSE_FORECAST_CUBE',
+        sa.Column('district', sa.Text(), nullable=False),
+        sa.Column('dong_name', sa.Text(), nullable=False),      # NULL 동은 '' 로 저장
+        sa.Column('house_type', sa.Text(), nullable=False),
+        sa.Column('lease_type', sa.Text(), nullable=False),
+        sa.Column('metric', sa.Text(), nullable=False),          # deposit / monthly_rent
+        sa.Column('yq', sa.Text(), nullable=False),              # 2025Q1 ~
+        sa.Column('n', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=True),
+        sa.Column('median', sa.Float(), nullable=True),
+        sa.Column('p10', sa.Float(), nullable=True),
+        sa.Column('p90', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('district', 'dong_name', 'house_type', 'lease_type', 'metric', 'yq'),
+    )
+
+
+def downgrade():
+    op.drop_table('HOUSE_FORECAST_CUBE')
@@ -0,0 +1,31 @@
+"""APP_META key/value table (data_version counter)
+
+Revision ID: e3a9c5f18b62
+Revises: 5d0e7a13c9f4
+Create Date: 2026-10-17 16:58:31.027415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c5f18b62'
+down_revision = '5d0e7a13c9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # data_version: 데이터 적재/예측 갱신 커밋마다 +1 (app/services/data_version.py)
+    op.create_table(
+        'APP_META',
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.execute("INSERT INTO APP_META (key, value) VALUES ('data_version', '0')")
+
+
+def downgrade():
+    op.drop_table('APP_META')
@@ -0,0 +1,39 @@
+"""HOUSE_INFO search index covers the map cluster columns
+
+Revision ID: f1c7a9d3e2b6
+Revises: e3a9c5f18b62
+Create Date: 2026-10-17 21:12:40.518392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c7a9d3e2b6'
+down_revision = 'e3a9c5f18b62'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_KEY = ['district', 'house_type', 'lease_type', 'area_m2', 'floor']
+
+# /predict/api/clusters 가 읽는 컬럼 -> 인덱스만 읽고 끝남 (테이블 row 조회 없음)
+CLUSTER_COLUMNS = ['dong_name', 'latitude', 'longitude', 'recent_deposit', 'recent_monthly']
+
+
+def upgrade():
+    # 앞 5개(조건 + 키셋 정렬 순서)는 그대로, 뒤에 집계 컬럼만 덧붙임
+    op.drop_index('ix_house_info_search', table_name='HOUSE_INFO')
+    op.create_index(
+        'ix_house_info_search',
+        'HOUSE_INFO',
+        SEARCH_KEY + CLUSTER_COLUMNS,
+        unique=False,
+    )
+    op.execute("ANALYZE HOUSE_INFO")
+
+
+def downgrade():
+    op.drop_index('ix_house_info_search', table_name='HOUSE_INFO')
+    op.create_index('ix_house_info_search', 'HOUSE_INFO', SEARCH_KEY, unique=False)